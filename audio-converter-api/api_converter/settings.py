@@ -57,6 +57,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'transcription_api.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'api_converter.urls'
@@ -89,6 +90,22 @@ DATABASES = {
     }
 }
 
+# Caches back upload rate limits and API responses. Local memory is per
+# process; use Redis or Memcached when running several processes, e.g.
+# {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379'}
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'transcription-api',
+    }
+}
+
+# Detail and list API responses are cached per row version (updated_at) and
+# answered with ETag/Last-Modified; RESPONSE_CACHE_TIMEOUT = None disables it
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 3600  # Seconds to keep responses; changed rows get new keys anyway
+RESPONSE_CACHE_LIVE_TIMEOUT = 5  # Pending and processing rows, whose completion estimate drifts
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -163,6 +180,121 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # File upload settings
 DATA_UPLOAD_MAX_MEMORY_SIZE = 100 * 1024 * 1024  # 100MB
 FILE_UPLOAD_MAX_MEMORY_SIZE = 100 * 1024 * 1024  # 100MB
+# Uploads are sniffed and their headers parsed before they are stored; longer audio is rejected
+MAX_AUDIO_DURATION_SECONDS = 4 * 3600  # None disables the limit
 
 # Whisper model configuration
 WHISPER_MODEL_NAME = 'base'  # Options: tiny, base, small, medium, large
+WHISPER_DETECTION_MODEL_NAME = 'tiny'  # Detects language when no multilingual model is resident
+WHISPER_ENGLISH_MODEL_NAME = None  # e.g. 'base.en' to route English audio to an English-only model
+
+# Two-pass transcription: a quick draft from a small model, refined in the background
+TWO_PASS_DEFAULT = False  # Whether uploads that don't say otherwise get a draft first
+TWO_PASS_DRAFT_MODEL_NAME = 'tiny'  # Ignored when it isn't smaller than the final model
+
+# Decoding profiles trade accuracy for speed; uploads may pick one by name.
+# Built in: fast (greedy, no fallback), balanced (Whisper's defaults) and
+# accurate (beam search, fp32). Entries here override or add to them, e.g.
+# {'fast': {'beam_size': 2}, 'archive': {'beam_size': 10, 'fp16': False}}
+DECODING_PROFILES = {}
+DEFAULT_DECODING_PROFILE = 'balanced'
+
+# Request profiling (opt-in). Profiles are stored under MEDIA_ROOT/profiles/
+PROFILING_SAMPLE_RATE = 0.0  # Fraction of requests and transcriptions to profile
+PROFILING_TOKEN = ''  # Requests sending this value in the X-Profile header are profiled
+PROFILING_MAX_PROFILES = 200
+PROFILING_MAX_AGE_DAYS = 7
+
+# Storage lifecycle of processed uploads, applied by `manage.py compact_audio`.
+# None disables a tier; failed transcriptions always keep their original upload.
+AUDIO_COMPACT_AFTER_HOURS = None  # Transcode completed uploads older than this
+AUDIO_COMPACT_CODEC = 'opus'  # Options: opus, flac
+AUDIO_DELETE_AFTER_DAYS = None  # Delete audio (keeping the transcript) after this
+
+# File storage. To share uploads between nodes, point "default" at an object
+# store (e.g. django-storages' S3Storage); transcription_api.storage.LocalObjectStorage
+# is a local stand-in that, like S3, exposes no filesystem paths.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Node-local cache for audio streamed out of non-filesystem storage before decoding
+AUDIO_SCRATCH_DIR = BASE_DIR / 'scratch'
+AUDIO_SCRATCH_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 2GB
+
+# Audio playback streaming. With an offload mode the web server sends the bytes:
+# 'x-accel-redirect' (nginx, needs an internal location for the prefix mapped
+# to MEDIA_ROOT) or 'x-sendfile' (Apache mod_xsendfile, lighttpd)
+AUDIO_STREAM_OFFLOAD = None
+AUDIO_STREAM_ACCEL_PREFIX = '/protected-media/'
+AUDIO_STREAM_MAX_AGE = 3600  # Seconds browsers may reuse audio without revalidating
+
+# Bulk retry of failed transcriptions (admin action and `manage.py retry_transcriptions`)
+RETRY_MAX_WORKERS = 2  # Transcriptions processed concurrently
+RETRY_MAX_ATTEMPTS = 3  # Attempts per transcription before it stays failed
+RETRY_BACKOFF_SECONDS = 5  # Delay after the first failure, doubled on each further one
+
+# Job scheduling. With TRANSCRIPTION_ASYNC uploads return 202 and are processed
+# by `manage.py process_transcriptions`: interactive jobs before batch jobs, and
+# clients within a class by weighted round-robin. Uploads are batch unless they
+# come from a staff user or a client listed in SCHEDULER_INTERACTIVE_CLIENTS
+TRANSCRIPTION_ASYNC = False
+TRANSCRIPTION_WORKERS = 1  # Worker threads per process_transcriptions process
+SCHEDULER_FAIRNESS_WINDOW = 600  # Seconds of recent service counted per client
+SCHEDULER_CLIENT_WEIGHTS = {}  # e.g. {'key:3f9a1c2b4d5e': 3}; unlisted clients weigh 1
+SCHEDULER_INTERACTIVE_CLIENTS = []  # Client ids allowed the interactive class, e.g. ['key:3f9a1c2b4d5e']
+SCHEDULER_SHORTEST_JOB_FIRST = False  # Run each client's shortest job (by probed duration) first
+
+# Worker memory watchdog. A process_transcriptions process over either limit
+# stops claiming jobs, finishes the ones it has and restarts itself in place
+WORKER_MAX_RSS_MB = None  # e.g. 6000, leaving headroom below the node's memory
+WORKER_MAX_JOBS = None  # Restart after this many jobs regardless of memory
+WORKER_MEMORY_SAMPLE_SECONDS = 1.0  # How often RSS is sampled for the limits and per-job peaks
+
+# Job leases. A worker holds a lease on each job it runs and renews it every
+# third of JOB_LEASE_SECONDS; jobs whose lease lapses (the worker crashed or
+# hung) are requeued by the reaper, and failed after JOB_MAX_ATTEMPTS starts
+JOB_LEASE_SECONDS = 120
+JOB_MAX_ATTEMPTS = 3
+
+# Clients are scheduled and throttled by X-Api-Key only when the key is listed
+# here, and otherwise by user or address, so made-up keys buy nothing
+API_KEYS = []
+
+# Upload admission control: a per-client token bucket answers 429, and once the
+# queued and in-progress audio exceeds the backlog limit new uploads get 503.
+# Both carry Retry-After. Buckets live in the default cache, so use a shared
+# cache (Redis/Memcached) when running several processes
+UPLOAD_RATE_PER_MINUTE = 10  # Sustained uploads per client; None disables rate limiting
+UPLOAD_BURST = 5  # Uploads a client may make back to back
+LOAD_SHED_MAX_BACKLOG_SECONDS = 4 * 3600  # Audio-seconds of backlog; None disables load shedding
+LOAD_SHED_ASSUMED_BYTES_PER_SECOND = 16000  # Duration estimate for files not yet decoded (~128 kbps)
+
+# Change feed (/api/transcriptions/changes/): consumers page through rows by an
+# opaque (updated_at, id) cursor and may long-poll with ?wait=
+CHANGE_FEED_SETTLE_SECONDS = 2  # Hold back rows this fresh so slower transactions can't be skipped
+CHANGE_FEED_MAX_WAIT = 30  # Longest long-poll a client may ask for, in seconds
+CHANGE_FEED_POLL_INTERVAL = 1.0  # Seconds between database checks while long-polling
+
+# Transcript compression. With a codec set, saved transcripts longer than the
+# minimum are stored compressed ('zstd' needs the zstandard package) and decoded
+# on load; `manage.py compress_transcripts` converts existing rows. Admin text
+# search only matches transcripts that are still stored as plain text
+TRANSCRIPT_COMPRESSION = None  # None, 'zlib' or 'zstd'
+TRANSCRIPT_COMPRESSION_MIN_LENGTH = 1024  # Shorter transcripts aren't worth compressing
+
+# Completion webhooks. Uploads may pass callback_url (public addresses only); a
+# dispatcher thread (or `manage.py dispatch_webhooks`) POSTs {"events": [...]} signed with
+# X-Webhook-Signature: sha256=HMAC(WEBHOOK_SECRET, "<X-Webhook-Timestamp>.<body>").
+# Nothing is sent until WEBHOOK_SECRET is changed from this placeholder
+WEBHOOK_SECRET = 'django-insecure-webhook-secret'  # Share with clients
+WEBHOOK_ALLOWED_HOSTS = []  # Callback hosts allowed to resolve to private addresses, e.g. ['127.0.0.1']
+WEBHOOK_BATCH_SIZE = 20  # Events for the same URL sent in one POST
+WEBHOOK_MAX_ATTEMPTS = 8  # Attempts before a delivery is marked failed
+WEBHOOK_BACKOFF_SECONDS = 10  # Delay after the first failure, doubled on each further one
+WEBHOOK_TIMEOUT = 10  # Seconds to wait for a receiver
@@ -1,26 +1,51 @@
-from django.contrib import admin
-from .models import AudioTranscription
+from django.conf import settings
+from django.contrib import admin, messages
+from django.utils import timezone
+from django.utils.html import format_html
+from .models import AudioTranscription, RequestProfile, RetryBatch, TranscriptionRollup, WebhookDelivery
+from .retry import close_finished_batches, process_batch_in_background, requeue_failed
+from .scheduling import queue_stats
+from .stats import rollup_stats
+from .timing import build_slowness_report
 
 
 @admin.register(AudioTranscription)
 class AudioTranscriptionAdmin(admin.ModelAdmin):
     list_display = [
         'id', 'original_filename', 'file_format', 'file_size_display',
-        'status', 'processing_time_display', 'created_at'
+        'status', 'audio_duration_display', 'processing_time_display',
+        'real_time_factor', 'created_at'
     ]
-    list_filter = ['status', 'file_format', 'created_at']
+    list_filter = ['status', 'priority', 'file_format', 'storage_tier', 'language', 'model_name', 'decoding_profile', 'refinement_status', 'created_at']
     search_fields = ['original_filename', 'transcription_text']
     readonly_fields = [
         'id', 'created_at', 'updated_at', 'file_size_display',
-        'processing_time_display'
+        'processing_time_display', 'audio_duration', 'sample_rate', 'channels',
+        'real_time_factor', 'stage_timings', 'attempts', 'refinement_attempts', 'retry_batch', 'client_id', 'started_at',
+        'finished_at', 'draft_text', 'draft_model_name', 'peak_rss_bytes', 'lease_owner', 'lease_expires_at', 'heartbeat_at'
     ]
     
     fieldsets = (
         ('File Information', {
-            'fields': ('audio_file', 'original_filename', 'file_size', 'file_format')
+            'fields': ('audio_file', 'original_filename', 'file_size', 'file_format', 'storage_tier')
         }),
         ('Transcription Results', {
-            'fields': ('transcription_text', 'status', 'processing_time', 'error_message')
+            'fields': (
+                'transcription_text', 'status', 'processing_time', 'error_message',
+                'language', 'language_probability', 'model_name', 'decoding_profile', 'attempts', 'retry_batch'
+            )
+        }),
+        ('Two-pass Revisions', {
+            'fields': ('two_pass', 'refinement_status', 'refinement_attempts', 'draft_model_name', 'draft_text'),
+            'classes': ('collapse',)
+        }),
+        ('Scheduling', {
+            'fields': ('priority', 'client_id', 'started_at', 'finished_at', 'callback_url', 'lease_owner', 'lease_expires_at', 'heartbeat_at'),
+            'classes': ('collapse',)
+        }),
+        ('Performance', {
+            'fields': ('audio_duration', 'sample_rate', 'channels', 'real_time_factor', 'stage_timings', 'peak_rss_bytes'),
+            'classes': ('collapse',)
         }),
         ('Metadata', {
             'fields': ('created_at', 'updated_at'),
@@ -36,30 +61,126 @@ class AudioTranscriptionAdmin(admin.ModelAdmin):
         return obj.get_processing_time_display()
     processing_time_display.short_description = 'Processing Time'
     
+    def audio_duration_display(self, obj):
+        return obj.get_audio_duration_display()
+    audio_duration_display.short_description = 'Duration'
+    
+    def get_search_fields(self, request):
+        fields = super().get_search_fields(request)
+        if getattr(settings, 'TRANSCRIPT_COMPRESSION', None):
+            # Compressed rows store base64, which a text search would match at random
+            return [field for field in fields if field != 'transcription_text']
+        return fields
+    
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context=extra_context)
+        # Build the report from the filtered changelist so it follows the sidebar filters
+        changelist = getattr(response, 'context_data', {}).get('cl')
+        if changelist is not None:
+            response.context_data['slowness_report'] = build_slowness_report(changelist.queryset)
+            close_finished_batches()
+            response.context_data['active_retry_batches'] = RetryBatch.objects.filter(finished_at__isnull=True)
+            response.context_data['queue_stats'] = queue_stats()
+        return response
+    
     actions = ['retry_failed_transcriptions']
     
     def retry_failed_transcriptions(self, request, queryset):
-        """Retry failed transcriptions"""
-        failed_transcriptions = queryset.filter(status='failed')
-        count = 0
+        """Re-queue failed transcriptions in one UPDATE and process them in the background
         
-        for transcription in failed_transcriptions:
-            try:
-                transcription.status = 'pending'
-                transcription.error_message = ''
-                transcription.save()
-                count += 1
-            except Exception as e:
-                self.message_user(
-                    request,
-                    f"Error retrying transcription {transcription.id}: {e}",
-                    level='ERROR'
-                )
+        In async mode the queue workers pick them up, so Whisper never loads in the web process.
+        """
+        batch = requeue_failed(queryset, requested_by=f'admin:{request.user}')
+        if batch is None:
+            self.message_user(request, "No failed transcriptions selected.", level=messages.WARNING)
+            return
         
-        if count > 0:
-            self.message_user(
-                request,
-                f"Successfully queued {count} failed transcriptions for retry."
-            )
+        if not getattr(settings, 'TRANSCRIPTION_ASYNC', False):
+            process_batch_in_background(batch)
+        self.message_user(
+            request,
+            f"Successfully queued {batch.total} failed transcriptions for retry. "
+            f"Progress is shown above the list and under Retry Batches."
+        )
     
     retry_failed_transcriptions.short_description = "Retry failed transcriptions"
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = [
+        'created_at', 'kind', 'label', 'method', 'status_code',
+        'trigger', 'duration', 'transcription'
+    ]
+    list_filter = ['kind', 'trigger', 'created_at']
+    search_fields = ['label']
+    readonly_fields = [
+        'kind', 'label', 'method', 'status_code', 'trigger', 'duration',
+        'profile_file', 'transcription', 'created_at', 'summary_display'
+    ]
+    exclude = ['summary']
+    
+    def summary_display(self, obj):
+        return format_html('<pre>{}</pre>', obj.summary)
+    summary_display.short_description = 'Summary'
+    
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(RetryBatch)
+class RetryBatchAdmin(admin.ModelAdmin):
+    list_display = ['id', 'requested_by', 'total', 'progress_display', 'created_at', 'finished_at']
+    readonly_fields = ['requested_by', 'total', 'progress_display', 'created_at', 'finished_at']
+    
+    def progress_display(self, obj):
+        return obj.get_progress_display()
+    progress_display.short_description = 'Progress'
+    
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(WebhookDelivery)
+class WebhookDeliveryAdmin(admin.ModelAdmin):
+    list_display = ['id', 'event', 'url', 'transcription', 'status', 'attempts', 'last_status_code', 'created_at', 'delivered_at']
+    list_filter = ['status', 'event']
+    search_fields = ['url']
+    readonly_fields = [
+        'transcription', 'url', 'event', 'payload', 'attempts', 'last_status_code', 'last_error',
+        'created_at', 'delivered_at'
+    ]
+    actions = ['redeliver']
+    
+    def redeliver(self, request, queryset):
+        """Send the selected events again on the dispatcher's next pass"""
+        count = queryset.update(status='pending', attempts=0, next_attempt_at=timezone.now())
+        self.message_user(request, f"{count} webhook deliveries queued again.", messages.SUCCESS)
+    redeliver.short_description = 'Deliver selected webhooks again'
+    
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(TranscriptionRollup)
+class TranscriptionRollupAdmin(admin.ModelAdmin):
+    """Statistics dashboard, built from the rollups alone"""
+    list_display = [
+        'period_start', 'period', 'status', 'file_format', 'model_name', 'count',
+        'audio_seconds', 'processing_seconds', 'max_processing_seconds'
+    ]
+    list_filter = ['period', 'status', 'file_format', 'model_name']
+    date_hierarchy = 'period_start'
+    
+    def changelist_view(self, request, extra_context=None):
+        extra_context = extra_context or {}
+        extra_context['hourly_stats'] = rollup_stats('hour')['series']
+        extra_context['format_stats'] = rollup_stats('day', group_by=['file_format'])['totals']
+        extra_context['model_stats'] = rollup_stats('day', group_by=['model_name'])['totals']
+        return super().changelist_view(request, extra_context=extra_context)
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,83 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from .models import AudioTranscription
+
+# Statuses whose serialized form only changes when the row is saved
+FINAL_STATUSES = {'completed', 'failed'}
+
+
+def response_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+class CachedResponseMixin:
+    """Serve GETs from the response cache, keyed by the rows' updated_at
+    
+    Every write to a transcription (saves and the queue's conditional UPDATEs
+    alike) bumps updated_at, so a changed row yields a new version and the old
+    entry is never read again. Matching If-None-Match/If-Modified-Since get a
+    304 without touching the serializer.
+    """
+    
+    def get_cache_version(self):
+        """Return (version, last_modified, timeout), or None to skip caching"""
+        raise NotImplementedError
+    
+    def get(self, request, *args, **kwargs):
+        validators = self.get_cache_version()
+        if validators is None or getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 3600) is None:
+            return super().get(request, *args, **kwargs)
+        version, last_modified, timeout = validators
+        
+        # Absolute URLs (pagination links, audio URLs) depend on the host, so key on it too
+        digest = hashlib.sha1(f'{request.build_absolute_uri()}:{version}'.encode()).hexdigest()
+        etag = quote_etag(digest)
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            key = f'api-response:{digest}'
+            data = response_cache().get(key)
+            if data is None:
+                response = super().get(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                response_cache().set(key, response.data, timeout)
+            else:
+                response = Response(data)
+        
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        # Clients may keep the body but must revalidate; that is what makes polling cheap
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+def detail_version(transcription_id):
+    row = AudioTranscription.objects.filter(id=transcription_id).values_list('updated_at', 'status').first()
+    if row is None:
+        return None
+    updated_at, status = row
+    if status in FINAL_STATUSES:
+        return updated_at.isoformat(), updated_at, getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 3600)
+    # Queued and running jobs carry a completion estimate that drifts between saves
+    live_timeout = getattr(settings, 'RESPONSE_CACHE_LIVE_TIMEOUT', 5)
+    bucket = int(time.time() // live_timeout) if live_timeout else time.time()
+    return f'{updated_at.isoformat()}:{bucket}', updated_at, live_timeout
+
+
+def list_version():
+    # The count catches deletions, which leave no updated_at behind
+    state = AudioTranscription.objects.aggregate(latest=Max('updated_at'), count=Count('id'))
+    if state['latest'] is None:
+        return None
+    version = f"{state['latest'].isoformat()}:{state['count']}"
+    return version, state['latest'], getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 3600)
@@ -0,0 +1,62 @@
+import base64
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .export import EXPORT_FIELDS
+from .models import AudioTranscription
+
+
+def encode_cursor(updated_at, pk):
+    return base64.urlsafe_b64encode(f'{updated_at.isoformat()}|{pk}'.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return (updated_at, pk) from an opaque cursor; raises ValueError if it is malformed"""
+    try:
+        updated_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        updated_at, pk = parse_datetime(updated_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+    if updated_at is None:
+        raise ValueError('Invalid cursor')
+    return updated_at, pk
+
+
+def fetch_changes(cursor=None, limit=100):
+    """Rows created or modified after the cursor, in (updated_at, id) order
+    
+    Rows touched in the last CHANGE_FEED_SETTLE_SECONDS are held back: a
+    transaction that started earlier may still commit a row stamped before
+    them, and a consumer that had already moved past it would never see it.
+    """
+    settle = getattr(settings, 'CHANGE_FEED_SETTLE_SECONDS', 2)
+    queryset = AudioTranscription.objects.filter(updated_at__lt=timezone.now() - timedelta(seconds=settle))
+    if cursor:
+        updated_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=pk))
+    rows = [
+        dict(zip(EXPORT_FIELDS, row))
+        for row in queryset.order_by('updated_at', 'id').values_list(*EXPORT_FIELDS)[:limit + 1]
+    ]
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        cursor = encode_cursor(rows[-1]['updated_at'], rows[-1]['id'])
+    return rows, cursor, has_more
+
+
+def wait_for_changes(cursor=None, limit=100, wait=0):
+    """Like fetch_changes, but poll for up to `wait` seconds until something changes"""
+    deadline = time.monotonic() + wait
+    poll_interval = getattr(settings, 'CHANGE_FEED_POLL_INTERVAL', 1.0)
+    while True:
+        rows, next_cursor, has_more = fetch_changes(cursor, limit)
+        remaining = deadline - time.monotonic()
+        if rows or remaining <= 0:
+            return rows, next_cursor, has_more
+        time.sleep(min(poll_interval, remaining))
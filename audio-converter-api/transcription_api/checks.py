@@ -0,0 +1,14 @@
+from django.core.checks import Warning, register
+
+from .webhooks import webhook_secret_is_default
+
+
+@register()
+def check_webhook_secret(app_configs, **kwargs):
+    if not webhook_secret_is_default():
+        return []
+    return [Warning(
+        'WEBHOOK_SECRET is not set, so completion webhooks are queued but never sent.',
+        hint='Set WEBHOOK_SECRET to a long random value and share it with the receivers.',
+        id='transcription_api.W001',
+    )]
@@ -0,0 +1,69 @@
+import base64
+import zlib
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+
+# Compressed values start with a control character Whisper never emits, then the codec
+MARKER = '\x02'
+PREFIXES = {'zlib': MARKER + 'zlib:', 'zstd': MARKER + 'zstd:'}
+
+
+def zstd_module():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImproperlyConfigured('zstd transcript compression needs the zstandard package')
+    return zstandard
+
+
+def compress_bytes(data, codec):
+    if codec == 'zlib':
+        return zlib.compress(data, 6)
+    if codec == 'zstd':
+        return zstd_module().ZstdCompressor(level=9).compress(data)
+    raise ImproperlyConfigured(f'Unknown transcript compression codec: {codec}')
+
+
+def decompress_bytes(data, codec):
+    if codec == 'zlib':
+        return zlib.decompress(data)
+    return zstd_module().ZstdDecompressor().decompress(data)
+
+
+def compress_text(value, codec=None):
+    """Return the stored form of a transcript: compressed when enabled, long enough and smaller"""
+    codec = codec or getattr(settings, 'TRANSCRIPT_COMPRESSION', None)
+    if not codec or not value or value.startswith(MARKER):
+        return value
+    if len(value) < getattr(settings, 'TRANSCRIPT_COMPRESSION_MIN_LENGTH', 1024):
+        return value
+    # Base64 keeps the value valid text, so plain and compressed rows share one column
+    packed = PREFIXES[codec] + base64.b64encode(compress_bytes(value.encode(), codec)).decode('ascii')
+    return packed if len(packed) < len(value) else value
+
+
+def decompress_text(value):
+    if not value or not value.startswith(MARKER):
+        return value
+    for codec, prefix in PREFIXES.items():
+        if value.startswith(prefix):
+            return decompress_bytes(base64.b64decode(value[len(prefix):]), codec).decode()
+    return value
+
+
+class CompressedTextField(models.TextField):
+    """TextField that stores long values compressed when TRANSCRIPT_COMPRESSION is set
+    
+    Values are decoded transparently on load, including in values() and
+    values_list(), so old plain rows and compressed rows mix freely. Database
+    lookups such as icontains only match rows that are still plain text.
+    """
+    
+    def from_db_value(self, value, expression, connection):
+        return decompress_text(value)
+    
+    def get_db_prep_save(self, value, connection):
+        # Only writes are compressed; lookups keep comparing plain values
+        return super().get_db_prep_save(compress_text(value), connection)
@@ -0,0 +1,63 @@
+from django.conf import settings
+
+# Whisper's transcribe() defaults: greedy decoding, re-sampled at rising
+# temperatures whenever a window looks repetitive or unlikely
+TEMPERATURE_FALLBACK = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+# Options passed to model.transcribe() for each named profile; override or
+# extend them with the DECODING_PROFILES setting
+DEFAULT_DECODING_PROFILES = {
+    # Greedy, one pass per window and no conditioning on earlier text, which
+    # also avoids the repetition loops that trigger fallback
+    'fast': {
+        'beam_size': None,
+        'best_of': None,
+        'temperature': 0.0,
+        'condition_on_previous_text': False,
+        'fp16': True,
+        'compression_ratio_threshold': None,
+        'logprob_threshold': -1.0,
+    },
+    # What Whisper does when given no options
+    'balanced': {
+        'beam_size': None,
+        'best_of': None,
+        'temperature': TEMPERATURE_FALLBACK,
+        'condition_on_previous_text': True,
+        'fp16': True,
+        'compression_ratio_threshold': 2.4,
+        'logprob_threshold': -1.0,
+    },
+    # Beam search with full-precision weights, falling back to the best of five samples
+    'accurate': {
+        'beam_size': 5,
+        'best_of': 5,
+        'temperature': TEMPERATURE_FALLBACK,
+        'condition_on_previous_text': True,
+        'fp16': False,
+        'compression_ratio_threshold': 2.4,
+        'logprob_threshold': -1.0,
+    },
+}
+
+
+def decoding_profiles():
+    """The built-in profiles, updated by the DECODING_PROFILES setting"""
+    profiles = {name: dict(options) for name, options in DEFAULT_DECODING_PROFILES.items()}
+    for name, options in getattr(settings, 'DECODING_PROFILES', {}).items():
+        profiles.setdefault(name, {}).update(options)
+    return profiles
+
+
+def default_decoding_profile():
+    return getattr(settings, 'DEFAULT_DECODING_PROFILE', 'balanced')
+
+
+def decoding_options(profile):
+    """Keyword arguments for model.transcribe() under the named profile (or the default)"""
+    profiles = decoding_profiles()
+    options = dict(profiles.get(profile) or profiles[default_decoding_profile()])
+    # transcribe() takes a list or tuple of temperatures for fallback
+    if isinstance(options.get('temperature'), list):
+        options['temperature'] = tuple(options['temperature'])
+    return options
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast, Coalesce
+
+from .models import AudioTranscription
+
+# Real-time factor assumed before any transcription has completed
+DEFAULT_REAL_TIME_FACTOR = 0.5
+
+
+def assumed_bytes_per_second():
+    return getattr(settings, 'LOAD_SHED_ASSUMED_BYTES_PER_SECOND', 16000)
+
+
+def expected_audio_seconds():
+    """Expression for a row's audio duration, estimated from its size when it couldn't be probed"""
+    return Coalesce('audio_duration', Cast(F('file_size'), FloatField()) / assumed_bytes_per_second())
+
+
+def job_audio_seconds(transcription):
+    if transcription.audio_duration is not None:
+        return transcription.audio_duration
+    return transcription.file_size / assumed_bytes_per_second()
+
+
+def recent_real_time_factor():
+    """Average real-time factor of the last 100 completed transcriptions, cached for a minute"""
+    def compute():
+        factors = list(AudioTranscription.objects.filter(
+            status='completed', real_time_factor__isnull=False
+        ).order_by('-id').values_list('real_time_factor', flat=True)[:100])
+        return sum(factors) / len(factors) if factors else DEFAULT_REAL_TIME_FACTOR
+    return cache.get_or_set('transcription-recent-rtf', compute, 60)
+
+
+def estimate_processing_seconds(audio_seconds, workers=None):
+    """Wall-clock seconds needed to transcribe this much audio"""
+    if workers is None:
+        workers = getattr(settings, 'TRANSCRIPTION_WORKERS', 1)
+    return audio_seconds * recent_real_time_factor() / max(workers, 1)
@@ -0,0 +1,140 @@
+import csv
+import io
+from datetime import datetime, time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import AudioTranscription
+
+# Columns written by every export format, in order
+EXPORT_FIELDS = [
+    'id', 'original_filename', 'file_format', 'file_size', 'status', 'language', 'model_name',
+    'audio_duration', 'processing_time', 'transcription_text', 'error_message', 'created_at', 'updated_at',
+]
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def parse_bound(value, end=False):
+    """Parse an ISO date or datetime; a bare date covers that whole day"""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Invalid date: {value}')
+        moment = datetime.combine(day, time.max if end else time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def export_queryset(statuses=None, since=None, until=None):
+    queryset = AudioTranscription.objects.order_by('pk')
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+    if since:
+        queryset = queryset.filter(created_at__gte=parse_bound(since))
+    if until:
+        queryset = queryset.filter(created_at__lte=parse_bound(until, end=True))
+    return queryset
+
+
+def iter_rows(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield lists of value tuples, reading through a server-side cursor where the database has one"""
+    chunk = []
+    for row in queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def write_ndjson(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    encoder = DjangoJSONEncoder()
+    for chunk in iter_rows(queryset, chunk_size):
+        yield ''.join(encoder.encode(dict(zip(EXPORT_FIELDS, row))) + '\n' for row in chunk).encode()
+
+
+def write_csv(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for chunk in iter_rows(queryset, chunk_size):
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only, for an empty export
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain"""
+    
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+    
+    def writable(self):
+        return True
+    
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+    
+    def tell(self):
+        return self.position
+    
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def write_parquet(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """One row group per chunk; needs pyarrow"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    timestamp = pa.timestamp('us', tz='UTC')
+    schema = pa.schema([
+        ('id', pa.int64()), ('original_filename', pa.string()), ('file_format', pa.string()),
+        ('file_size', pa.int64()), ('status', pa.string()), ('language', pa.string()),
+        ('model_name', pa.string()), ('audio_duration', pa.float64()), ('processing_time', pa.float64()),
+        ('transcription_text', pa.string()), ('error_message', pa.string()),
+        ('created_at', timestamp), ('updated_at', timestamp),
+    ])
+    sink = ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for chunk in iter_rows(queryset, chunk_size):
+            columns = list(zip(*chunk))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+# format -> (writer, content type, file extension)
+EXPORT_FORMATS = {
+    'ndjson': (write_ndjson, 'application/x-ndjson', 'ndjson'),
+    'csv': (write_csv, 'text/csv', 'csv'),
+    'parquet': (write_parquet, 'application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
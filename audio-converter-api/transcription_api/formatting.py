@@ -0,0 +1,18 @@
+def format_file_size(num_bytes):
+    """Return human-readable file size"""
+    size = float(num_bytes)
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size < 1024.0:
+            return f"{size:.1f} {unit}"
+        size /= 1024.0
+    return f"{size:.1f} TB"
+
+
+def format_processing_time(seconds):
+    """Return human-readable processing time"""
+    if seconds is None:
+        return "N/A"
+    if seconds < 60:
+        return f"{seconds:.2f}s"
+    minutes = int(seconds // 60)
+    return f"{minutes}m {seconds % 60:.2f}s"
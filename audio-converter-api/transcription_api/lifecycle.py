@@ -0,0 +1,205 @@
+import logging
+import os
+import subprocess
+import tempfile
+import time
+from bisect import bisect_left
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+
+from .models import AudioTranscription
+from .storage import local_audio_path
+
+logger = logging.getLogger(__name__)
+
+# Where uploads are stored; matches the upload_to of AudioTranscription.audio_file
+AUDIO_DIRECTORY = 'audio_uploads'
+
+# Output extension and ffmpeg arguments for each compaction codec. Opus is
+# downmixed to 16 kHz mono, which is all Whisper uses; FLAC stays lossless.
+CODECS = {
+    'opus': ('ogg', ['-ac', '1', '-ar', '16000', '-c:a', 'libopus', '-b:a', '32k']),
+    'flac': ('flac', ['-c:a', 'flac', '-compression_level', '8']),
+}
+
+
+class ThroughputLimiter:
+    """Sleep as needed to keep processed bytes under a bytes-per-second budget"""
+    
+    def __init__(self, bytes_per_second=None):
+        self.bytes_per_second = bytes_per_second
+        self.started = time.monotonic()
+        self.consumed = 0
+    
+    def consume(self, num_bytes):
+        if not self.bytes_per_second:
+            return
+        self.consumed += num_bytes
+        ahead = self.consumed / self.bytes_per_second - (time.monotonic() - self.started)
+        if ahead > 0:
+            time.sleep(ahead)
+
+
+def compaction_candidates(now=None):
+    """Completed transcriptions whose original upload is due for transcoding"""
+    hours = getattr(settings, 'AUDIO_COMPACT_AFTER_HOURS', None)
+    if hours is None:
+        return AudioTranscription.objects.none()
+    cutoff = (now or timezone.now()) - timedelta(hours=hours)
+    return AudioTranscription.objects.filter(
+        status='completed', storage_tier='original', updated_at__lte=cutoff
+    ).exclude(audio_file='').exclude(refinement_status__in=['pending', 'processing'])
+
+
+def deletion_candidates(now=None):
+    """Completed transcriptions whose audio has outlived the retention period"""
+    days = getattr(settings, 'AUDIO_DELETE_AFTER_DAYS', None)
+    if days is None:
+        return AudioTranscription.objects.none()
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    return AudioTranscription.objects.filter(
+        status='completed', storage_tier__in=['original', 'compacted'], created_at__lte=cutoff
+    ).exclude(audio_file='').exclude(refinement_status__in=['pending', 'processing'])
+
+
+def iterate_batches(queryset, batch_size):
+    """Yield lists of rows in primary key order without holding the whole queryset"""
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1].pk
+
+
+def transcode(source_path, codec):
+    """Transcode an audio file with ffmpeg and return the path of a temporary output file"""
+    extension, codec_args = CODECS[codec]
+    fd, output_path = tempfile.mkstemp(suffix=f'.{extension}')
+    os.close(fd)
+    command = ['ffmpeg', '-nostdin', '-loglevel', 'error', '-y', '-i', source_path, '-vn', *codec_args, output_path]
+    try:
+        subprocess.run(command, check=True, capture_output=True)
+    except subprocess.CalledProcessError as e:
+        os.remove(output_path)
+        raise RuntimeError(f"ffmpeg failed: {e.stderr.decode(errors='replace').strip()}")
+    return output_path
+
+
+def compact_transcription(transcription, codec):
+    """Replace the stored upload with a transcoded copy; return the bytes reclaimed"""
+    old_name = transcription.audio_file.name
+    old_size = transcription.audio_file.size
+    with local_audio_path(transcription.audio_file) as source_path:
+        output_path = transcode(source_path, codec)
+    try:
+        extension = CODECS[codec][0]
+        base_name = os.path.splitext(os.path.basename(old_name))[0]
+        with open(output_path, 'rb') as output:
+            new_name = transcription.audio_file.storage.save(
+                f'audio_uploads/{base_name}.{extension}', File(output)
+            )
+    finally:
+        os.remove(output_path)
+    
+    # Only swap if the row still points at the file we transcoded, so a
+    # concurrent retry or delete never ends up referencing a missing file
+    updated = AudioTranscription.objects.filter(
+        pk=transcription.pk, audio_file=old_name, storage_tier='original'
+    ).update(audio_file=new_name, file_format=extension, storage_tier='compacted', updated_at=timezone.now())
+    
+    storage = transcription.audio_file.storage
+    if not updated:
+        storage.delete(new_name)
+        return 0
+    new_size = storage.size(new_name)
+    storage.delete(old_name)
+    return old_size - new_size
+
+
+def delete_transcription_audio(transcription):
+    """Drop the stored audio but keep the transcript; return the bytes reclaimed"""
+    old_name = transcription.audio_file.name
+    storage = transcription.audio_file.storage
+    updated = AudioTranscription.objects.filter(
+        pk=transcription.pk, audio_file=old_name
+    ).update(audio_file='', storage_tier='deleted', updated_at=timezone.now())
+    if not updated or not storage.exists(old_name):
+        return 0
+    size = storage.size(old_name)
+    storage.delete(old_name)
+    return size
+
+
+def stored_audio_names(storage):
+    """Sorted storage names of every file in the upload directory"""
+    try:
+        _, files = storage.listdir(AUDIO_DIRECTORY)
+    except FileNotFoundError:
+        return []
+    return sorted(f'{AUDIO_DIRECTORY}/{name}' for name in files)
+
+
+def scan_media(batch_size=2000):
+    """Reconcile stored uploads against the database; return (orphaned names, dangling rows)
+    
+    Storage is listed once and sorted, then the referenced names are streamed
+    from the database in batches and looked up by binary search, marking each
+    file some row points at. Unmarked files are orphans; rows whose file isn't
+    in the listing are dangling, returned as (pk, name). That is one pass over
+    each side with no per-file queries. Rows changed after the listing was
+    taken are never reported, since their file may be newer than the listing.
+    """
+    storage = AudioTranscription._meta.get_field('audio_file').storage
+    listed_at = timezone.now()
+    names = stored_audio_names(storage)
+    referenced = bytearray(len(names))
+    dangling = []
+    rows = AudioTranscription.objects.filter(audio_file__startswith=f'{AUDIO_DIRECTORY}/').values_list(
+        'pk', 'audio_file', 'updated_at'
+    )
+    for pk, name, updated_at in rows.iterator(chunk_size=batch_size):
+        index = bisect_left(names, name)
+        if index < len(names) and names[index] == name:
+            referenced[index] = 1
+        elif updated_at < listed_at:
+            dangling.append((pk, name))
+    orphans = [name for name, seen in zip(names, referenced) if not seen]
+    return orphans, dangling
+
+
+def delete_orphan(name, min_age=3600):
+    """Delete an unreferenced upload; return the bytes reclaimed, or None if it was kept
+    
+    Files younger than min_age seconds are kept: an upload is stored just
+    before its row is inserted, and compaction writes the new file before
+    pointing the row at it.
+    """
+    storage = AudioTranscription._meta.get_field('audio_file').storage
+    if storage.get_modified_time(name) > timezone.now() - timedelta(seconds=min_age):
+        return None
+    # The scan is a snapshot, so check once more right before deleting
+    if AudioTranscription.objects.filter(audio_file=name).exists():
+        return None
+    size = storage.size(name)
+    storage.delete(name)
+    return size
+
+
+def release_dangling_row(pk, name):
+    """Drop a finished row's reference to audio missing from storage, keeping the transcript
+    
+    Queued and running jobs are left for processing to fail. Returns whether
+    the row was updated.
+    """
+    storage = AudioTranscription._meta.get_field('audio_file').storage
+    if storage.exists(name):
+        return False
+    updated = AudioTranscription.objects.filter(pk=pk, audio_file=name).exclude(
+        status__in=['pending', 'processing']
+    ).update(audio_file='', storage_tier='deleted', updated_at=timezone.now())
+    return bool(updated)
@@ -0,0 +1,72 @@
+import re
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...decoding import decoding_options, decoding_profiles
+from ...engine import SAMPLE_RATE, is_available, load_audio, load_whisper_model
+
+AUDIO_SUFFIXES = {'.wav', '.mp3', '.m4a', '.flac', '.ogg', '.aac', '.wma'}
+
+
+def normalize_words(text):
+    return re.sub(r"[^\w\s']", ' ', text.lower()).split()
+
+
+def edit_distance(reference, hypothesis):
+    """Word-level Levenshtein distance, two rows at a time"""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, start=1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1]
+
+
+class Command(BaseCommand):
+    help = 'Compare decoding profiles by real-time factor and word error rate on a sample set'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'samples', help='Directory of audio files, each with a reference transcript beside it (talk.mp3 + talk.txt)'
+        )
+        parser.add_argument('--model', help='Whisper model to use (default WHISPER_MODEL_NAME)')
+        parser.add_argument('--profiles', help='Comma-separated profiles to compare (default all)')
+        parser.add_argument('--language', help='Language of the samples; detected per file when omitted')
+    
+    def handle(self, *args, **options):
+        if not is_available():
+            raise CommandError('Whisper is not installed')
+        profiles = decoding_profiles()
+        names = options['profiles'].split(',') if options['profiles'] else list(profiles)
+        unknown = [name for name in names if name not in profiles]
+        if unknown:
+            raise CommandError(f"Unknown profiles: {', '.join(unknown)}")
+        
+        samples = []
+        for path in sorted(Path(options['samples']).iterdir()):
+            reference = path.with_suffix('.txt')
+            if path.suffix.lower() in AUDIO_SUFFIXES and reference.exists():
+                samples.append((path, normalize_words(reference.read_text())))
+        if not samples:
+            raise CommandError('No audio files with a matching .txt reference found')
+        
+        # Load and decode up front so only inference is timed
+        model = load_whisper_model(options['model'])
+        audio = {path: load_audio(str(path)) for path, _ in samples}
+        audio_seconds = sum(len(decoded) for decoded in audio.values()) / SAMPLE_RATE
+        self.stdout.write(f'{len(samples)} samples, {audio_seconds:.1f}s of audio\n')
+        
+        self.stdout.write(f"{'profile':<12}{'seconds':>10}{'RTF':>8}{'WER':>8}")
+        for name in names:
+            elapsed = errors = words = 0
+            for path, reference in samples:
+                started = time.perf_counter()
+                result = model.transcribe(audio[path], language=options['language'], **decoding_options(name))
+                elapsed += time.perf_counter() - started
+                errors += edit_distance(reference, normalize_words(result['text']))
+                words += len(reference)
+            wer = errors / words if words else 0.0
+            self.stdout.write(f'{name:<12}{elapsed:>10.2f}{elapsed / audio_seconds:>8.3f}{wer:>8.1%}')
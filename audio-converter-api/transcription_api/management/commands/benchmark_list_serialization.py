@@ -0,0 +1,53 @@
+import time
+
+from django.db import transaction
+from django.core.management.base import BaseCommand
+
+from ...models import AudioTranscription
+from ...serializers import AudioTranscriptionListSerializer, LIST_ROW_VALUES, list_rows
+
+
+class Command(BaseCommand):
+    help = 'Compare rows per second of the list serializer and the lean values-based path'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Rows per page (default 10000)')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per path; the best one counts')
+    
+    def handle(self, *args, **options):
+        rows = options['rows']
+        # Synthetic rows only live inside this transaction
+        with transaction.atomic():
+            AudioTranscription.objects.bulk_create([
+                AudioTranscription(
+                    original_filename=f'benchmark-{i}.mp3', file_size=1000 + i * 997, file_format='mp3',
+                    status='completed', processing_time=i % 300 / 3.0, transcription_text='benchmark'
+                )
+                for i in range(rows)
+            ], batch_size=1000)
+            queryset = AudioTranscription.objects.order_by('-created_at')
+            
+            paths = {
+                'serializer': lambda: AudioTranscriptionListSerializer(queryset[:rows], many=True).data,
+                'values': lambda: list_rows(queryset.values_list(*LIST_ROW_VALUES)[:rows]),
+            }
+            results = {name: self.measure(path, options['repeat']) for name, path in paths.items()}
+            
+            if list(map(dict, paths['serializer']())) != paths['values']():
+                self.stdout.write(self.style.ERROR('The two paths produced different output'))
+            transaction.set_rollback(True)
+        
+        for name, seconds in results.items():
+            self.stdout.write(f"{name:>10}: {rows / seconds:>12,.0f} rows/s ({seconds * 1000:.1f} ms per page)")
+        self.stdout.write(self.style.SUCCESS(
+            f"values path is {results['serializer'] / results['values']:.1f}x faster"
+        ))
+    
+    def measure(self, path, repeat):
+        best = None
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            path()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,91 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import Length
+from django.test.utils import override_settings
+
+from ...compression import PREFIXES, compress_text
+from ...models import AudioTranscription
+from ...serializers import LIST_ROW_VALUES
+
+WORDS = (
+    'the of and to a in that is was he for it with as his on be at by i this had not are but from or have an '
+    'they which one you were her all she there would their we him been has when who will more no if out so said '
+    'what up its about into than them can only other new some could time these two may then do first any my now '
+    'such like our over man me even most made after also did many before must through back years where much your '
+    'way well down should because each just those people how too little state good very make world still own see'
+).split()
+
+
+class Command(BaseCommand):
+    help = 'Measure stored transcript size and list-query speed before and after compression'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000, help='Synthetic transcriptions (default 2000)')
+        parser.add_argument('--length', type=int, default=20000, help='Characters per transcript (default 20000)')
+        parser.add_argument('--codec', choices=list(PREFIXES), default='zlib')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query; the best one counts')
+    
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        # Synthetic rows only live inside this transaction
+        with transaction.atomic(), override_settings(TRANSCRIPT_COMPRESSION=None):
+            created = AudioTranscription.objects.bulk_create([
+                AudioTranscription(
+                    original_filename=f'benchmark-{i}.mp3', file_size=1000000, file_format='mp3', status='completed',
+                    transcription_text=self.transcript(rng, options['length'])
+                )
+                for i in range(options['rows'])
+            ], batch_size=200)
+            ids = [transcription.pk for transcription in created]
+            if not all(ids):
+                ids = list(AudioTranscription.objects.filter(
+                    original_filename__startswith='benchmark-'
+                ).values_list('pk', flat=True))
+            
+            before = self.measure(ids, options)
+            AudioTranscription.objects.bulk_update([
+                AudioTranscription(pk=pk, transcription_text=compress_text(text, options['codec']))
+                for pk, text in AudioTranscription.objects.filter(pk__in=ids).values_list('pk', 'transcription_text')
+            ], ['transcription_text'], batch_size=200)
+            after = self.measure(ids, options)
+            transaction.set_rollback(True)
+        
+        self.stdout.write(f"{'':>22}{'plain':>14}{options['codec']:>14}")
+        self.stdout.write(f"{'stored text (MB)':>22}{before['size'] / 1048576:>14.1f}{after['size'] / 1048576:>14.1f}")
+        self.stdout.write(f"{'list page (ms)':>22}{before['list'] * 1000:>14.1f}{after['list'] * 1000:>14.1f}")
+        self.stdout.write(f"{'load all text (ms)':>22}{before['text'] * 1000:>14.1f}{after['text'] * 1000:>14.1f}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Compression ratio {before['size'] / max(after['size'], 1):.1f}x, "
+            f"list queries {before['list'] / after['list']:.1f}x as fast"
+        ))
+    
+    def transcript(self, rng, length):
+        words = []
+        size = 0
+        while size < length:
+            word = rng.choice(WORDS)
+            words.append(word)
+            size += len(word) + 1
+        return ' '.join(words)
+    
+    def measure(self, ids, options):
+        queryset = AudioTranscription.objects.filter(pk__in=ids)
+        return {
+            'size': queryset.aggregate(size=Sum(Length('transcription_text')))['size'],
+            'list': self.best(lambda: list(
+                AudioTranscription.objects.order_by('-created_at').values_list(*LIST_ROW_VALUES)[:len(ids)]
+            ), options['repeat']),
+            'text': self.best(lambda: list(queryset.values_list('transcription_text', flat=True)), options['repeat']),
+        }
+    
+    def best(self, query, repeat):
+        timings = []
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            query()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
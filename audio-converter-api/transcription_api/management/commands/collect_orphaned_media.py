@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from ...lifecycle import delete_orphan, release_dangling_row, scan_media
+
+
+class Command(BaseCommand):
+    help = 'Delete stored uploads no transcription references and release rows whose audio is gone'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows streamed per query')
+        parser.add_argument(
+            '--min-age', type=float, default=60,
+            help='Minutes a file must have existed before it counts as orphaned'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be done')
+    
+    def handle(self, *args, **options):
+        orphans, dangling = scan_media(options['batch_size'])
+        self.stdout.write(f"Found {len(orphans)} orphaned files and {len(dangling)} rows with missing audio")
+        if options['dry_run']:
+            for name in orphans:
+                self.stdout.write(f"Would delete: {name}")
+            for pk, name in dangling:
+                self.stdout.write(f"Would release transcription {pk}: {name}")
+            return
+        
+        deleted = reclaimed = 0
+        for name in orphans:
+            try:
+                size = delete_orphan(name, options['min_age'] * 60)
+            except Exception as e:
+                self.stderr.write(f"Failed to delete {name}: {e}")
+                continue
+            if size is not None:
+                deleted += 1
+                reclaimed += size
+        released = sum(release_dangling_row(pk, name) for pk, name in dangling)
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} orphaned files, reclaiming {reclaimed / (1024 * 1024):.1f} MB; "
+            f"released {released} rows whose audio was missing"
+        ))
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models.functions import Length
+
+from ...compression import MARKER, PREFIXES, compress_text
+from ...models import AudioTranscription
+
+
+class Command(BaseCommand):
+    help = 'Compress stored transcripts in batches, or turn them back into plain text'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--codec', choices=list(PREFIXES), help='Default TRANSCRIPT_COMPRESSION, else zlib')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows read and updated per transaction')
+        parser.add_argument('--decompress', action='store_true', help='Store compressed transcripts as plain text again')
+        parser.add_argument('--dry-run', action='store_true', help='Report the savings without writing anything')
+    
+    def handle(self, *args, **options):
+        decompress = options['decompress']
+        if decompress and getattr(settings, 'TRANSCRIPT_COMPRESSION', None):
+            raise CommandError('Unset TRANSCRIPT_COMPRESSION first, or saved rows are compressed again')
+        codec = options['codec'] or getattr(settings, 'TRANSCRIPT_COMPRESSION', None) or 'zlib'
+        
+        queryset = AudioTranscription.objects.exclude(transcription_text__isnull=True).exclude(transcription_text='')
+        if decompress:
+            queryset = queryset.filter(transcription_text__startswith=MARKER)
+        else:
+            queryset = queryset.exclude(transcription_text__startswith=MARKER)
+        queryset = queryset.annotate(stored_length=Length('transcription_text')).order_by('pk')
+        
+        changed = before = after = 0
+        last_pk = 0
+        while True:
+            # Loaded values are already decoded; stored_length is what the column holds
+            batch = list(queryset.filter(pk__gt=last_pk).values_list(
+                'pk', 'transcription_text', 'stored_length'
+            )[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            
+            updates = []
+            for pk, text, stored_length in batch:
+                stored = text if decompress else compress_text(text, codec)
+                if not decompress and stored == text:
+                    continue
+                updates.append(AudioTranscription(pk=pk, transcription_text=stored))
+                before += stored_length
+                after += len(stored)
+            
+            if updates and not options['dry_run']:
+                # bulk_update leaves updated_at alone: the transcript itself hasn't changed
+                with transaction.atomic():
+                    AudioTranscription.objects.bulk_update(updates, ['transcription_text'])
+            changed += len(updates)
+            self.stdout.write(f"  {changed} transcripts {'decompressed' if decompress else 'compressed'} so far")
+        
+        prefix = 'Would rewrite' if options['dry_run'] else 'Rewrote'
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {changed} transcripts: {before / 1048576:.1f} MB stored before, {after / 1048576:.1f} MB after"
+        ))
@@ -0,0 +1,21 @@
+import threading
+
+from django.core.management.base import BaseCommand
+
+from ...webhooks import run_dispatcher
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued completion webhooks with pooled connections, batching and retries'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to wait when nothing is due')
+        parser.add_argument('--once', action='store_true', help='Exit once no deliveries are due')
+    
+    def handle(self, *args, **options):
+        stop_event = threading.Event()
+        try:
+            run_dispatcher(stop_event, options['poll_interval'], options['once'])
+        except KeyboardInterrupt:
+            stop_event.set()
+        self.stdout.write(self.style.SUCCESS('Webhook dispatcher stopped'))
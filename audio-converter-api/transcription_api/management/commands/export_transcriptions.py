@@ -0,0 +1,39 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...export import DEFAULT_CHUNK_SIZE, EXPORT_FORMATS, export_queryset, parquet_available
+
+
+class Command(BaseCommand):
+    help = 'Stream transcriptions to NDJSON, CSV or Parquet without loading them all into memory'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--output', help='File to write (default stdout)')
+        parser.add_argument('--status', nargs='+', help='Only export these statuses')
+        parser.add_argument('--since', help='Created on or after this ISO date or datetime')
+        parser.add_argument('--until', help='Created on or before this ISO date or datetime')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows fetched and written per chunk')
+    
+    def handle(self, *args, **options):
+        if options['format'] == 'parquet' and not parquet_available():
+            raise CommandError('Parquet export needs pyarrow: pip install pyarrow')
+        try:
+            queryset = export_queryset(options['status'], options['since'], options['until'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        
+        writer = EXPORT_FORMATS[options['format']][0]
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        try:
+            written = 0
+            for data in writer(queryset, max(options['chunk_size'], 1)):
+                output.write(data)
+                written += len(data)
+        finally:
+            if options['output']:
+                output.close()
+        
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f"Wrote {written} bytes to {options['output']}"))
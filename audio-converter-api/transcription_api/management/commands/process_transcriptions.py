@@ -0,0 +1,89 @@
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...leases import reap_expired_leases, run_reaper
+from ...watchdog import MB, MemoryWatchdog, restart_process
+from ...webhooks import run_dispatcher
+from ...worker import run_worker
+
+
+class Command(BaseCommand):
+    help = 'Run transcription workers that claim queued jobs by priority and per-client fairness'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help='Worker threads (default TRANSCRIPTION_WORKERS)')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is drained')
+        parser.add_argument(
+            '--max-rss-mb', type=int,
+            help='Drain and restart the process once its RSS exceeds this (default WORKER_MAX_RSS_MB)'
+        )
+        parser.add_argument(
+            '--max-jobs', type=int,
+            help='Drain and restart the process after this many jobs (default WORKER_MAX_JOBS)'
+        )
+        parser.add_argument(
+            '--no-webhooks', action='store_true',
+            help='Leave completion webhooks to a separate dispatch_webhooks process'
+        )
+    
+    def handle(self, *args, **options):
+        workers = options['workers'] or getattr(settings, 'TRANSCRIPTION_WORKERS', 1)
+        stop_event = threading.Event()
+        
+        max_rss_mb = options['max_rss_mb'] or getattr(settings, 'WORKER_MAX_RSS_MB', None)
+        watchdog = MemoryWatchdog(
+            stop_event,
+            max_rss_bytes=max_rss_mb * MB if max_rss_mb else None,
+            max_jobs=options['max_jobs'] or getattr(settings, 'WORKER_MAX_JOBS', None),
+            interval=getattr(settings, 'WORKER_MEMORY_SAMPLE_SECONDS', 1.0),
+        )
+        sampler_stop = threading.Event()
+        threading.Thread(target=watchdog.run, name='memory-watchdog', args=(sampler_stop,), daemon=True).start()
+        
+        # Jobs left behind by a crashed worker go back on the queue once their leases expire
+        reap_expired_leases()
+        reaper_stop = threading.Event()
+        threading.Thread(target=run_reaper, name='lease-reaper', args=(reaper_stop,), daemon=True).start()
+        
+        threads = [
+            threading.Thread(
+                target=run_worker, name=f'transcription-worker-{index}',
+                args=(stop_event, options['poll_interval'], options['once'], watchdog)
+            )
+            for index in range(workers)
+        ]
+        dispatcher_stop = threading.Event()
+        dispatcher = None
+        if not options['no_webhooks']:
+            dispatcher = threading.Thread(target=run_dispatcher, name='webhook-dispatcher', args=(dispatcher_stop,))
+            dispatcher.start()
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f"Started {workers} transcription workers")
+        
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping workers after their current jobs...')
+            stop_event.set()
+            for thread in threads:
+                thread.join()
+        
+        if dispatcher is not None:
+            dispatcher_stop.set()
+            dispatcher.join()
+            if options['once']:
+                # Deliver the events of the last jobs before exiting
+                run_dispatcher(threading.Event(), once=True)
+        sampler_stop.set()
+        reaper_stop.set()
+        
+        self.stdout.write(f"{watchdog.jobs_done} jobs processed, peak RSS {watchdog.peak_rss / MB:.0f} MB")
+        if watchdog.recycle_reason:
+            self.stdout.write(f"Restarting: {watchdog.recycle_reason}")
+            restart_process()
+        self.stdout.write(self.style.SUCCESS('Workers stopped'))
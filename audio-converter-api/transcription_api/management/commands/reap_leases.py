@@ -0,0 +1,28 @@
+import threading
+
+from django.core.management.base import BaseCommand
+
+from ...leases import lease_seconds, reap_expired_leases, run_reaper
+
+
+class Command(BaseCommand):
+    help = 'Requeue jobs whose worker stopped heartbeating, failing those out of attempts'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Keep running, reaping every this many seconds (default: reap once and exit)'
+        )
+    
+    def handle(self, *args, **options):
+        if not options['interval']:
+            requeued, failed = reap_expired_leases()
+            self.stdout.write(self.style.SUCCESS(f"{requeued} jobs requeued, {failed} failed"))
+            return
+        self.stdout.write(f"Reaping leases older than {lease_seconds()}s every {options['interval']}s")
+        stop_event = threading.Event()
+        try:
+            run_reaper(stop_event, options['interval'])
+        except KeyboardInterrupt:
+            stop_event.set()
+        self.stdout.write(self.style.SUCCESS('Lease reaper stopped'))
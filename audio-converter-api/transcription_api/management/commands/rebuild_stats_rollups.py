@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from ...stats import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the statistics rollups from all finished transcriptions'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows streamed per query')
+    
+    def handle(self, *args, **options):
+        written = rebuild_rollups(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} rollup rows"))
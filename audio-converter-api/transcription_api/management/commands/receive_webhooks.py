@@ -0,0 +1,49 @@
+import hmac
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+from ...webhooks import sign
+
+
+class Command(BaseCommand):
+    help = 'Run a local webhook receiver that verifies signatures and prints events, for testing callbacks'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--secret', help='Signing secret (default WEBHOOK_SECRET)')
+        parser.add_argument('--max-age', type=int, default=300, help='Reject signatures older than this many seconds')
+    
+    def handle(self, *args, **options):
+        command = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so the dispatcher's connection pooling can be observed
+            protocol_version = 'HTTP/1.1'
+            
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                timestamp = self.headers.get('X-Webhook-Timestamp', '0')
+                expected = 'sha256=' + sign(body, timestamp, options['secret'])
+                fresh = timestamp.isdigit() and abs(time.time() - int(timestamp)) <= options['max_age']
+                if not fresh or not hmac.compare_digest(expected, self.headers.get('X-Webhook-Signature', '')):
+                    command.stdout.write(command.style.ERROR('Rejected a request with a bad or stale signature'))
+                    self.send_response(401)
+                else:
+                    for event in json.loads(body)['events']:
+                        command.stdout.write(f"{event['event']} #{event['id']}: {event['status']}")
+                    self.send_response(204)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+            
+            def log_message(self, format, *args):
+                pass
+        
+        server = ThreadingHTTPServer(('127.0.0.1', options['port']), Handler)
+        self.stdout.write(f"Listening on http://127.0.0.1:{options['port']}/")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
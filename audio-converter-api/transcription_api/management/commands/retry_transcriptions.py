@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+
+from ...models import AudioTranscription, RetryBatch
+from ...retry import process_batch, requeue_failed
+
+
+class Command(BaseCommand):
+    help = 'Re-queue failed transcriptions with one bulk UPDATE and process them in parallel'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--ids', nargs='+', type=int, help='Only retry these transcriptions')
+        parser.add_argument('--workers', type=int, help='Concurrent transcriptions (default RETRY_MAX_WORKERS)')
+        parser.add_argument('--max-attempts', type=int, help='Attempts per transcription (default RETRY_MAX_ATTEMPTS)')
+        parser.add_argument('--backoff', type=float, help='Initial backoff in seconds (default RETRY_BACKOFF_SECONDS)')
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Also finish pending work of unfinished batches, e.g. after a web process restart'
+        )
+    
+    def handle(self, *args, **options):
+        batches = []
+        if options['resume']:
+            batches.extend(RetryBatch.objects.filter(finished_at__isnull=True).order_by('pk'))
+        
+        queryset = AudioTranscription.objects.all()
+        if options['ids']:
+            queryset = queryset.filter(pk__in=options['ids'])
+        batch = requeue_failed(queryset, requested_by='manage.py retry_transcriptions')
+        if batch:
+            batches.append(batch)
+        
+        if not batches:
+            self.stdout.write('No failed transcriptions to retry.')
+            return
+        
+        for batch in batches:
+            self.stdout.write(f"Processing {batch}...")
+            succeeded, failed = process_batch(
+                batch,
+                max_workers=options['workers'],
+                max_attempts=options['max_attempts'],
+                backoff=options['backoff'],
+                on_progress=self.report_progress,
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"Batch {batch.pk} finished: {succeeded} succeeded, {failed} failed"
+            ))
+    
+    def report_progress(self, done, failed, total):
+        if done % 25 == 0 or done == total:
+            self.stdout.write(f"  {done}/{total} processed ({failed} failed)")
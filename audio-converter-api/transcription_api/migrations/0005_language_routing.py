@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcription_api', '0004_audiotranscription_storage_tier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='language',
+            field=models.CharField(blank=True, help_text='Spoken language code, as hinted by the client or detected', max_length=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='language_probability',
+            field=models.FloatField(blank=True, help_text='Detection confidence; empty when the client gave the language', null=True),
+        ),
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='model_name',
+            field=models.CharField(blank=True, help_text='Whisper model that produced the text', max_length=50),
+        ),
+    ]
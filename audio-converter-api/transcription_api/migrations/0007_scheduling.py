@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcription_api', '0006_retry_batches'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='client_id',
+            field=models.CharField(blank=True, db_index=True, help_text='API key digest, user or IP the job is scheduled under', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='priority',
+            field=models.CharField(choices=[('interactive', 'Interactive'), ('batch', 'Batch')], default='interactive', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='started_at',
+            field=models.DateTimeField(blank=True, help_text='When processing first started', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='audiotranscription',
+            index=models.Index(fields=['status', 'priority', 'client_id', 'created_at'], name='transcription_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcription_api', '0007_scheduling'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='channels',
+            field=models.PositiveSmallIntegerField(blank=True, help_text='Number of audio channels', null=True),
+        ),
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='sample_rate',
+            field=models.PositiveIntegerField(blank=True, help_text='Sample rate in Hz, read from the file header', null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcription_api', '0008_audio_properties'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='audiotranscription',
+            index=models.Index(fields=['updated_at', 'id'], name='transcription_changes_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:54
+
+import transcription_api.compression
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcription_api', '0009_change_feed_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='audiotranscription',
+            name='transcription_text',
+            field=transcription_api.compression.CompressedTextField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcription_api', '0012_two_pass_revisions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='decoding_profile',
+            field=models.CharField(blank=True, help_text='Named set of decoding options (beam size, fallback, precision) used', max_length=50),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcription_api', '0013_decoding_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='peak_rss_bytes',
+            field=models.BigIntegerField(blank=True, help_text='Worker process memory high-water mark while this job ran', null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcription_api', '0015_job_leases'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=10)),
+                ('period_start', models.DateTimeField(help_text='Start of the hour or day (UTC) the jobs finished in')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], max_length=20)),
+                ('file_format', models.CharField(max_length=10)),
+                ('model_name', models.CharField(blank=True, max_length=50)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('audio_seconds', models.FloatField(default=0, help_text='Total audio duration in seconds')),
+                ('processing_seconds', models.FloatField(default=0, help_text='Total processing time in seconds')),
+                ('max_processing_seconds', models.FloatField(default=0)),
+                ('processing_histogram', models.JSONField(blank=True, default=list, help_text='Jobs per processing-time bucket, bounded by stats.HISTOGRAM_BOUNDS')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Statistics Rollup',
+                'verbose_name_plural': 'Statistics Rollups',
+                'ordering': ['-period_start'],
+                'constraints': [models.UniqueConstraint(fields=('period', 'period_start', 'status', 'file_format', 'model_name'), name='transcription_rollup_key')],
+            },
+        ),
+    ]
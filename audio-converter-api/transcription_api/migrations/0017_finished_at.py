@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:29
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_finished_at(apps, schema_editor):
+    # The best record older jobs have of when they finished
+    AudioTranscription = apps.get_model('transcription_api', 'AudioTranscription')
+    AudioTranscription.objects.filter(status__in=['completed', 'failed']).update(finished_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcription_api', '0016_transcription_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, help_text='When the job last completed or finally failed; statistics count it here', null=True),
+        ),
+        migrations.RunPython(backfill_finished_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcription_api', '0017_finished_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='audiotranscription',
+            name='priority',
+            field=models.CharField(choices=[('interactive', 'Interactive'), ('batch', 'Batch')], default='batch', max_length=20),
+        ),
+    ]
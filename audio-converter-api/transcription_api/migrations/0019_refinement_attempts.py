@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transcription_api', '0018_batch_priority_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='refinement_attempts',
+            field=models.PositiveIntegerField(default=0, help_text='Number of times refinement was started, counted apart from the first pass'),
+        ),
+    ]
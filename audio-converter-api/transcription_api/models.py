@@ -1,6 +1,8 @@
 from django.db import models
 from django.utils import timezone
-import os
+
+from .compression import CompressedTextField
+from .formatting import format_file_size, format_processing_time
 
 
 class AudioTranscription(models.Model):
@@ -13,6 +15,24 @@ class AudioTranscription(models.Model):
         ('failed', 'Failed'),
     ]
     
+    PRIORITY_CHOICES = [
+        ('interactive', 'Interactive'),
+        ('batch', 'Batch'),
+    ]
+    
+    REFINEMENT_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    STORAGE_TIERS = [
+        ('original', 'Original'),
+        ('compacted', 'Compacted'),
+        ('deleted', 'Deleted'),
+    ]
+    
     AUDIO_FORMATS = [
         ('mp3', 'MP3'),
         ('wav', 'WAV'),
@@ -28,14 +48,77 @@ class AudioTranscription(models.Model):
     original_filename = models.CharField(max_length=255)
     file_size = models.BigIntegerField(help_text='File size in bytes')
     file_format = models.CharField(max_length=10, choices=AUDIO_FORMATS)
+    storage_tier = models.CharField(
+        max_length=20, choices=STORAGE_TIERS, default='original',
+        help_text='Whether the stored audio is the original upload, a compacted copy or gone'
+    )
     
     # Transcription results
-    transcription_text = models.TextField(blank=True, null=True)
+    transcription_text = CompressedTextField(blank=True, null=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     
     # Processing metadata
     processing_time = models.FloatField(blank=True, null=True, help_text='Processing time in seconds')
     error_message = models.TextField(blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0, help_text='Number of times processing was started')
+    
+    # Scheduling
+    priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES, default='batch')
+    client_id = models.CharField(
+        max_length=64, blank=True, db_index=True, help_text='API key digest, user or IP the job is scheduled under'
+    )
+    started_at = models.DateTimeField(blank=True, null=True, help_text='When processing first started')
+    finished_at = models.DateTimeField(
+        blank=True, null=True, help_text='When the job last completed or finally failed; statistics count it here'
+    )
+    retry_batch = models.ForeignKey(
+        'RetryBatch', blank=True, null=True, on_delete=models.SET_NULL, related_name='transcriptions'
+    )
+    callback_url = models.URLField(
+        max_length=500, blank=True, help_text='Receives a signed POST when the job completes or fails'
+    )
+    lease_owner = models.CharField(
+        max_length=100, blank=True, help_text='host:pid:thread of the worker processing the job'
+    )
+    lease_expires_at = models.DateTimeField(
+        blank=True, null=True, help_text='The job is reclaimed if its worker has not heartbeat by then'
+    )
+    heartbeat_at = models.DateTimeField(blank=True, null=True, help_text="Worker's last sign of life")
+    
+    # Language and model routing
+    language = models.CharField(
+        max_length=10, blank=True, null=True,
+        help_text='Spoken language code, as hinted by the client or detected'
+    )
+    language_probability = models.FloatField(
+        blank=True, null=True, help_text='Detection confidence; empty when the client gave the language'
+    )
+    model_name = models.CharField(max_length=50, blank=True, help_text='Whisper model that produced the text')
+    decoding_profile = models.CharField(
+        max_length=50, blank=True, help_text='Named set of decoding options (beam size, fallback, precision) used'
+    )
+    
+    # Two-pass mode: a small model's draft first, replaced by the final model's text
+    two_pass = models.BooleanField(default=False, help_text='Return a quick draft, then refine it in the background')
+    draft_text = CompressedTextField(blank=True, null=True, help_text='First revision, from the draft model')
+    draft_model_name = models.CharField(max_length=50, blank=True, help_text='Whisper model that produced the draft')
+    refinement_status = models.CharField(
+        max_length=20, choices=REFINEMENT_CHOICES, blank=True,
+        help_text='Progress of the refined revision; empty for single-pass transcriptions'
+    )
+    refinement_attempts = models.PositiveIntegerField(
+        default=0, help_text='Number of times refinement was started, counted apart from the first pass'
+    )
+    
+    # Performance breakdown
+    audio_duration = models.FloatField(blank=True, null=True, help_text='Audio duration in seconds')
+    sample_rate = models.PositiveIntegerField(blank=True, null=True, help_text='Sample rate in Hz, read from the file header')
+    channels = models.PositiveSmallIntegerField(blank=True, null=True, help_text='Number of audio channels')
+    real_time_factor = models.FloatField(blank=True, null=True, help_text='Processing time divided by audio duration')
+    stage_timings = models.JSONField(default=dict, blank=True, help_text='Duration of each processing stage in seconds')
+    peak_rss_bytes = models.BigIntegerField(
+        blank=True, null=True, help_text='Worker process memory high-water mark while this job ran'
+    )
     
     # Timestamps
     created_at = models.DateTimeField(default=timezone.now)
@@ -43,6 +126,12 @@ class AudioTranscription(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'priority', 'client_id', 'created_at'], name='transcription_queue_idx'),
+            models.Index(fields=['updated_at', 'id'], name='transcription_changes_idx'),
+            models.Index(fields=['refinement_status', 'created_at'], name='transcription_refine_idx'),
+            models.Index(fields=['lease_expires_at'], name='transcription_lease_idx'),
+        ]
         verbose_name = 'Audio Transcription'
         verbose_name_plural = 'Audio Transcriptions'
     
@@ -51,25 +140,162 @@ class AudioTranscription(models.Model):
     
     def get_file_size_display(self):
         """Return human-readable file size"""
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if self.file_size < 1024.0:
-                return f"{self.file_size:.1f} {unit}"
-            self.file_size /= 1024.0
-        return f"{self.file_size:.1f} TB"
+        return format_file_size(self.file_size)
     
     def get_processing_time_display(self):
         """Return human-readable processing time"""
-        if self.processing_time is None:
+        return format_processing_time(self.processing_time)
+    
+    def get_audio_duration_display(self):
+        """Return human-readable audio duration"""
+        if self.audio_duration is None:
             return "N/A"
-        if self.processing_time < 60:
-            return f"{self.processing_time:.2f}s"
-        minutes = int(self.processing_time // 60)
-        seconds = self.processing_time % 60
-        return f"{minutes}m {seconds:.2f}s"
-    
-    def delete(self, *args, **kwargs):
-        """Override delete to remove the audio file from storage"""
-        if self.audio_file:
-            if os.path.isfile(self.audio_file.path):
-                os.remove(self.audio_file.path)
-        super().delete(*args, **kwargs)
+        minutes, seconds = divmod(int(round(self.audio_duration)), 60)
+        return f"{minutes}:{seconds:02d}"
+    
+    def record_timings(self, timer, audio_duration=None):
+        """Store total time, stage breakdown and real-time factor from a StageTimer"""
+        self.processing_time = timer.total()
+        self.stage_timings = timer.as_dict()
+        if audio_duration:
+            self.audio_duration = audio_duration
+            self.real_time_factor = self.processing_time / audio_duration
+
+
+class RequestProfile(models.Model):
+    """cProfile capture of a request or a transcription run"""
+    
+    KIND_CHOICES = [
+        ('request', 'Request'),
+        ('transcription', 'Transcription'),
+    ]
+    
+    TRIGGER_CHOICES = [
+        ('sampled', 'Sampled'),
+        ('header', 'Header'),
+    ]
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    label = models.CharField(max_length=255, help_text='Request path or transcription being profiled')
+    method = models.CharField(max_length=10, blank=True)
+    status_code = models.PositiveSmallIntegerField(blank=True, null=True)
+    trigger = models.CharField(max_length=20, choices=TRIGGER_CHOICES)
+    duration = models.FloatField(help_text='Wall-clock time in seconds')
+    profile_file = models.FileField(upload_to='profiles/')
+    summary = models.TextField(blank=True, help_text='Top functions by cumulative time')
+    transcription = models.ForeignKey(
+        AudioTranscription, blank=True, null=True, on_delete=models.SET_NULL, related_name='profiles'
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Request Profile'
+        verbose_name_plural = 'Request Profiles'
+    
+    def __str__(self):
+        return f"{self.kind} {self.label} ({self.duration:.2f}s)"
+
+
+class RetryBatch(models.Model):
+    """A bulk retry of failed transcriptions, used to report its progress"""
+    
+    requested_by = models.CharField(max_length=150, blank=True)
+    total = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Retry Batch'
+        verbose_name_plural = 'Retry Batches'
+    
+    def __str__(self):
+        return f"Retry batch {self.pk} ({self.total} transcriptions)"
+    
+    def get_progress(self):
+        """Count the batch's transcriptions by current status"""
+        counts = dict.fromkeys(['pending', 'processing', 'completed', 'failed'], 0)
+        rows = self.transcriptions.order_by().values_list('status').annotate(count=models.Count('id'))
+        counts.update(rows)
+        return counts
+    
+    def get_progress_display(self):
+        counts = self.get_progress()
+        done = counts['completed'] + counts['failed']
+        return f"{done}/{self.total} done ({counts['completed']} completed, {counts['failed']} failed)"
+
+
+class WebhookDelivery(models.Model):
+    """A completion or failure event for a callback URL, and the log of delivering it"""
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('delivered', 'Delivered'),
+        ('failed', 'Failed'),
+    ]
+    
+    transcription = models.ForeignKey(
+        AudioTranscription, blank=True, null=True, on_delete=models.SET_NULL, related_name='webhook_deliveries'
+    )
+    url = models.URLField(max_length=500)
+    event = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_status_code = models.PositiveIntegerField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    delivered_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='webhook_due_idx'),
+        ]
+        verbose_name = 'Webhook Delivery'
+        verbose_name_plural = 'Webhook Deliveries'
+    
+    def __str__(self):
+        return f"{self.event} to {self.url} ({self.status})"
+
+
+class TranscriptionRollup(models.Model):
+    """Running totals of finished jobs for one hour or day, status, format and model
+    
+    Updated as each job completes or fails, so dashboards read a handful of
+    rows per period instead of aggregating the transcriptions table.
+    """
+    
+    PERIOD_CHOICES = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    ]
+    
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    period_start = models.DateTimeField(help_text='Start of the hour or day (UTC) the jobs finished in')
+    status = models.CharField(max_length=20, choices=AudioTranscription.STATUS_CHOICES)
+    file_format = models.CharField(max_length=10)
+    model_name = models.CharField(max_length=50, blank=True)
+    count = models.PositiveIntegerField(default=0)
+    audio_seconds = models.FloatField(default=0, help_text='Total audio duration in seconds')
+    processing_seconds = models.FloatField(default=0, help_text='Total processing time in seconds')
+    max_processing_seconds = models.FloatField(default=0)
+    processing_histogram = models.JSONField(
+        default=list, blank=True, help_text='Jobs per processing-time bucket, bounded by stats.HISTOGRAM_BOUNDS'
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-period_start']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['period', 'period_start', 'status', 'file_format', 'model_name'], name='transcription_rollup_key'
+            ),
+        ]
+        verbose_name = 'Statistics Rollup'
+        verbose_name_plural = 'Statistics Rollups'
+    
+    def __str__(self):
+        return f"{self.period} {self.period_start:%Y-%m-%d %H:%M} {self.status} {self.file_format} {self.model_name}"
@@ -0,0 +1,121 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .leases import lease_fields
+from .models import AudioTranscription, RetryBatch
+from .processing import refine_in_background, transcribe
+from .stats import recount_rollups
+
+logger = logging.getLogger(__name__)
+
+
+def requeue_failed(queryset, requested_by=''):
+    """Move the failed rows of a queryset back to pending with one UPDATE
+    
+    Attempts start from zero again, so the lease reaper gives the retry the
+    full JOB_MAX_ATTEMPTS, and the earlier failures leave the statistics
+    until the retry finishes. Returns the RetryBatch tracking them, or None
+    if nothing was failed.
+    """
+    batch = RetryBatch.objects.create(requested_by=requested_by)
+    failed = queryset.filter(status='failed')
+    finished = set(failed.filter(finished_at__isnull=False).values_list('finished_at', flat=True))
+    total = failed.update(
+        status='pending', error_message='', retry_batch=batch, attempts=0,
+        lease_owner='', lease_expires_at=None, finished_at=None, updated_at=timezone.now()
+    )
+    if not total:
+        batch.delete()
+        return None
+    recount_rollups(finished)
+    batch.total = total
+    batch.save(update_fields=['total'])
+    return batch
+
+
+def retry_transcription(pk, max_attempts, backoff):
+    """Claim one pending transcription and process it, backing off exponentially
+    between failed attempts; returns True on success and None if already claimed"""
+    try:
+        # The conditional UPDATE makes the claim atomic across threads and processes;
+        # the lease goes on in the same statement so the reaper covers the row at once
+        now = timezone.now()
+        claimed = AudioTranscription.objects.filter(pk=pk, status='pending').update(
+            status='processing', updated_at=now, **lease_fields(now)
+        )
+        if not claimed:
+            return None
+        transcription = AudioTranscription.objects.get(pk=pk)
+        for attempt in range(1, max_attempts + 1):
+            if transcribe(transcription, final=attempt == max_attempts):
+                # Queue workers pick up drafts themselves in async mode
+                if transcription.refinement_status == 'pending' and not getattr(settings, 'TRANSCRIPTION_ASYNC', False):
+                    refine_in_background()
+                return True
+            if attempt < max_attempts:
+                delay = backoff * 2 ** (attempt - 1)
+                logger.info(f"Retrying transcription {pk} in {delay:.0f}s (attempt {attempt} failed)")
+                time.sleep(delay)
+        return False
+    finally:
+        # Worker threads each hold their own connection
+        connection.close()
+
+
+def process_batch(batch, max_workers=None, max_attempts=None, backoff=None, on_progress=None):
+    """Process the pending transcriptions of a retry batch with bounded concurrency"""
+    max_workers = max_workers or getattr(settings, 'RETRY_MAX_WORKERS', 2)
+    max_attempts = max_attempts or getattr(settings, 'RETRY_MAX_ATTEMPTS', 3)
+    backoff = getattr(settings, 'RETRY_BACKOFF_SECONDS', 5) if backoff is None else backoff
+    
+    pks = list(batch.transcriptions.filter(status='pending').order_by('pk').values_list('pk', flat=True))
+    succeeded = failed = 0
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f'retry-{batch.pk}') as executor:
+        futures = [executor.submit(retry_transcription, pk, max_attempts, backoff) for pk in pks]
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                outcome = future.result()
+            except Exception as e:
+                logger.error(f"Retry batch {batch.pk} worker error: {e}")
+                outcome = False
+            if outcome is True:
+                succeeded += 1
+            elif outcome is False:
+                failed += 1
+            if on_progress:
+                on_progress(done, failed, len(pks))
+    
+    batch.finished_at = timezone.now()
+    batch.save(update_fields=['finished_at'])
+    logger.info(f"Retry batch {batch.pk} finished: {succeeded} succeeded, {failed} failed")
+    return succeeded, failed
+
+
+def close_finished_batches():
+    """Mark open batches whose transcriptions have all completed or failed as finished
+    
+    Queue workers process batches in async mode, and they don't track them.
+    """
+    open_batches = RetryBatch.objects.filter(finished_at__isnull=True)
+    busy = AudioTranscription.objects.filter(retry_batch=OuterRef('pk'), status__in=['pending', 'processing'])
+    return open_batches.exclude(Exists(busy)).update(finished_at=timezone.now())
+
+
+def process_batch_in_background(batch):
+    """Process a batch on a daemon thread so the admin request returns immediately"""
+    def run():
+        try:
+            process_batch(batch)
+        finally:
+            connection.close()
+    
+    thread = threading.Thread(target=run, name=f'retry-batch-{batch.pk}', daemon=True)
+    thread.start()
+    return thread
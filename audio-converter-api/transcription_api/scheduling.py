@@ -0,0 +1,170 @@
+import hashlib
+import hmac
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .estimates import estimate_processing_seconds, expected_audio_seconds, job_audio_seconds
+from .leases import lease_fields
+from .models import AudioTranscription
+
+# Priority classes, served strictly in this order
+PRIORITY_ORDER = ['interactive', 'batch']
+
+# How often to re-pick when another worker claims the chosen job first
+CLAIM_ATTEMPTS = 5
+
+
+def get_client_id(request):
+    """Identify the client an upload is scheduled (and later throttled) under
+    
+    Only keys listed in API_KEYS count; any other X-Api-Key is ignored, so a
+    client can't get a fresh rate-limit bucket or fairness share by making
+    keys up.
+    """
+    api_key = request.headers.get('X-Api-Key')
+    if api_key and any(hmac.compare_digest(api_key, known) for known in getattr(settings, 'API_KEYS', [])):
+        # Only a digest is stored, so keys don't leak through the admin or the API
+        return 'key:' + hashlib.sha256(api_key.encode()).hexdigest()[:12]
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+def may_submit_interactive(request):
+    """Staff users and the clients in SCHEDULER_INTERACTIVE_CLIENTS may use the interactive class"""
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    return get_client_id(request) in getattr(settings, 'SCHEDULER_INTERACTIVE_CLIENTS', [])
+
+
+def submission_priority(request, requested=None):
+    """Class an upload is queued in
+    
+    Trusted clients get interactive unless they ask for batch; everyone else
+    is queued as batch whatever they ask for, so a bulk backfill can't jump
+    ahead of the UI.
+    """
+    if may_submit_interactive(request):
+        return requested or 'interactive'
+    return 'batch'
+
+
+def client_weight(client_id):
+    return getattr(settings, 'SCHEDULER_CLIENT_WEIGHTS', {}).get(client_id, 1)
+
+
+def pick_client(priority, now):
+    """Weighted round-robin: the client with the least recent service per unit of weight
+    
+    Service is the number of jobs started within SCHEDULER_FAIRNESS_WINDOW
+    seconds; ties go to the client whose oldest job has waited longest.
+    """
+    waiting = dict(
+        AudioTranscription.objects.filter(status='pending', priority=priority)
+        .order_by().values_list('client_id').annotate(oldest=Min('created_at'))
+    )
+    if not waiting:
+        return None
+    
+    window = now - timedelta(seconds=getattr(settings, 'SCHEDULER_FAIRNESS_WINDOW', 600))
+    served = dict(
+        AudioTranscription.objects.filter(priority=priority, started_at__gte=window, client_id__in=waiting)
+        .order_by().values_list('client_id').annotate(count=Count('id'))
+    )
+    return min(waiting, key=lambda client: (served.get(client, 0) / client_weight(client), waiting[client]))
+
+
+def shortest_job_first():
+    return getattr(settings, 'SCHEDULER_SHORTEST_JOB_FIRST', False)
+
+
+def claim_next():
+    """Atomically claim the next pending transcription, or return None if the queue is empty"""
+    for priority in PRIORITY_ORDER:
+        for _ in range(CLAIM_ATTEMPTS):
+            now = timezone.now()
+            client = pick_client(priority, now)
+            if client is None:
+                break
+            queued = AudioTranscription.objects.filter(status='pending', priority=priority, client_id=client)
+            if shortest_job_first():
+                queued = queued.alias(cost=expected_audio_seconds()).order_by('cost', 'created_at', 'pk')
+            else:
+                queued = queued.order_by('created_at', 'pk')
+            pk = queued.values_list('pk', flat=True).first()
+            if pk is None:
+                continue
+            # The lease is taken in the same UPDATE, so a claimed job is never unowned
+            claimed = AudioTranscription.objects.filter(pk=pk, status='pending').update(
+                status='processing', started_at=Coalesce('started_at', Value(now)), updated_at=now,
+                **lease_fields(now)
+            )
+            if claimed:
+                return AudioTranscription.objects.get(pk=pk)
+    return None
+
+
+def estimate_completion(transcription, now=None):
+    """Rough completion time of a queued or running job; None once it has finished
+    
+    Counts the work of every job that runs before it by priority and arrival
+    (or size, with shortest-job-first). Client fairness reorders jobs within a
+    class, so this is an estimate rather than a promise.
+    """
+    if transcription.status not in ('pending', 'processing'):
+        return None
+    now = now or timezone.now()
+    audio_seconds = job_audio_seconds(transcription)
+    own = estimate_processing_seconds(audio_seconds, workers=1)
+    if transcription.status == 'processing':
+        elapsed = (now - transcription.started_at).total_seconds() if transcription.started_at else 0
+        return now + timedelta(seconds=max(own - elapsed, 0))
+    
+    rank = PRIORITY_ORDER.index(transcription.priority)
+    if shortest_job_first():
+        same_class = Q(priority=transcription.priority, cost__lt=audio_seconds)
+    else:
+        same_class = Q(priority=transcription.priority, created_at__lt=transcription.created_at)
+    ahead = AudioTranscription.objects.filter(
+        status__in=['pending', 'processing'], created_at__gte=now - timedelta(days=1)
+    ).exclude(pk=transcription.pk).alias(cost=expected_audio_seconds()).filter(
+        Q(status='processing') | Q(priority__in=PRIORITY_ORDER[:rank]) | same_class
+    )
+    ahead_seconds = ahead.aggregate(seconds=Sum(expected_audio_seconds()))['seconds'] or 0.0
+    return now + timedelta(seconds=estimate_processing_seconds(ahead_seconds) + own)
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def queue_stats(hours=24):
+    """Queue depth and wait times (created to started, in seconds) per priority class"""
+    now = timezone.now()
+    since = now - timedelta(hours=hours)
+    stats = {}
+    for priority in PRIORITY_ORDER:
+        pending = AudioTranscription.objects.filter(status='pending', priority=priority)
+        oldest = pending.order_by().aggregate(oldest=Min('created_at'))['oldest']
+        waits = [
+            (started - created).total_seconds()
+            for created, started in AudioTranscription.objects.filter(
+                priority=priority, started_at__gte=since
+            ).order_by('-started_at').values_list('created_at', 'started_at')[:10000]
+        ]
+        stats[priority] = {
+            'pending': pending.count(),
+            'oldest_pending_seconds': (now - oldest).total_seconds() if oldest else None,
+            'started': len(waits),
+            'avg_wait_seconds': sum(waits) / len(waits) if waits else None,
+            'p95_wait_seconds': percentile(waits, 0.95),
+            'max_wait_seconds': max(waits) if waits else None,
+        }
+    return stats
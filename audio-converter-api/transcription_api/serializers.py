@@ -1,45 +1,82 @@
-from rest_framework import serializers
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from .decoding import decoding_profiles
+from .formatting import format_file_size, format_processing_time
+from .language import normalize_language
 from .models import AudioTranscription
+from .probe import InvalidAudio, validate_audio
+from .scheduling import estimate_completion
+from .webhooks import UnsafeCallbackURL, check_callback_url
 import os
 
 
 class AudioTranscriptionSerializer(serializers.ModelSerializer):
     """Serializer for AudioTranscription model"""
     
-    file_size_display = serializers.CharField(read_only=True)
-    processing_time_display = serializers.CharField(read_only=True)
+    file_size_display = serializers.CharField(source='get_file_size_display', read_only=True)
+    processing_time_display = serializers.CharField(source='get_processing_time_display', read_only=True)
     audio_file_url = serializers.SerializerMethodField()
+    estimated_completion = serializers.SerializerMethodField()
     
     class Meta:
         model = AudioTranscription
         fields = [
             'id', 'audio_file', 'original_filename', 'file_size', 'file_size_display',
             'file_format', 'transcription_text', 'status', 'processing_time',
-            'processing_time_display', 'error_message', 'created_at', 'updated_at',
-            'audio_file_url'
+            'processing_time_display', 'audio_duration', 'sample_rate', 'channels', 'real_time_factor',
+            'stage_timings', 'peak_rss_bytes', 'language', 'language_probability', 'model_name', 'decoding_profile',
+            'two_pass', 'draft_text', 'draft_model_name', 'refinement_status',
+            'priority', 'callback_url', 'started_at', 'error_message', 'created_at', 'updated_at',
+            'audio_file_url', 'estimated_completion'
         ]
         read_only_fields = [
             'id', 'original_filename', 'file_size', 'file_size_display',
             'file_format', 'transcription_text', 'status', 'processing_time',
-            'processing_time_display', 'error_message', 'created_at', 'updated_at',
-            'audio_file_url'
+            'processing_time_display', 'audio_duration', 'sample_rate', 'channels', 'real_time_factor',
+            'stage_timings', 'peak_rss_bytes', 'language', 'language_probability', 'model_name', 'decoding_profile',
+            'two_pass', 'draft_text', 'draft_model_name', 'refinement_status',
+            'priority', 'callback_url', 'started_at', 'error_message', 'created_at', 'updated_at',
+            'audio_file_url', 'estimated_completion'
         ]
     
     def get_audio_file_url(self, obj):
-        """Return the URL for the audio file"""
+        """Return the URL of the range-capable audio streaming endpoint"""
         if obj.audio_file:
             request = self.context.get('request')
             if request:
-                return request.build_absolute_uri(obj.audio_file.url)
+                return request.build_absolute_uri(reverse('transcription_api:audio', args=[obj.id]))
         return None
+    
+    def get_estimated_completion(self, obj):
+        """Expected completion time while the job is queued or running"""
+        return estimate_completion(obj)
 
 
 class AudioTranscriptionCreateSerializer(serializers.ModelSerializer):
     """Serializer for creating new audio transcription requests"""
     
+    language = serializers.CharField(
+        required=False, allow_blank=True,
+        help_text='Spoken language code or name; skips language detection when given'
+    )
+    
+    two_pass = serializers.BooleanField(
+        required=False, allow_null=True,
+        help_text='Return a quick draft first and refine it in the background; defaults to TWO_PASS_DEFAULT'
+    )
+    
+    decoding_profile = serializers.CharField(
+        required=False, allow_blank=True,
+        help_text='Name of a decoding profile, e.g. fast, balanced or accurate; defaults to DEFAULT_DECODING_PROFILE'
+    )
+    
     class Meta:
         model = AudioTranscription
-        fields = ['audio_file']
+        fields = ['audio_file', 'language', 'priority', 'callback_url', 'two_pass', 'decoding_profile']
+        extra_kwargs = {'priority': {'required': False}, 'callback_url': {'required': False}}
     
     def validate_audio_file(self, value):
         """Validate the uploaded audio file"""
@@ -56,6 +93,37 @@ class AudioTranscriptionCreateSerializer(serializers.ModelSerializer):
                 f"Unsupported file format. Allowed formats: {', '.join(allowed_extensions)}"
             )
         
+        # Sniff the content and parse its headers so bad files never reach a worker
+        try:
+            self.audio_info = validate_audio(value, file_extension)
+        except InvalidAudio as e:
+            raise serializers.ValidationError(str(e))
+        
+        return value
+    
+    def validate_language(self, value):
+        """Normalize the language hint to a Whisper language code"""
+        if not value:
+            return None
+        language = normalize_language(value)
+        if language is None:
+            raise serializers.ValidationError(f"Unsupported language: {value}")
+        return language
+    
+    def validate_callback_url(self, value):
+        """Refuse callbacks to loopback, private and link-local addresses"""
+        if value:
+            try:
+                check_callback_url(value)
+            except UnsafeCallbackURL as e:
+                raise serializers.ValidationError(str(e))
+        return value
+    
+    def validate_decoding_profile(self, value):
+        """Reject names that aren't configured profiles"""
+        profiles = decoding_profiles()
+        if value and value not in profiles:
+            raise serializers.ValidationError(f"Unknown decoding profile, use one of: {', '.join(profiles)}")
         return value
 
 
@@ -71,8 +139,8 @@ class AudioTranscriptionUpdateSerializer(serializers.ModelSerializer):
 class AudioTranscriptionListSerializer(serializers.ModelSerializer):
     """Serializer for listing audio transcriptions (minimal data)"""
     
-    file_size_display = serializers.CharField(read_only=True)
-    processing_time_display = serializers.CharField(read_only=True)
+    file_size_display = serializers.CharField(source='get_file_size_display', read_only=True)
+    processing_time_display = serializers.CharField(source='get_processing_time_display', read_only=True)
     
     class Meta:
         model = AudioTranscription
@@ -80,3 +148,41 @@ class AudioTranscriptionListSerializer(serializers.ModelSerializer):
             'id', 'original_filename', 'file_size_display', 'file_format',
             'status', 'processing_time_display', 'created_at'
         ]
+
+
+# Columns read by list_rows(), in the order it unpacks them
+LIST_ROW_VALUES = ['id', 'original_filename', 'file_size', 'file_format', 'status', 'processing_time', 'created_at']
+
+def datetime_formatter():
+    """DateTimeField.to_representation, specialised for the default ISO 8601 output"""
+    if api_settings.DATETIME_FORMAT != ISO_8601:
+        return serializers.DateTimeField().to_representation
+    current_timezone = timezone.get_current_timezone() if settings.USE_TZ else None
+    
+    def to_representation(value):
+        if current_timezone is not None:
+            value = value.astimezone(current_timezone)
+        value = value.isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return to_representation
+
+
+def list_rows(rows):
+    """Build AudioTranscriptionListSerializer output straight from .values_list(*LIST_ROW_VALUES) tuples
+    
+    Skips model instantiation and DRF's per-field machinery, which dominate
+    the cost of large pages and exports.
+    """
+    to_datetime = datetime_formatter()
+    return [
+        {
+            'id': pk,
+            'original_filename': original_filename,
+            'file_size_display': format_file_size(file_size),
+            'file_format': file_format,
+            'status': status,
+            'processing_time_display': format_processing_time(processing_time),
+            'created_at': to_datetime(created_at),
+        }
+        for pk, original_filename, file_size, file_format, status, processing_time, created_at in rows
+    ]
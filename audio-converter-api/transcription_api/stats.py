@@ -0,0 +1,237 @@
+"""Throughput, failure and processing-time statistics from precomputed rollups
+
+Every finished job is added to the TranscriptionRollup rows for the hour and
+day of its finished_at, keyed by status, upload format and the model that
+produced its first result: the draft model for two-pass jobs, whose
+processing_time is the draft's and which are counted before refining. Processing
+times are kept as a histogram so percentiles can be read back for any range
+or grouping without touching individual transcriptions.
+"""
+import logging
+import os
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.utils import timezone
+
+from .export import parse_bound
+from .models import AudioTranscription, TranscriptionRollup
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the processing-time buckets; one more bucket holds longer jobs
+HISTOGRAM_BOUNDS = (0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+
+# Range covered when the caller gives no start
+DEFAULT_SPANS = {
+    'hour': timedelta(hours=48),
+    'day': timedelta(days=30),
+}
+
+GROUP_FIELDS = ('status', 'file_format', 'model_name')
+
+PERIODS = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+}
+
+
+def period_start(moment, period):
+    """Start of the UTC hour or day containing moment"""
+    moment = moment.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0) if period == 'day' else moment
+
+
+def empty_histogram():
+    return [0] * (len(HISTOGRAM_BOUNDS) + 1)
+
+
+def single_job_histogram(processing_seconds):
+    histogram = empty_histogram()
+    histogram[bisect_left(HISTOGRAM_BOUNDS, processing_seconds)] = 1
+    return histogram
+
+
+def histogram_percentile(histogram, fraction, maximum):
+    """Upper bound of the bucket holding the fraction-th job, capped at the slowest job"""
+    total = sum(histogram)
+    if not total:
+        return None
+    running = 0
+    for index, count in enumerate(histogram):
+        running += count
+        if running >= total * fraction:
+            return min(HISTOGRAM_BOUNDS[index], maximum) if index < len(HISTOGRAM_BOUNDS) else maximum
+    return maximum
+
+
+def add_to_rollup(rollup, count, audio_seconds, processing_seconds, max_processing_seconds, histogram):
+    rollup.count += count
+    rollup.audio_seconds += audio_seconds
+    rollup.processing_seconds += processing_seconds
+    rollup.max_processing_seconds = max(rollup.max_processing_seconds, max_processing_seconds)
+    merged = rollup.processing_histogram or empty_histogram()
+    rollup.processing_histogram = [a + b for a, b in zip(merged, histogram)]
+
+
+def uploaded_format(original_filename):
+    """The format a job was uploaded in, which compaction may since have changed"""
+    return os.path.splitext(original_filename)[1][1:].lower()
+
+
+def outcome_model(model_name, draft_model_name):
+    """Model a finished job is counted under; refining a draft doesn't move it"""
+    return draft_model_name or model_name or ''
+
+
+def record_outcome(transcription):
+    """Add a job that just completed or finally failed to its hourly and daily rollups
+    
+    Call once per finished_at: when the job completes, or fails with no retry
+    to follow. Errors are logged rather than raised: statistics must never
+    fail a job.
+    """
+    if transcription.status not in ('completed', 'failed') or transcription.finished_at is None:
+        return
+    processing_seconds = transcription.processing_time or 0
+    histogram = single_job_histogram(processing_seconds)
+    try:
+        with transaction.atomic():
+            for period in PERIODS:
+                # The row lock serializes concurrent workers updating the same rollup
+                rollup, _ = TranscriptionRollup.objects.select_for_update().get_or_create(
+                    period=period,
+                    period_start=period_start(transcription.finished_at, period),
+                    status=transcription.status,
+                    file_format=uploaded_format(transcription.original_filename),
+                    model_name=outcome_model(transcription.model_name, transcription.draft_model_name),
+                )
+                add_to_rollup(
+                    rollup, 1, transcription.audio_duration or 0, processing_seconds, processing_seconds, histogram
+                )
+                rollup.save()
+    except Exception as e:
+        logger.error(f"Could not update statistics for transcription {transcription.id}: {e}")
+
+
+def finished_rows():
+    return AudioTranscription.objects.filter(
+        status__in=['completed', 'failed'], finished_at__isnull=False
+    ).values_list(
+        'status', 'original_filename', 'model_name', 'draft_model_name', 'audio_duration', 'processing_time',
+        'finished_at'
+    )
+
+
+def accumulate(rows, periods, batch_size=2000):
+    """Rollups for rows from finished_rows(), keyed like the table, as record_outcome would build them"""
+    totals = {}
+    for (
+        status, original_filename, model_name, draft_model_name, audio_duration, processing_time, finished_at
+    ) in rows.iterator(chunk_size=batch_size):
+        processing_seconds = processing_time or 0
+        histogram = single_job_histogram(processing_seconds)
+        for period in periods:
+            key = (
+                period, period_start(finished_at, period), status, uploaded_format(original_filename),
+                outcome_model(model_name, draft_model_name)
+            )
+            rollup = totals.get(key)
+            if rollup is None:
+                rollup = totals[key] = TranscriptionRollup(**dict(zip(
+                    ('period', 'period_start', 'status', 'file_format', 'model_name'), key
+                )))
+            add_to_rollup(rollup, 1, audio_duration or 0, processing_seconds, processing_seconds, histogram)
+    return totals
+
+
+def rebuild_rollups(batch_size=2000):
+    """Recompute every rollup from the transcriptions table; return the number of rows written
+    
+    Gives the same rollups record_outcome built, except for jobs since
+    deleted from the table.
+    """
+    totals = accumulate(finished_rows(), PERIODS, batch_size)
+    with transaction.atomic():
+        TranscriptionRollup.objects.all().delete()
+        TranscriptionRollup.objects.bulk_create(totals.values(), batch_size=500)
+    return len(totals)
+
+
+def recount_rollups(moments):
+    """Recompute from the table the hourly and daily rollups covering the given finish times
+    
+    Used when finished jobs are sent back to the queue: their earlier outcome
+    no longer counts, and a maximum can't be subtracted.
+    """
+    buckets = {(period, period_start(moment, period)) for moment in moments for period in PERIODS}
+    for period, start in buckets:
+        rows = finished_rows().filter(finished_at__gte=start, finished_at__lt=start + PERIODS[period])
+        totals = accumulate(rows, [period])
+        with transaction.atomic():
+            TranscriptionRollup.objects.filter(period=period, period_start=start).delete()
+            TranscriptionRollup.objects.bulk_create(totals.values())
+
+
+def summarize(rollups, keys):
+    """Merge rollups sharing the values of keys into one summary each, in first-seen order"""
+    groups = {}
+    statuses = defaultdict(lambda: defaultdict(int))
+    for rollup in rollups:
+        key = tuple(getattr(rollup, field) for field in keys)
+        group = groups.get(key)
+        if group is None:
+            # An unsaved rollup makes a convenient accumulator
+            group = groups[key] = TranscriptionRollup()
+        add_to_rollup(
+            group, rollup.count, rollup.audio_seconds, rollup.processing_seconds,
+            rollup.max_processing_seconds, rollup.processing_histogram or empty_histogram()
+        )
+        statuses[key][rollup.status] += rollup.count
+    
+    summaries = []
+    for key, group in groups.items():
+        summaries.append({
+            **dict(zip(keys, key)),
+            'count': group.count,
+            'completed': statuses[key]['completed'],
+            'failed': statuses[key]['failed'],
+            'failure_rate': statuses[key]['failed'] / group.count if group.count else None,
+            'audio_seconds': group.audio_seconds,
+            'avg_processing_seconds': group.processing_seconds / group.count if group.count else None,
+            'p50_processing_seconds': histogram_percentile(
+                group.processing_histogram, 0.5, group.max_processing_seconds
+            ),
+            'p95_processing_seconds': histogram_percentile(
+                group.processing_histogram, 0.95, group.max_processing_seconds
+            ),
+            'max_processing_seconds': group.max_processing_seconds,
+        })
+    return summaries
+
+
+def rollup_stats(period='day', since=None, until=None, group_by=()):
+    """Per-period series and range totals, optionally split by status, format or model
+    
+    Raises ValueError for an unknown period, grouping or date.
+    """
+    if period not in DEFAULT_SPANS:
+        raise ValueError(f"Unknown period, use one of: {', '.join(DEFAULT_SPANS)}")
+    unknown = set(group_by) - set(GROUP_FIELDS)
+    if unknown:
+        raise ValueError(f"Cannot group by {', '.join(sorted(unknown))}; use {', '.join(GROUP_FIELDS)}")
+    since = parse_bound(since) if since else timezone.now() - DEFAULT_SPANS[period]
+    rollups = TranscriptionRollup.objects.filter(period=period, period_start__gte=period_start(since, period))
+    if until:
+        until = parse_bound(until, end=True)
+        rollups = rollups.filter(period_start__lte=until)
+    rollups = list(rollups.order_by('period_start', *group_by))
+    return {
+        'period': period,
+        'since': period_start(since, period),
+        'until': until,
+        'series': summarize(rollups, ('period_start', *group_by)),
+        'totals': summarize(rollups, group_by),
+    }
@@ -0,0 +1,93 @@
+import math
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import BaseThrottle
+
+from .estimates import estimate_processing_seconds, expected_audio_seconds
+from .models import AudioTranscription
+from .scheduling import get_client_id
+
+
+class TokenBucket:
+    """Per-client token bucket kept in the default cache
+    
+    The read-modify-write isn't atomic, so concurrent requests from one client
+    can occasionally overdraw by a token; that is fine for absorbing bursts.
+    """
+    
+    def __init__(self, rate, capacity, prefix='upload-bucket'):
+        self.rate = rate
+        self.capacity = capacity
+        self.prefix = prefix
+    
+    def consume(self, client_id):
+        """Take a token; return 0 if allowed, else the seconds until one is available"""
+        now = time.time()
+        key = f'{self.prefix}:{client_id}'
+        tokens, updated = cache.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+        timeout = math.ceil(self.capacity / self.rate) + 60
+        if tokens >= 1:
+            cache.set(key, (tokens - 1, now), timeout)
+            return 0
+        cache.set(key, (tokens, now), timeout)
+        return (1 - tokens) / self.rate
+
+
+def upload_bucket():
+    per_minute = getattr(settings, 'UPLOAD_RATE_PER_MINUTE', None)
+    if not per_minute:
+        return None
+    return TokenBucket(per_minute / 60, getattr(settings, 'UPLOAD_BURST', 5))
+
+
+def backlog_audio_seconds():
+    """Audio-seconds of work queued or in progress"""
+    # Rows older than a day are stuck rather than queued and shouldn't block admission
+    since = timezone.now() - timedelta(days=1)
+    return AudioTranscription.objects.filter(
+        status__in=['pending', 'processing'], created_at__gte=since
+    ).aggregate(seconds=Sum(expected_audio_seconds()))['seconds'] or 0.0
+
+
+def backlog_retry_after():
+    """None if the backlog admits new work, else a Retry-After in seconds"""
+    limit = getattr(settings, 'LOAD_SHED_MAX_BACKLOG_SECONDS', None)
+    if limit is None:
+        return None
+    backlog = cache.get_or_set('transcription-backlog', backlog_audio_seconds, 2)
+    if backlog <= limit:
+        return None
+    return min(max(math.ceil(estimate_processing_seconds(backlog - limit)), 1), 600)
+
+
+class UploadRateThrottle(BaseThrottle):
+    """Token bucket per client: UPLOAD_RATE_PER_MINUTE sustained, UPLOAD_BURST at once"""
+    
+    def allow_request(self, request, view):
+        bucket = upload_bucket()
+        if bucket is None:
+            return True
+        self.retry_after = bucket.consume(get_client_id(request))
+        return self.retry_after == 0
+    
+    def wait(self):
+        return self.retry_after
+
+
+class ServiceOverloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'The transcription backlog is full, please retry later.'
+    default_code = 'overloaded'
+    
+    def __init__(self, wait):
+        super().__init__()
+        # DRF's exception handler turns this into a Retry-After header
+        self.wait = wait
@@ -0,0 +1,57 @@
+import time
+from contextlib import contextmanager
+
+from django.db.models import Avg, Count, FloatField, Max
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast
+
+# Stages recorded for every transcription, in pipeline order
+STAGES = ['model_load', 'decode', 'language_detection', 'inference']
+
+
+class StageTimer:
+    """Collect wall-clock durations of the named stages of one transcription"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def as_dict(self):
+        return {name: round(duration, 4) for name, duration in self.stages.items()}
+
+
+def build_slowness_report(queryset):
+    """Aggregate speed metrics of completed transcriptions, slowest format first"""
+    completed = queryset.filter(status='completed', real_time_factor__isnull=False).order_by()
+    stage_averages = {
+        f'avg_{stage}': Avg(Cast(KeyTextTransform(stage, 'stage_timings'), FloatField()))
+        for stage in STAGES
+    }
+    by_format = list(
+        completed.values('file_format')
+        .annotate(
+            count=Count('id'),
+            avg_duration=Avg('audio_duration'),
+            avg_rtf=Avg('real_time_factor'),
+            max_rtf=Max('real_time_factor'),
+            **stage_averages
+        )
+        .order_by('-avg_rtf')
+    )
+    if not by_format:
+        return None
+    return {
+        'by_format': by_format,
+        'slowest': list(completed.order_by('-real_time_factor')[:5]),
+    }
@@ -7,9 +7,14 @@ urlpatterns = [
     # Main API endpoints
     path('transcriptions/', views.AudioTranscriptionCreateView.as_view(), name='create'),
     path('transcriptions/list/', views.AudioTranscriptionListView.as_view(), name='list'),
+    path('transcriptions/export/', views.export_transcriptions, name='export'),
+    path('transcriptions/changes/', views.transcription_changes, name='changes'),
+    path('transcriptions/stats/', views.transcription_stats, name='stats'),
     path('transcriptions/<int:id>/', views.AudioTranscriptionDetailView.as_view(), name='detail'),
+    path('transcriptions/<int:id>/audio/', views.stream_audio, name='audio'),
     
     # Utility endpoints
     path('health/', views.health_check, name='health'),
+    path('queue/', views.queue_status, name='queue'),
     path('info/', views.api_info, name='info'),
 ]
@@ -1,38 +1,46 @@
 import os
-import time
 import logging
 from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_http_methods
 from rest_framework import status, generics, filters
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
+from .caching import CachedResponseMixin, detail_version, list_version
+from .changes import wait_for_changes
+from .decoding import default_decoding_profile
+from .engine import is_available, whisper_models
+from .export import DEFAULT_CHUNK_SIZE, EXPORT_FORMATS, export_queryset, parquet_available
 from .models import AudioTranscription
+from .processing import refine_in_background, transcribe
+from .scheduling import get_client_id, queue_stats, submission_priority
 from .serializers import (
     AudioTranscriptionSerializer,
     AudioTranscriptionCreateSerializer,
-    AudioTranscriptionListSerializer
+    AudioTranscriptionListSerializer,
+    LIST_ROW_VALUES,
+    list_rows
 )
+from .stats import rollup_stats
+from .streaming import serve_audio
+from .throttling import ServiceOverloaded, UploadRateThrottle, backlog_retry_after
 
 logger = logging.getLogger(__name__)
-whisper_model = None
-
-def load_whisper_model():
-    global whisper_model
-    if whisper_model is None:
-        try:
-            import whisper
-            model_name = getattr(settings, 'WHISPER_MODEL_NAME', 'base')
-            whisper_model = whisper.load_model(model_name)
-            logger.info(f"Whisper model loaded successfully!")
-        except Exception as e:
-            logger.error(f"Error loading Whisper model: {e}")
-            raise
-    return whisper_model
 
 class AudioTranscriptionCreateView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [UploadRateThrottle]
+    
+    def check_throttles(self, request):
+        # Shed load before the upload body is parsed or stored, and before
+        # the throttle takes a token the client would lose to the 503
+        retry_after = backlog_retry_after()
+        if retry_after is not None:
+            raise ServiceOverloaded(retry_after)
+        super().check_throttles(request)
     
     def post(self, request):
         try:
@@ -44,14 +52,37 @@ class AudioTranscriptionCreateView(APIView):
             if not audio_file:
                 return Response({'error': 'No audio file provided'}, status=status.HTTP_400_BAD_REQUEST)
             
+            # Parsed from the headers during validation; decoding later refines the duration
+            probe = serializer.audio_info
+            two_pass = serializer.validated_data.get('two_pass')
+            if two_pass is None:
+                two_pass = getattr(settings, 'TWO_PASS_DEFAULT', False)
+            
             transcription = AudioTranscription.objects.create(
                 audio_file=audio_file,
                 original_filename=audio_file.name,
                 file_size=audio_file.size,
-                file_format=os.path.splitext(audio_file.name)[1][1:].lower()
+                file_format=os.path.splitext(audio_file.name)[1][1:].lower(),
+                audio_duration=probe.get('duration'),
+                sample_rate=probe.get('sample_rate'),
+                channels=probe.get('channels'),
+                language=serializer.validated_data.get('language'),
+                priority=submission_priority(request, serializer.validated_data.get('priority')),
+                callback_url=serializer.validated_data.get('callback_url') or '',
+                two_pass=two_pass,
+                decoding_profile=serializer.validated_data.get('decoding_profile') or default_decoding_profile(),
+                client_id=get_client_id(request)
             )
             
-            self.process_transcription(transcription)
+            # In async mode workers pick the job up by priority and client fairness
+            if getattr(settings, 'TRANSCRIPTION_ASYNC', False):
+                result_serializer = AudioTranscriptionSerializer(transcription, context={'request': request})
+                return Response(result_serializer.data, status=status.HTTP_202_ACCEPTED)
+            
+            transcribe(transcription)
+            # Without queue workers, refine the draft on a background thread of this process
+            if transcription.refinement_status == 'pending':
+                refine_in_background()
             
             result_serializer = AudioTranscriptionSerializer(transcription, context={'request': request})
             return Response(result_serializer.data, status=status.HTTP_201_CREATED)
@@ -59,31 +90,8 @@ class AudioTranscriptionCreateView(APIView):
         except Exception as e:
             logger.error(f"Error creating transcription: {e}")
             return Response({'error': 'Internal server error'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-    
-    def process_transcription(self, transcription):
-        try:
-            transcription.status = 'processing'
-            transcription.save()
-            
-            start_time = time.time()
-            model = load_whisper_model()
-            result = model.transcribe(transcription.audio_file.path)
-            
-            processing_time = time.time() - start_time
-            
-            transcription.transcription_text = result['text']
-            transcription.status = 'completed'
-            transcription.processing_time = processing_time
-            transcription.save()
-            
-        except Exception as e:
-            processing_time = time.time() - start_time if 'start_time' in locals() else 0
-            transcription.status = 'failed'
-            transcription.error_message = str(e)
-            transcription.processing_time = processing_time
-            transcription.save()
 
-class AudioTranscriptionListView(generics.ListAPIView):
+class AudioTranscriptionListView(CachedResponseMixin, generics.ListAPIView):
     queryset = AudioTranscription.objects.all()
     serializer_class = AudioTranscriptionListSerializer
     permission_classes = [AllowAny]
@@ -92,29 +100,106 @@ class AudioTranscriptionListView(generics.ListAPIView):
     search_fields = ['original_filename']
     ordering_fields = ['created_at', 'updated_at', 'file_size', 'processing_time']
     ordering = ['-created_at']
+    
+    def get_cache_version(self):
+        return list_version()
+    
+    def list(self, request, *args, **kwargs):
+        # Same output as AudioTranscriptionListSerializer, built from plain tuples
+        queryset = self.filter_queryset(self.get_queryset()).values_list(*LIST_ROW_VALUES)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(list_rows(page))
+        return Response(list_rows(queryset))
 
-class AudioTranscriptionDetailView(generics.RetrieveAPIView):
+class AudioTranscriptionDetailView(CachedResponseMixin, generics.RetrieveAPIView):
     queryset = AudioTranscription.objects.all()
     serializer_class = AudioTranscriptionSerializer
     permission_classes = [AllowAny]
     lookup_field = 'id'
+    
+    def get_cache_version(self):
+        return detail_version(self.kwargs['id'])
+
+@require_http_methods(['GET', 'HEAD'])
+def stream_audio(request, id):
+    """Stream a transcription's audio with Range and conditional GET support"""
+    try:
+        transcription = AudioTranscription.objects.get(id=id)
+        if not transcription.audio_file:
+            return JsonResponse({'error': 'Audio file is no longer stored'}, status=404)
+        return serve_audio(request, transcription.audio_file)
+    except (AudioTranscription.DoesNotExist, FileNotFoundError):
+        return JsonResponse({'error': 'Audio file not found'}, status=404)
+
+@require_http_methods(['GET'])
+def export_transcriptions(request):
+    """Stream every matching transcription as NDJSON, CSV or Parquet in constant memory"""
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'error': f"Unsupported format, use one of: {', '.join(EXPORT_FORMATS)}"}, status=400)
+    if export_format == 'parquet' and not parquet_available():
+        return JsonResponse({'error': 'Parquet export needs pyarrow installed on the server'}, status=400)
+    
+    statuses = [value for value in request.GET.get('status', '').split(',') if value]
+    try:
+        queryset = export_queryset(statuses, request.GET.get('since'), request.GET.get('until'))
+        chunk_size = int(request.GET.get('chunk_size', DEFAULT_CHUNK_SIZE))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    writer, content_type, extension = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(writer(queryset, max(1, min(chunk_size, 10000))), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="transcriptions.{extension}"'
+    return response
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
-def health_check(request):
+def transcription_changes(request):
+    """Rows created or modified since a cursor, optionally long-polling until there are some"""
     try:
-        load_whisper_model()
-        return Response({
-            'status': 'healthy',
-            'message': 'Audio transcription API is running',
-            'whisper_model': 'loaded'
-        })
-    except Exception as e:
+        limit = min(max(int(request.GET.get('limit', 100)), 1), 1000)
+        wait = min(max(float(request.GET.get('wait', 0)), 0), getattr(settings, 'CHANGE_FEED_MAX_WAIT', 30))
+        rows, cursor, has_more = wait_for_changes(request.GET.get('cursor'), limit, wait)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'results': rows, 'next_cursor': cursor, 'has_more': has_more})
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def transcription_stats(request):
+    """Throughput, failure rates and processing-time percentiles, read only from the rollups"""
+    group_by = [value for value in request.GET.get('group_by', '').split(',') if value]
+    try:
+        stats = rollup_stats(
+            request.GET.get('period', 'day'), request.GET.get('since'), request.GET.get('until'), group_by
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(stats)
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def health_check(request):
+    # Checked without importing Whisper: loading a model here would pull torch into every web process
+    if not is_available():
         return Response({
             'status': 'unhealthy',
             'message': 'Audio transcription API has issues',
-            'error': str(e)
+            'error': 'Whisper is not installed'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return Response({
+        'status': 'healthy',
+        'message': 'Audio transcription API is running',
+        'whisper_model': 'loaded' if whisper_models else 'not loaded',
+        'models_loaded': sorted(whisper_models)
+    })
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def queue_status(request):
+    """Queue depth and wait times per priority class"""
+    return Response({'priorities': queue_stats()})
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -127,7 +212,12 @@ def api_info(request):
             'upload': '/api/transcriptions/',
             'list': '/api/transcriptions/list/',
             'detail': '/api/transcriptions/{id}/',
+            'audio': '/api/transcriptions/{id}/audio/',
+            'export': '/api/transcriptions/export/?format=ndjson|csv|parquet&status=&since=&until=',
+            'changes': '/api/transcriptions/changes/?cursor=&limit=&wait=',
+            'stats': '/api/transcriptions/stats/?period=hour|day&since=&until=&group_by=status,file_format,model_name',
             'health': '/api/health/',
+            'queue': '/api/queue/',
             'info': '/api/info/'
         },
         'supported_formats': ['mp3', 'wav', 'm4a', 'flac', 'ogg', 'aac', 'wma'],
@@ -0,0 +1,107 @@
+import logging
+import os
+import sys
+import threading
+from contextlib import contextmanager
+
+from django.utils import timezone
+
+from .models import AudioTranscription
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None where it can't be read"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Without /proc only the peak is available, which never understates the current size
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class MemoryWatchdog:
+    """Sample the worker process's RSS, track each job's high-water mark and
+    decide when the process should be drained and recycled
+    
+    Worker threads share one process, so a job's high-water mark is the
+    process RSS while it ran: with several workers it includes their jobs too.
+    """
+    
+    def __init__(self, drain_event, max_rss_bytes=None, max_jobs=None, interval=1.0):
+        self.drain_event = drain_event
+        self.max_rss_bytes = max_rss_bytes
+        self.max_jobs = max_jobs
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.running = {}
+        self.jobs_done = 0
+        self.peak_rss = 0
+        self.recycle_reason = None
+    
+    def sample(self):
+        rss = current_rss()
+        if rss is None:
+            return None
+        with self.lock:
+            self.peak_rss = max(self.peak_rss, rss)
+            for job in self.running:
+                self.running[job] = max(self.running[job], rss)
+        if self.max_rss_bytes and rss > self.max_rss_bytes:
+            self.recycle(f'RSS {rss / MB:.0f} MB is over the {self.max_rss_bytes / MB:.0f} MB limit')
+        return rss
+    
+    def recycle(self, reason):
+        """Stop the workers claiming jobs; the process restarts once they finish"""
+        with self.lock:
+            if self.recycle_reason is None:
+                self.recycle_reason = reason
+                logger.warning(f"Recycling worker process: {reason}; draining current jobs")
+        self.drain_event.set()
+    
+    @contextmanager
+    def track(self, transcription):
+        """Record the process RSS high-water mark while a job runs on the transcription"""
+        with self.lock:
+            self.running[transcription.pk] = 0
+        self.sample()
+        try:
+            yield
+        finally:
+            self.sample()
+            with self.lock:
+                peak = self.running.pop(transcription.pk)
+                self.jobs_done += 1
+                jobs_done = self.jobs_done
+            if peak:
+                # Keep the largest figure across a draft and its refinement
+                transcription.peak_rss_bytes = max(transcription.peak_rss_bytes or 0, peak)
+                AudioTranscription.objects.filter(pk=transcription.pk).update(
+                    peak_rss_bytes=transcription.peak_rss_bytes, updated_at=timezone.now()
+                )
+            if self.max_jobs and jobs_done >= self.max_jobs:
+                self.recycle(f'{jobs_done} jobs processed, the limit is {self.max_jobs}')
+    
+    def run(self, stop_event):
+        """Sample every `interval` seconds until stop_event is set"""
+        self.sample()
+        while not stop_event.wait(self.interval):
+            self.sample()
+
+
+def restart_process():
+    """Replace this process with a fresh copy of itself, keeping its PID and arguments"""
+    from django.db import connections
+    connections.close_all()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.execv(sys.executable, [sys.executable] + sys.argv)
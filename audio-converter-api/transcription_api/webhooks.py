@@ -0,0 +1,313 @@
+import hashlib
+import hmac
+import http.client
+import ipaddress
+import json
+import logging
+import socket
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.utils import timezone
+
+from .models import WebhookDelivery
+
+logger = logging.getLogger(__name__)
+
+# Deliveries are leased for this long while a POST is in flight
+LEASE_SECONDS = 60
+
+# The placeholder shipped in settings; nothing is signed or sent while it is in use
+DEFAULT_SECRET = 'django-insecure-webhook-secret'
+
+
+class UnsafeCallbackURL(ValueError):
+    """A callback URL the worker must not send requests to"""
+
+
+def webhook_secret_is_default():
+    return getattr(settings, 'WEBHOOK_SECRET', '') in ('', DEFAULT_SECRET)
+
+
+def resolve_callback_address(host, port):
+    """Resolve a callback host to the address to connect to
+    
+    Every address the name resolves to must be publicly routable, so a client
+    can't point the worker at loopback, private networks or cloud metadata
+    endpoints. Hosts in WEBHOOK_ALLOWED_HOSTS skip that check.
+    """
+    try:
+        addresses = [info[4][0] for info in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)]
+    except (socket.gaierror, UnicodeError) as e:
+        raise UnsafeCallbackURL(f'Cannot resolve {host}: {e}')
+    allowed = {name.lower() for name in getattr(settings, 'WEBHOOK_ALLOWED_HOSTS', [])}
+    if host.lower() not in allowed:
+        for address in addresses:
+            ip = ipaddress.ip_address(address.split('%')[0])
+            if ip.version == 6 and ip.ipv4_mapped:
+                ip = ip.ipv4_mapped
+            if not ip.is_global or ip.is_multicast:
+                raise UnsafeCallbackURL(f'{host} resolves to a non-public address ({ip})')
+    return addresses[0]
+
+
+def check_callback_url(url):
+    """Return the address a callback URL may be delivered to; raises UnsafeCallbackURL"""
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise UnsafeCallbackURL('Callback URLs must be absolute http or https URLs')
+    try:
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+    except ValueError as e:
+        raise UnsafeCallbackURL(str(e))
+    return resolve_callback_address(parts.hostname, port)
+
+
+def queue_webhook(transcription, event=None):
+    """Record a completion or failure event for the transcription's callback URL, if it has one
+    
+    The event defaults to transcription.<status>; two-pass jobs also send
+    transcription.refined once the final text replaces the draft.
+    """
+    if not transcription.callback_url or transcription.status not in ('completed', 'failed'):
+        return None
+    event = event or f'transcription.{transcription.status}'
+    try:
+        delivery = WebhookDelivery.objects.create(
+            transcription=transcription,
+            url=transcription.callback_url,
+            event=event,
+            payload={
+                'event': event,
+                'id': transcription.id,
+                'status': transcription.status,
+                'original_filename': transcription.original_filename,
+                'transcription_text': transcription.transcription_text,
+                'language': transcription.language,
+                'model_name': transcription.model_name,
+                'refinement_status': transcription.refinement_status,
+                'audio_duration': transcription.audio_duration,
+                'processing_time': transcription.processing_time,
+                'error_message': transcription.error_message,
+            },
+        )
+    except Exception as e:
+        # A lost notification must not turn a finished transcription into a failure
+        logger.error(f"Could not queue webhook for transcription {transcription.id}: {e}")
+        return None
+    dispatch_in_background()
+    return delivery
+
+
+def sign(body, timestamp, secret=None):
+    """HMAC-SHA256 over "<timestamp>.<body>", so receivers can reject replays of old requests"""
+    secret = secret if secret is not None else getattr(settings, 'WEBHOOK_SECRET', '')
+    message = str(timestamp).encode() + b'.' + body
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+class ConnectionPool:
+    """Keep-alive HTTP(S) connections reused across deliveries, one per host"""
+    
+    def __init__(self, timeout=10):
+        self.timeout = timeout
+        self.connections = {}
+    
+    def post(self, url, body, headers):
+        """POST and return the response status; reconnects once if a pooled connection went stale"""
+        parts = urlsplit(url)
+        # hostname and port, not netloc, which would carry any user:password@ prefix
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        key = (parts.scheme, parts.hostname, port)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        for attempt in range(2):
+            conn = self.connections.get(key)
+            if conn is None:
+                address = check_callback_url(url)
+                connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+                conn = self.connections[key] = connection_class(parts.hostname, port, timeout=self.timeout)
+                # Connect to the address that was checked rather than resolving the name
+                # again, which a rebinding DNS server could answer differently
+                conn._create_connection = lambda target, *args, **kwargs: socket.create_connection(
+                    (address, target[1]), *args, **kwargs
+                )
+            try:
+                conn.request('POST', path, body=body, headers=headers)
+                response = conn.getresponse()
+                # The body must be drained before the connection can be reused
+                response.read()
+                if response.will_close:
+                    self.discard(key)
+                return response.status
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                self.discard(key)
+                if attempt:
+                    raise
+            except Exception:
+                self.discard(key)
+                raise
+    
+    def discard(self, key):
+        conn = self.connections.pop(key, None)
+        if conn is not None:
+            conn.close()
+    
+    def close(self):
+        for key in list(self.connections):
+            self.discard(key)
+
+
+def claim_due(limit):
+    """Lease up to `limit` due deliveries so concurrent dispatchers don't send them twice"""
+    now = timezone.now()
+    ids = list(
+        WebhookDelivery.objects.filter(status='pending', next_attempt_at__lte=now)
+        .order_by('next_attempt_at', 'pk').values_list('pk', flat=True)[:limit]
+    )
+    if not ids:
+        return []
+    lease_until = now + timedelta(seconds=LEASE_SECONDS)
+    claimed = WebhookDelivery.objects.filter(pk__in=ids, status='pending', next_attempt_at__lte=now)
+    claimed.update(next_attempt_at=lease_until)
+    return list(WebhookDelivery.objects.filter(pk__in=ids, next_attempt_at=lease_until).order_by('pk'))
+
+
+def record_result(deliveries, status_code=None, error='', permanent=False):
+    """Log an attempt; failures are retried with backoff unless permanent"""
+    now = timezone.now()
+    delivered = status_code is not None and 200 <= status_code < 300
+    max_attempts = getattr(settings, 'WEBHOOK_MAX_ATTEMPTS', 8)
+    backoff = getattr(settings, 'WEBHOOK_BACKOFF_SECONDS', 10)
+    for delivery in deliveries:
+        delivery.attempts += 1
+        delivery.last_status_code = status_code
+        delivery.last_error = error
+        if delivered:
+            delivery.status = 'delivered'
+            delivery.delivered_at = now
+        elif permanent or delivery.attempts >= max_attempts:
+            delivery.status = 'failed'
+        else:
+            # Exponential backoff, capped at an hour
+            delay = min(backoff * 2 ** (delivery.attempts - 1), 3600)
+            delivery.next_attempt_at = now + timedelta(seconds=delay)
+    WebhookDelivery.objects.bulk_update(
+        deliveries, ['attempts', 'last_status_code', 'last_error', 'status', 'delivered_at', 'next_attempt_at']
+    )
+
+
+def deliver_batch(pool, url, deliveries):
+    """POST several events for one callback URL as {"events": [...]}"""
+    body = json.dumps({'events': [delivery.payload for delivery in deliveries]}, cls=DjangoJSONEncoder).encode()
+    timestamp = int(time.time())
+    headers = {
+        'Content-Type': 'application/json',
+        'User-Agent': 'audio-transcription-webhooks/1.0',
+        'X-Webhook-Timestamp': str(timestamp),
+        'X-Webhook-Signature': f'sha256={sign(body, timestamp)}',
+    }
+    try:
+        status_code = pool.post(url, body, headers)
+    except UnsafeCallbackURL as e:
+        logger.warning(f"Refusing webhook delivery to {url}: {e}")
+        record_result(deliveries, error=str(e), permanent=True)
+        return False
+    except Exception as e:
+        logger.warning(f"Webhook delivery to {url} failed: {e}")
+        record_result(deliveries, error=str(e))
+        return False
+    if not 200 <= status_code < 300:
+        logger.warning(f"Webhook delivery to {url} returned HTTP {status_code}")
+    record_result(deliveries, status_code=status_code)
+    return 200 <= status_code < 300
+
+
+def dispatch_once(pool):
+    """Send every due delivery, batching events that share a URL; return the number of POSTs made"""
+    if webhook_secret_is_default():
+        # Deliveries stay pending until a real secret is configured
+        logger.error("Not sending webhooks: set WEBHOOK_SECRET to a private value first")
+        return 0
+    batch_size = max(getattr(settings, 'WEBHOOK_BATCH_SIZE', 20), 1)
+    by_url = defaultdict(list)
+    for delivery in claim_due(batch_size * 10):
+        by_url[delivery.url].append(delivery)
+    posts = 0
+    for url, deliveries in by_url.items():
+        for start in range(0, len(deliveries), batch_size):
+            deliver_batch(pool, url, deliveries[start:start + batch_size])
+            posts += 1
+    return posts
+
+
+def run_dispatcher(stop_event, poll_interval=1.0, once=False):
+    """Deliver queued webhooks until stop_event is set (or, with once=True, until none are due)"""
+    pool = ConnectionPool(timeout=getattr(settings, 'WEBHOOK_TIMEOUT', 10))
+    try:
+        while not stop_event.is_set():
+            if dispatch_once(pool):
+                continue
+            if once:
+                return
+            stop_event.wait(poll_interval)
+    finally:
+        pool.close()
+        connection.close()
+
+
+# At most one in-process dispatcher, for deployments without process_transcriptions
+dispatcher_lock = threading.Lock()
+dispatcher_thread = None
+# Set when a new event is queued, so the dispatcher doesn't sleep through it
+dispatcher_wakeup = threading.Event()
+
+
+def dispatch_pending(poll_interval=1.0):
+    """Deliver until nothing is pending, sleeping until the next delivery is due in between"""
+    global dispatcher_thread
+    pool = ConnectionPool(timeout=getattr(settings, 'WEBHOOK_TIMEOUT', 10))
+    try:
+        while True:
+            dispatcher_wakeup.clear()
+            if dispatch_once(pool):
+                continue
+            with dispatcher_lock:
+                next_due = WebhookDelivery.objects.filter(status='pending').order_by(
+                    'next_attempt_at'
+                ).values_list('next_attempt_at', flat=True).first()
+                if webhook_secret_is_default() or next_due is None:
+                    dispatcher_thread = None
+                    return
+            # poll_interval is the floor: a due delivery another dispatcher has claimed looks due too
+            dispatcher_wakeup.wait(max((next_due - timezone.now()).total_seconds(), poll_interval))
+    finally:
+        pool.close()
+        connection.close()
+
+
+def dispatch_in_background():
+    """Start the in-process dispatcher thread unless one is already running
+    
+    In synchronous mode nothing else sends webhooks unless dispatch_webhooks
+    runs alongside the server; queue workers run their own dispatcher.
+    """
+    global dispatcher_thread
+    if getattr(settings, 'TRANSCRIPTION_ASYNC', False):
+        return
+    if webhook_secret_is_default():
+        logger.error("Webhooks are queued but not sent: set WEBHOOK_SECRET to a private value first")
+        return
+    with dispatcher_lock:
+        if dispatcher_thread is None or not dispatcher_thread.is_alive():
+            dispatcher_thread = threading.Thread(target=dispatch_pending, name='webhook-dispatcher', daemon=True)
+            dispatcher_thread.start()
+        else:
+            dispatcher_wakeup.set()
@@ -0,0 +1,42 @@
+import logging
+import threading
+from contextlib import nullcontext
+
+from django.db import connection
+
+from .processing import claim_refinement, refine, transcribe
+from .scheduling import claim_next
+
+logger = logging.getLogger(__name__)
+
+
+def run_worker(stop_event, poll_interval=2.0, once=False, watchdog=None):
+    """Claim and process queued transcriptions, then pending refinements, until stop_event is set
+    
+    With once=True the worker exits as soon as the queue is empty. A
+    MemoryWatchdog records each job's memory high-water mark.
+    """
+    def tracked(transcription):
+        return watchdog.track(transcription) if watchdog else nullcontext()
+    
+    name = threading.current_thread().name
+    try:
+        while not stop_event.is_set():
+            transcription = claim_next()
+            if transcription is None:
+                # Two-pass drafts are refined only once no first pass is waiting
+                refinement = claim_refinement()
+                if refinement is not None:
+                    logger.info(f"{name} refining transcription {refinement.id}")
+                    with tracked(refinement):
+                        refine(refinement)
+                    continue
+                if once:
+                    return
+                stop_event.wait(poll_interval)
+                continue
+            logger.info(f"{name} processing transcription {transcription.id} ({transcription.priority})")
+            with tracked(transcription):
+                transcribe(transcription)
+    finally:
+        connection.close()
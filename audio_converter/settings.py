@@ -48,6 +48,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'whisper_app.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'audio_converter.urls'
@@ -80,6 +81,16 @@ DATABASES = {
     }
 }
 
+# Caches back upload rate limits. Local memory is per
+# process; use Redis or Memcached when running several processes, e.g.
+# {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379'}
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'audio-converter',
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -127,8 +138,88 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # Maximum file upload size (100MB)
 DATA_UPLOAD_MAX_MEMORY_SIZE = 100 * 1024 * 1024
 FILE_UPLOAD_MAX_MEMORY_SIZE = 100 * 1024 * 1024
+# Uploads are sniffed and their headers parsed before they are stored; longer audio is rejected
+MAX_AUDIO_DURATION_SECONDS = 4 * 3600  # None disables the limit
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Request profiling (opt-in). Profiles are stored under MEDIA_ROOT/profiles/
+PROFILING_SAMPLE_RATE = 0.0  # Fraction of requests and transcriptions to profile
+PROFILING_TOKEN = ''  # Requests sending this value in the X-Profile header are profiled
+PROFILING_MAX_PROFILES = 200
+PROFILING_MAX_AGE_DAYS = 7
+
+# Storage lifecycle of processed uploads, applied by `manage.py compact_audio`.
+# None disables a tier; failed transcriptions always keep their original upload.
+AUDIO_COMPACT_AFTER_HOURS = None  # Transcode completed uploads older than this
+AUDIO_COMPACT_CODEC = 'opus'  # Options: opus, flac
+AUDIO_DELETE_AFTER_DAYS = None  # Delete audio (keeping the transcript) after this
+
+# File storage. To share uploads between nodes, point "default" at an object
+# store (e.g. django-storages' S3Storage); whisper_app.storage.LocalObjectStorage
+# is a local stand-in that, like S3, exposes no filesystem paths.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Node-local cache for audio streamed out of non-filesystem storage before decoding
+AUDIO_SCRATCH_DIR = BASE_DIR / 'scratch'
+AUDIO_SCRATCH_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 2GB
+
+# Audio playback streaming. With an offload mode the web server sends the bytes:
+# 'x-accel-redirect' (nginx, needs an internal location for the prefix mapped
+# to MEDIA_ROOT) or 'x-sendfile' (Apache mod_xsendfile, lighttpd)
+AUDIO_STREAM_OFFLOAD = None
+AUDIO_STREAM_ACCEL_PREFIX = '/protected-media/'
+AUDIO_STREAM_MAX_AGE = 3600  # Seconds browsers may reuse audio without revalidating
+
+# Whisper model configuration
+WHISPER_MODEL_NAME = 'base'  # Options: tiny, base, small, medium, large
+WHISPER_DETECTION_MODEL_NAME = 'tiny'  # Detects language when no multilingual model is resident
+WHISPER_ENGLISH_MODEL_NAME = None  # e.g. 'base.en' to route English audio to an English-only model
+
+# Two-pass transcription: a quick draft from a small model, refined in the background
+TWO_PASS_DEFAULT = False  # Whether uploads that don't say otherwise get a draft first
+TWO_PASS_DRAFT_MODEL_NAME = 'tiny'  # Ignored when it isn't smaller than the final model
+
+# Decoding profiles trade accuracy for speed; uploads may pick one by name.
+# Built in: fast (greedy, no fallback), balanced (Whisper's defaults) and
+# accurate (beam search, fp32). Entries here override or add to them, e.g.
+# {'fast': {'beam_size': 2}, 'archive': {'beam_size': 10, 'fp16': False}}
+DECODING_PROFILES = {}
+DEFAULT_DECODING_PROFILE = 'balanced'
+
+# Bulk retry of failed transcriptions (admin action and `manage.py retry_transcriptions`)
+RETRY_MAX_WORKERS = 2  # Transcriptions processed concurrently
+RETRY_MAX_ATTEMPTS = 3  # Attempts per transcription before it stays failed
+RETRY_BACKOFF_SECONDS = 5  # Delay after the first failure, doubled on each further one
+
+# Job leases. The thread transcribing an upload holds a lease on it, renewed
+# every third of JOB_LEASE_SECONDS; uploads whose lease lapses (the process
+# crashed or hung) are failed by `manage.py reap_leases` so the bulk retry can
+# take them, and interrupted refinements are requeued
+JOB_LEASE_SECONDS = 120
+
+# Upload admission control: a per-client token bucket answers 429, and once the
+# queued and in-progress audio exceeds the backlog limit new uploads get 503.
+# Both carry Retry-After. Buckets live in the default cache, so use a shared
+# cache (Redis/Memcached) when running several processes
+UPLOAD_RATE_PER_MINUTE = 10  # Sustained uploads per client; None disables rate limiting
+UPLOAD_BURST = 5  # Uploads a client may make back to back
+LOAD_SHED_MAX_BACKLOG_SECONDS = 4 * 3600  # Audio-seconds of backlog; None disables load shedding
+LOAD_SHED_ASSUMED_BYTES_PER_SECOND = 16000  # Duration estimate for files not yet decoded (~128 kbps)
+
+# Transcript compression. With a codec set, saved transcripts longer than the
+# minimum are stored compressed ('zstd' needs the zstandard package) and decoded
+# on load; `manage.py compress_transcripts` converts existing rows. Admin text
+# search only matches transcripts that are still stored as plain text
+TRANSCRIPT_COMPRESSION = None  # None, 'zlib' or 'zstd'
+TRANSCRIPT_COMPRESSION_MIN_LENGTH = 1024  # Shorter transcripts aren't worth compressing
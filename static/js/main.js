@@ -39,6 +39,184 @@ function formatFileSize(bytes) {
     return parseFloat((bytes / Math.pow(k, i)).toFixed(2)) + ' ' + sizes[i];
 }
 
+// Browser-side normalization: Whisper resamples everything to 16 kHz mono anyway,
+// so doing it before upload sends a fraction of the bytes
+const TARGET_SAMPLE_RATE = 16000;
+const OPUS_CONFIG = { codec: 'opus', sampleRate: TARGET_SAMPLE_RATE, numberOfChannels: 1, bitrate: 24000 };
+const OPUS_PRE_SKIP = 312;  // Encoder lookahead, in 48 kHz samples
+
+function canNormalizeAudio() {
+    return typeof OfflineAudioContext !== 'undefined';
+}
+
+// Decode any format the browser understands to 16 kHz mono samples
+async function decodeToMono(file) {
+    const context = new OfflineAudioContext(1, 1, TARGET_SAMPLE_RATE);
+    const buffer = await context.decodeAudioData(await file.arrayBuffer());
+    const samples = new Float32Array(buffer.length);
+    for (let channel = 0; channel < buffer.numberOfChannels; channel++) {
+        const data = buffer.getChannelData(channel);
+        for (let i = 0; i < data.length; i++) {
+            samples[i] += data[i] / buffer.numberOfChannels;
+        }
+    }
+    return samples;
+}
+
+// 16-bit PCM WAV; the server reads these without running ffmpeg
+function encodeWav(samples) {
+    const view = new DataView(new ArrayBuffer(44 + samples.length * 2));
+    const writeString = (offset, text) => {
+        for (let i = 0; i < text.length; i++) view.setUint8(offset + i, text.charCodeAt(i));
+    };
+    writeString(0, 'RIFF');
+    view.setUint32(4, 36 + samples.length * 2, true);
+    writeString(8, 'WAVE');
+    writeString(12, 'fmt ');
+    view.setUint32(16, 16, true);
+    view.setUint16(20, 1, true);  // PCM
+    view.setUint16(22, 1, true);  // Mono
+    view.setUint32(24, TARGET_SAMPLE_RATE, true);
+    view.setUint32(28, TARGET_SAMPLE_RATE * 2, true);
+    view.setUint16(32, 2, true);
+    view.setUint16(34, 16, true);
+    writeString(36, 'data');
+    view.setUint32(40, samples.length * 2, true);
+    for (let i = 0; i < samples.length; i++) {
+        const sample = Math.max(-1, Math.min(1, samples[i]));
+        view.setInt16(44 + i * 2, sample < 0 ? sample * 0x8000 : sample * 0x7fff, true);
+    }
+    return new Blob([view], { type: 'audio/wav' });
+}
+
+const OGG_CRC_TABLE = (() => {
+    const table = new Uint32Array(256);
+    for (let i = 0; i < 256; i++) {
+        let r = i << 24;
+        for (let j = 0; j < 8; j++) {
+            r = r & 0x80000000 ? (r << 1) ^ 0x04c11db7 : r << 1;
+        }
+        table[i] = r >>> 0;
+    }
+    return table;
+})();
+
+function oggPage(packets, granule, sequence, serial, flags) {
+    const lacing = [];
+    for (const packet of packets) {
+        let remaining = packet.length;
+        while (remaining >= 255) {
+            lacing.push(255);
+            remaining -= 255;
+        }
+        lacing.push(remaining);
+    }
+    const bodyLength = packets.reduce((total, packet) => total + packet.length, 0);
+    const page = new Uint8Array(27 + lacing.length + bodyLength);
+    const view = new DataView(page.buffer);
+    page.set([0x4f, 0x67, 0x67, 0x53]);  // "OggS"
+    view.setUint8(5, flags);
+    view.setBigInt64(6, BigInt(granule), true);
+    view.setUint32(14, serial, true);
+    view.setUint32(18, sequence, true);
+    view.setUint8(26, lacing.length);
+    page.set(lacing, 27);
+    let offset = 27 + lacing.length;
+    for (const packet of packets) {
+        page.set(packet, offset);
+        offset += packet.length;
+    }
+    let crc = 0;
+    for (const byte of page) {
+        crc = ((crc << 8) ^ OGG_CRC_TABLE[((crc >>> 24) ^ byte) & 0xff]) >>> 0;
+    }
+    view.setUint32(22, crc, true);
+    return page;
+}
+
+async function canEncodeOpus() {
+    if (typeof AudioEncoder === 'undefined') return false;
+    try {
+        return (await AudioEncoder.isConfigSupported(OPUS_CONFIG)).supported;
+    } catch (err) {
+        return false;
+    }
+}
+
+// Opus in an Ogg container via WebCodecs, about 3 KB per second of speech
+async function encodeOpus(samples) {
+    const packets = [];
+    let encodeError = null;
+    const encoder = new AudioEncoder({
+        output: (chunk) => {
+            const data = new Uint8Array(chunk.byteLength);
+            chunk.copyTo(data);
+            packets.push(data);
+        },
+        error: (err) => { encodeError = err; }
+    });
+    encoder.configure(OPUS_CONFIG);
+    for (let start = 0; start < samples.length; start += TARGET_SAMPLE_RATE) {
+        const frame = samples.subarray(start, start + TARGET_SAMPLE_RATE);
+        const audioData = new AudioData({
+            format: 'f32-planar',
+            sampleRate: TARGET_SAMPLE_RATE,
+            numberOfChannels: 1,
+            numberOfFrames: frame.length,
+            timestamp: Math.round(start * 1e6 / TARGET_SAMPLE_RATE),
+            data: frame
+        });
+        encoder.encode(audioData);
+        audioData.close();
+    }
+    await encoder.flush();
+    encoder.close();
+    if (encodeError) throw encodeError;
+    
+    const vendor = new TextEncoder().encode('audio-converter');
+    const head = new Uint8Array(19);
+    const headView = new DataView(head.buffer);
+    head.set(new TextEncoder().encode('OpusHead'));
+    headView.setUint8(8, 1);  // Version
+    headView.setUint8(9, 1);  // Channels
+    headView.setUint16(10, OPUS_PRE_SKIP, true);
+    headView.setUint32(12, TARGET_SAMPLE_RATE, true);
+    const tags = new Uint8Array(16 + vendor.length);
+    const tagsView = new DataView(tags.buffer);
+    tags.set(new TextEncoder().encode('OpusTags'));
+    tagsView.setUint32(8, vendor.length, true);
+    tags.set(vendor, 12);
+    
+    // Granule positions count 48 kHz samples whatever the input rate was
+    const serial = Math.floor(Math.random() * 0xffffffff);
+    const samplesPerPacket = 48000 * 0.02;
+    const totalGranule = OPUS_PRE_SKIP + Math.round(samples.length * 48000 / TARGET_SAMPLE_RATE);
+    const pages = [oggPage([head], 0, 0, serial, 0x02), oggPage([tags], 0, 1, serial, 0)];
+    for (let start = 0; start < packets.length; start += 50) {
+        const group = packets.slice(start, start + 50);
+        const last = start + 50 >= packets.length;
+        const granule = last ? totalGranule : OPUS_PRE_SKIP + (start + group.length) * samplesPerPacket;
+        pages.push(oggPage(group, granule, pages.length, serial, last ? 0x04 : 0));
+    }
+    return new Blob(pages, { type: 'audio/ogg' });
+}
+
+// Returns a smaller 16 kHz mono File, or the original when that isn't smaller or can't be done
+async function normalizeAudio(file) {
+    if (!canNormalizeAudio()) return file;
+    try {
+        const samples = await decodeToMono(file);
+        const opus = await canEncodeOpus();
+        const blob = opus ? await encodeOpus(samples) : encodeWav(samples);
+        if (blob.size >= file.size) return file;
+        const stem = file.name.replace(/\.[^.]+$/, '');
+        return new File([blob], `${stem}.${opus ? 'ogg' : 'wav'}`, { type: blob.type });
+    } catch (err) {
+        console.warn('Uploading the original file; could not normalize it in the browser:', err);
+        return file;
+    }
+}
+
 // Mobile menu toggle (if needed)
 function initMobileMenu() {
     const mobileMenuToggle = document.querySelector('.mobile-menu-toggle');
@@ -63,5 +241,7 @@ document.addEventListener('DOMContentLoaded', function() {
 window.AudioConverterUtils = {
     showMessage,
     copyToClipboard,
-    formatFileSize
+    formatFileSize,
+    canNormalizeAudio,
+    normalizeAudio
 };
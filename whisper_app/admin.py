@@ -1,6 +1,9 @@
-from django.contrib import admin
+from django.conf import settings
+from django.contrib import admin, messages
 from django.utils.html import format_html
-from .models import AudioTranscription
+from .models import AudioTranscription, RequestProfile, RetryBatch
+from .retry import process_batch_in_background, requeue_failed
+from .timing import build_slowness_report
 
 @admin.register(AudioTranscription)
 class AudioTranscriptionAdmin(admin.ModelAdmin):
@@ -9,13 +12,20 @@ class AudioTranscriptionAdmin(admin.ModelAdmin):
         'file_format', 
         'file_size_display', 
         'status', 
+        'audio_duration_display',
         'processing_time_display',
+        'real_time_factor',
         'created_at'
     ]
     
     list_filter = [
         'status', 
         'file_format', 
+        'storage_tier',
+        'language',
+        'model_name',
+        'decoding_profile',
+        'refinement_status',
         'created_at'
     ]
     
@@ -28,19 +38,46 @@ class AudioTranscriptionAdmin(admin.ModelAdmin):
         'created_at', 
         'updated_at', 
         'processing_time', 
-        'file_size'
+        'file_size',
+        'audio_duration',
+        'sample_rate',
+        'channels',
+        'real_time_factor',
+        'stage_timings',
+        'attempts',
+        'refinement_attempts',
+        'retry_batch',
+        'draft_text',
+        'draft_model_name',
+        'lease_owner',
+        'lease_expires_at',
+        'heartbeat_at'
     ]
     
     fieldsets = (
         ('File Information', {
-            'fields': ('audio_file', 'original_filename', 'file_format', 'file_size')
+            'fields': ('audio_file', 'original_filename', 'file_format', 'file_size', 'storage_tier')
         }),
         ('Transcription Results', {
-            'fields': ('transcription_text', 'confidence_score'),
+            'fields': (
+                'transcription_text', 'confidence_score', 'language', 'language_probability', 'model_name',
+                'decoding_profile'
+            ),
+            'classes': ('collapse',)
+        }),
+        ('Two-pass Revisions', {
+            'fields': ('two_pass', 'refinement_status', 'refinement_attempts', 'draft_model_name', 'draft_text'),
             'classes': ('collapse',)
         }),
         ('Processing Information', {
-            'fields': ('status', 'processing_time', 'error_message'),
+            'fields': (
+                'status', 'processing_time', 'error_message', 'attempts', 'retry_batch',
+                'lease_owner', 'lease_expires_at', 'heartbeat_at'
+            ),
+            'classes': ('collapse',)
+        }),
+        ('Performance', {
+            'fields': ('audio_duration', 'sample_rate', 'channels', 'real_time_factor', 'stage_timings'),
             'classes': ('collapse',)
         }),
         ('Metadata', {
@@ -57,6 +94,26 @@ class AudioTranscriptionAdmin(admin.ModelAdmin):
         return obj.get_processing_time_display()
     processing_time_display.short_description = 'Processing Time'
     
+    def audio_duration_display(self, obj):
+        return obj.get_audio_duration_display()
+    audio_duration_display.short_description = 'Duration'
+    
+    def get_search_fields(self, request):
+        fields = super().get_search_fields(request)
+        if getattr(settings, 'TRANSCRIPT_COMPRESSION', None):
+            # Compressed rows store base64, which a text search would match at random
+            return [field for field in fields if field != 'transcription_text']
+        return fields
+    
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context=extra_context)
+        # Build the report from the filtered changelist so it follows the sidebar filters
+        changelist = getattr(response, 'context_data', {}).get('cl')
+        if changelist is not None:
+            response.context_data['slowness_report'] = build_slowness_report(changelist.queryset)
+            response.context_data['active_retry_batches'] = RetryBatch.objects.filter(finished_at__isnull=True)
+        return response
+    
     def get_queryset(self, request):
         return super().get_queryset(request).select_related()
     
@@ -67,17 +124,16 @@ class AudioTranscriptionAdmin(admin.ModelAdmin):
     actions = ['retry_failed_transcriptions']
     
     def retry_failed_transcriptions(self, request, queryset):
-        failed_transcriptions = queryset.filter(status='failed')
-        count = failed_transcriptions.count()
-        
-        for transcription in failed_transcriptions:
-            transcription.status = 'pending'
-            transcription.error_message = ''
-            transcription.save()
+        batch = requeue_failed(queryset, requested_by=f'admin:{request.user}')
+        if batch is None:
+            self.message_user(request, 'No failed transcriptions selected.', level=messages.WARNING)
+            return
         
+        process_batch_in_background(batch)
         self.message_user(
             request, 
-            f'Successfully queued {count} failed transcriptions for retry.'
+            f'Successfully queued {batch.total} failed transcriptions for retry. '
+            f'Progress is shown above the list and under Retry Batches.'
         )
     
     retry_failed_transcriptions.short_description = 'Retry failed transcriptions'
@@ -86,3 +142,66 @@ class AudioTranscriptionAdmin(admin.ModelAdmin):
         css = {
             'all': ('admin/css/whisper_admin.css',)
         }
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = [
+        'created_at',
+        'kind',
+        'label',
+        'method',
+        'status_code',
+        'trigger',
+        'duration',
+        'transcription'
+    ]
+    
+    list_filter = [
+        'kind',
+        'trigger',
+        'created_at'
+    ]
+    
+    search_fields = [
+        'label'
+    ]
+    
+    readonly_fields = [
+        'kind', 'label', 'method', 'status_code', 'trigger', 'duration',
+        'profile_file', 'transcription', 'created_at', 'summary_display'
+    ]
+    
+    exclude = ['summary']
+    
+    def summary_display(self, obj):
+        return format_html('<pre>{}</pre>', obj.summary)
+    summary_display.short_description = 'Summary'
+    
+    def has_add_permission(self, request):
+        # Profiles are only created by the profiling middleware
+        return False
+
+
+@admin.register(RetryBatch)
+class RetryBatchAdmin(admin.ModelAdmin):
+    list_display = [
+        'id',
+        'requested_by',
+        'total',
+        'progress_display',
+        'created_at',
+        'finished_at'
+    ]
+    
+    readonly_fields = [
+        'requested_by', 'total', 'progress_display', 'created_at', 'finished_at'
+    ]
+    
+    def progress_display(self, obj):
+        return obj.get_progress_display()
+    progress_display.short_description = 'Progress'
+    
+    def has_add_permission(self, request):
+        # Batches are created by the retry action and management command
+        return False
@@ -0,0 +1,73 @@
+"""The only module that touches Whisper (and, through it, torch)
+
+Nothing here imports the ML stack at module level: the first call that needs
+it does, so web-only processes and management commands never pay for it.
+"""
+import importlib.util
+import logging
+import wave
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Whisper decodes everything to 16 kHz mono; kept here so callers needn't import whisper for it
+SAMPLE_RATE = 16000
+
+# Loaded Whisper models by name (each is loaded once and reused)
+whisper_models = {}
+
+
+def import_whisper():
+    import whisper
+    return whisper
+
+
+def is_available():
+    """Whether Whisper is installed, checked without importing it"""
+    return importlib.util.find_spec('whisper') is not None
+
+
+def load_whisper_model(model_name=None):
+    """Load a Whisper model - this can take some time on first run"""
+    model_name = model_name or getattr(settings, 'WHISPER_MODEL_NAME', 'base')
+    if model_name not in whisper_models:
+        logger.info(f"Loading Whisper model {model_name}...")
+        whisper_models[model_name] = import_whisper().load_model(model_name)
+        logger.info(f"Whisper model {model_name} loaded successfully!")
+    return whisper_models[model_name]
+
+
+def load_audio(path):
+    """Decode an audio file to 16 kHz mono float samples; ffmpeg is skipped when it already is"""
+    samples = read_normalized_wav(path)
+    if samples is not None:
+        return samples
+    return import_whisper().load_audio(path)
+
+
+def read_normalized_wav(path):
+    """Samples of a 16-bit PCM WAV that is already 16 kHz mono, or None for anything else
+    
+    Pre-normalized uploads skip the ffmpeg subprocess this way and come out as
+    the same samples ffmpeg would have produced.
+    """
+    try:
+        with wave.open(str(path), 'rb') as wav:
+            if (wav.getframerate(), wav.getnchannels(), wav.getsampwidth()) != (SAMPLE_RATE, 1, 2):
+                return None
+            frames = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError):
+        return None
+    import numpy as np
+    return np.frombuffer(frames, np.int16).astype(np.float32) / 32768.0
+
+
+def detect_language(model, audio):
+    """Detect the spoken language from the first 30 seconds of decoded audio"""
+    whisper = import_whisper()
+    segment = whisper.pad_or_trim(audio)
+    mel = whisper.log_mel_spectrogram(segment, n_mels=model.dims.n_mels).to(model.device)
+    _, probabilities = model.detect_language(mel)
+    language = max(probabilities, key=probabilities.get)
+    return language, probabilities[language]
@@ -0,0 +1,71 @@
+from django.conf import settings
+
+# Whisper's language codes and names, as in whisper.tokenizer. Copied rather than
+# imported: importing whisper pulls torch into web processes that only
+# validate upload hints
+LANGUAGES = {
+    'en': 'english', 'zh': 'chinese', 'de': 'german', 'es': 'spanish', 'ru': 'russian', 'ko': 'korean',
+    'fr': 'french', 'ja': 'japanese', 'pt': 'portuguese', 'tr': 'turkish', 'pl': 'polish', 'ca': 'catalan',
+    'nl': 'dutch', 'ar': 'arabic', 'sv': 'swedish', 'it': 'italian', 'id': 'indonesian', 'hi': 'hindi',
+    'fi': 'finnish', 'vi': 'vietnamese', 'he': 'hebrew', 'uk': 'ukrainian', 'el': 'greek', 'ms': 'malay',
+    'cs': 'czech', 'ro': 'romanian', 'da': 'danish', 'hu': 'hungarian', 'ta': 'tamil', 'no': 'norwegian',
+    'th': 'thai', 'ur': 'urdu', 'hr': 'croatian', 'bg': 'bulgarian', 'lt': 'lithuanian', 'la': 'latin',
+    'mi': 'maori', 'ml': 'malayalam', 'cy': 'welsh', 'sk': 'slovak', 'te': 'telugu', 'fa': 'persian',
+    'lv': 'latvian', 'bn': 'bengali', 'sr': 'serbian', 'az': 'azerbaijani', 'sl': 'slovenian', 'kn': 'kannada',
+    'et': 'estonian', 'mk': 'macedonian', 'br': 'breton', 'eu': 'basque', 'is': 'icelandic', 'hy': 'armenian',
+    'ne': 'nepali', 'mn': 'mongolian', 'bs': 'bosnian', 'kk': 'kazakh', 'sq': 'albanian', 'sw': 'swahili',
+    'gl': 'galician', 'mr': 'marathi', 'pa': 'punjabi', 'si': 'sinhala', 'km': 'khmer', 'sn': 'shona',
+    'yo': 'yoruba', 'so': 'somali', 'af': 'afrikaans', 'oc': 'occitan', 'ka': 'georgian', 'be': 'belarusian',
+    'tg': 'tajik', 'sd': 'sindhi', 'gu': 'gujarati', 'am': 'amharic', 'yi': 'yiddish', 'lo': 'lao',
+    'uz': 'uzbek', 'fo': 'faroese', 'ht': 'haitian creole', 'ps': 'pashto', 'tk': 'turkmen', 'nn': 'nynorsk',
+    'mt': 'maltese', 'sa': 'sanskrit', 'lb': 'luxembourgish', 'my': 'myanmar', 'bo': 'tibetan', 'tl': 'tagalog',
+    'mg': 'malagasy', 'as': 'assamese', 'tt': 'tatar', 'haw': 'hawaiian', 'ln': 'lingala', 'ha': 'hausa',
+    'ba': 'bashkir', 'jw': 'javanese', 'su': 'sundanese', 'yue': 'cantonese',
+}
+
+# English names and the aliases Whisper accepts -> language code
+TO_LANGUAGE_CODE = {
+    **{name: code for code, name in LANGUAGES.items()},
+    'burmese': 'my', 'valencian': 'ca', 'flemish': 'nl', 'haitian': 'ht', 'letzeburgesch': 'lb', 'pushto': 'ps',
+    'panjabi': 'pa', 'moldavian': 'ro', 'moldovan': 'ro', 'sinhalese': 'si', 'castilian': 'es', 'mandarin': 'zh',
+}
+
+# Whisper checkpoints from smallest to largest; size variants like
+# "large-v3" or "base.en" rank with their family
+MODEL_SIZES = ['tiny', 'base', 'small', 'medium', 'turbo', 'large']
+
+
+def model_size_rank(model_name):
+    family = model_name.split('.')[0].split('-')[0]
+    return MODEL_SIZES.index(family) if family in MODEL_SIZES else len(MODEL_SIZES)
+
+
+def normalize_language(value):
+    """Return the Whisper language code for a code or English language name, or None"""
+    value = value.strip().lower()
+    value = TO_LANGUAGE_CODE.get(value, value)
+    return value if value in LANGUAGES else None
+
+
+def detection_model_name(resident_model_names):
+    """Smallest multilingual model already in memory, else WHISPER_DETECTION_MODEL_NAME"""
+    multilingual = [name for name in resident_model_names if not name.endswith('.en')]
+    if multilingual:
+        return min(multilingual, key=model_size_rank)
+    return getattr(settings, 'WHISPER_DETECTION_MODEL_NAME', 'tiny')
+
+
+def transcription_model_name(language):
+    """Route English audio to WHISPER_ENGLISH_MODEL_NAME when one is configured"""
+    english_model = getattr(settings, 'WHISPER_ENGLISH_MODEL_NAME', None)
+    if language == 'en' and english_model:
+        return english_model
+    return getattr(settings, 'WHISPER_MODEL_NAME', 'base')
+
+
+def draft_model_name(final_model_name):
+    """Model for a two-pass draft, or None when it wouldn't be quicker than the final model"""
+    draft = getattr(settings, 'TWO_PASS_DRAFT_MODEL_NAME', 'tiny')
+    if not draft or model_size_rank(draft) >= model_size_rank(final_model_name):
+        return None
+    return draft
@@ -0,0 +1,163 @@
+"""Time-limited claims on transcriptions, so work lost with a dead worker is reclaimed
+
+Whoever processes a transcription holds a lease on it: claiming sets the
+owner and expiry in the same conditional UPDATE, a heartbeat thread extends
+it while the job runs, and results are only saved while it is still held.
+A process that dies mid-request stops heartbeating; once its lease expires
+the reaper marks the upload failed, so the bulk retry can pick it up, and
+requeues interrupted refinements. If the old process was merely stalled its
+late result is discarded instead of overwriting the newer one.
+"""
+import logging
+import os
+import socket
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import AudioTranscription
+
+logger = logging.getLogger(__name__)
+
+
+def lease_seconds():
+    return getattr(settings, 'JOB_LEASE_SECONDS', 120)
+
+
+def lease_owner():
+    """Identity of the calling thread, unique across hosts and processes"""
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+def lease_fields(now=None):
+    """Field values that put a lease for the calling thread on a row"""
+    now = now or timezone.now()
+    return {
+        'lease_owner': lease_owner(),
+        'lease_expires_at': now + timedelta(seconds=lease_seconds()),
+        'heartbeat_at': now,
+    }
+
+
+class JobLease:
+    """The calling thread's lease on one transcription, renewed by a heartbeat thread"""
+    
+    def __init__(self, transcription):
+        self.transcription = transcription
+        self.owner = lease_owner()
+        self.expires_at = None
+        self.lost = False
+        self.stopped = threading.Event()
+        self.heartbeat = None
+    
+    def acquire(self):
+        """Take the lease unless another live worker holds it; starts the heartbeat"""
+        now = timezone.now()
+        fields = lease_fields(now)
+        acquired = AudioTranscription.objects.filter(
+            Q(lease_owner='') | Q(lease_owner=self.owner) | Q(lease_expires_at__lt=now),
+            pk=self.transcription.pk,
+        ).update(**fields)
+        if not acquired:
+            return False
+        self.expires_at = fields['lease_expires_at']
+        self.heartbeat = threading.Thread(
+            target=self.beat, name=f'lease-{self.transcription.pk}', daemon=True
+        )
+        self.heartbeat.start()
+        return True
+    
+    def beat(self):
+        try:
+            while not self.stopped.wait(lease_seconds() / 3):
+                if not self.renew():
+                    logger.warning(f"Lost the lease on transcription {self.transcription.pk}")
+                    self.lost = True
+                    return
+        finally:
+            connection.close()
+    
+    def renew(self):
+        now = timezone.now()
+        fields = lease_fields(now)
+        renewed = AudioTranscription.objects.filter(pk=self.transcription.pk, lease_owner=self.owner).update(
+            lease_expires_at=fields['lease_expires_at'], heartbeat_at=now
+        )
+        if renewed:
+            self.expires_at = fields['lease_expires_at']
+        return bool(renewed)
+    
+    def save(self, **kwargs):
+        """Save the transcription if the lease is still held; return whether it was saved"""
+        transcription = self.transcription
+        with transaction.atomic():
+            # The row lock keeps the reaper from taking the lease between the check and the save
+            held = AudioTranscription.objects.select_for_update().filter(
+                pk=transcription.pk, lease_owner=self.owner
+            ).exists()
+            if held:
+                # The instance still carries the expiry from when it was loaded
+                transcription.lease_owner = self.owner
+                transcription.lease_expires_at = self.expires_at
+                transcription.heartbeat_at = timezone.now()
+                transcription.save(**kwargs)
+        if not held:
+            self.lost = True
+            logger.warning(f"Discarding the result for transcription {transcription.pk}: its lease was reclaimed")
+        return held
+    
+    def release(self):
+        self.stopped.set()
+        if self.heartbeat is not None:
+            self.heartbeat.join()
+        AudioTranscription.objects.filter(pk=self.transcription.pk, lease_owner=self.owner).update(
+            lease_owner='', lease_expires_at=None
+        )
+        self.transcription.lease_owner = ''
+        self.transcription.lease_expires_at = None
+
+
+def reap_expired_leases(now=None):
+    """Fail uploads whose process stopped heartbeating and requeue their refinements
+    
+    There is no queue to put an upload back on, so it is failed like any other
+    error and left to the bulk retry. Returns (requeued, failed), where failed
+    counts uploads and refinements together.
+    """
+    now = now or timezone.now()
+    max_attempts = getattr(settings, 'RETRY_MAX_ATTEMPTS', 3)
+    expired = AudioTranscription.objects.filter(lease_expires_at__lt=now)
+    released = {'lease_owner': '', 'lease_expires_at': None, 'updated_at': now}
+    
+    failed = expired.filter(status='processing').update(
+        status='failed', error_message='Interrupted: the process transcribing this upload stopped responding',
+        **released
+    )
+    # A lost refinement leaves the draft in place, so it is never worse than failed
+    failed += expired.filter(
+        refinement_status='processing', refinement_attempts__gte=max_attempts
+    ).update(refinement_status='failed', **released)
+    requeued = expired.filter(refinement_status='processing').update(refinement_status='pending', **released)
+    
+    if requeued or failed:
+        logger.warning(
+            f"Reclaimed expired leases: {requeued} refinements requeued, {failed} uploads or refinements failed"
+        )
+    return requeued, failed
+
+
+def run_reaper(stop_event, interval=None):
+    """Reap expired leases every `interval` seconds until stop_event is set"""
+    interval = interval or lease_seconds() / 2
+    try:
+        while not stop_event.wait(interval):
+            try:
+                reap_expired_leases()
+            except Exception as e:
+                logger.error(f"Lease reaper failed: {e}")
+    finally:
+        connection.close()
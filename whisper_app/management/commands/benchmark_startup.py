@@ -0,0 +1,80 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Runs in a fresh interpreter: boot Django like a web process and validate an
+# upload with a language hint, then optionally load the ML stack
+CHILD = '''
+import json, resource, struct, sys
+import django
+django.setup()
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import get_resolver
+from {app}.language import normalize_language
+from {app}.probe import validate_audio
+get_resolver().url_patterns
+samples = bytes(32000)
+wav = (
+    b'RIFF' + struct.pack('<I', 36 + len(samples)) + b'WAVEfmt '
+    + struct.pack('<IHHIIHH', 16, 1, 1, 16000, 32000, 2, 16) + b'data' + struct.pack('<I', len(samples)) + samples
+)
+normalize_language('English')
+validate_audio(SimpleUploadedFile('probe.wav', wav), '.wav')
+error = None
+if sys.argv[1] == 'transcription':
+    from {app}.engine import import_whisper, load_whisper_model
+    try:
+        import_whisper()
+        if sys.argv[2]:
+            load_whisper_model(sys.argv[2])
+    except Exception as e:
+        error = str(e)
+print(json.dumps({{
+    'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'torch_loaded': 'torch' in sys.modules or 'whisper' in sys.modules,
+    'modules': len(sys.modules),
+    'error': error,
+}}))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Measure start-up time and memory of a web-only process against a transcription process'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3, help='Fresh processes per mode; the median counts')
+        parser.add_argument('--model', default='', help='Also load this Whisper model in the transcription process')
+    
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE, PYTHONPATH=os.pathsep.join(sys.path))
+        code = CHILD.format(app=__name__.split('.')[0])
+        
+        self.stdout.write(f"{'process':<15}{'seconds':>10}{'max RSS (MB)':>15}{'modules':>10}  whisper/torch imported")
+        for mode in ('web', 'transcription'):
+            runs = []
+            for _ in range(max(options['repeat'], 1)):
+                started = time.perf_counter()
+                completed = subprocess.run(
+                    [sys.executable, '-c', code, mode, options['model']],
+                    cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+                )
+                elapsed = time.perf_counter() - started
+                if completed.returncode:
+                    self.stderr.write(completed.stderr)
+                    return
+                runs.append((elapsed, json.loads(completed.stdout.strip().splitlines()[-1])))
+            
+            seconds = statistics.median(elapsed for elapsed, _ in runs)
+            result = runs[-1][1]
+            self.stdout.write(
+                f"{mode:<15}{seconds:>10.2f}{result['max_rss_kb'] / 1024:>15.1f}{result['modules']:>10}"
+                f"  {'yes' if result['torch_loaded'] else 'no'}"
+            )
+            if result['error']:
+                self.stdout.write(self.style.WARNING(f"  Whisper could not be loaded: {result['error']}"))
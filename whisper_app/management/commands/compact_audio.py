@@ -0,0 +1,72 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...lifecycle import (
+    CODECS,
+    ThroughputLimiter,
+    compact_transcription,
+    compaction_candidates,
+    delete_transcription_audio,
+    deletion_candidates,
+    iterate_batches,
+)
+
+
+class Command(BaseCommand):
+    help = 'Transcode or delete processed uploads according to the audio retention policy'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--codec', choices=sorted(CODECS), help='Override AUDIO_COMPACT_CODEC')
+        parser.add_argument('--batch-size', type=int, default=50, help='Rows fetched per query')
+        parser.add_argument('--limit', type=int, help='Stop after this many files')
+        parser.add_argument('--max-mb-per-second', type=float, help='Throttle transcoding input throughput')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be done')
+    
+    def handle(self, *args, **options):
+        codec = options['codec'] or getattr(settings, 'AUDIO_COMPACT_CODEC', 'opus')
+        max_mb = options['max_mb_per_second']
+        self.limiter = ThroughputLimiter(max_mb * 1024 * 1024 if max_mb else None)
+        self.options = options
+        self.remaining = options['limit']
+        
+        # Delete first so nothing due for removal is transcoded on the way out
+        deleted, deleted_bytes = self.run_stage(deletion_candidates(), 'delete', delete_transcription_audio)
+        # A dry run deletes nothing, so leave out what the real run would have deleted by now
+        compacted, compacted_bytes = self.run_stage(
+            compaction_candidates().exclude(pk__in=deletion_candidates().values('pk')), f'compact to {codec}',
+            lambda transcription: compact_transcription(transcription, codec)
+        )
+        
+        if options['dry_run']:
+            self.stdout.write(f"Dry run: would delete {deleted} and compact {compacted} files")
+            return
+        reclaimed = (deleted_bytes + compacted_bytes) / (1024 * 1024)
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} and compacted {compacted} files, reclaiming {reclaimed:.1f} MB"
+        ))
+    
+    def run_stage(self, queryset, action, handler):
+        processed = 0
+        reclaimed = 0
+        for batch in iterate_batches(queryset, self.options['batch_size']):
+            for transcription in batch:
+                if self.remaining is not None:
+                    if self.remaining <= 0:
+                        return processed, reclaimed
+                    self.remaining -= 1
+                if self.options['dry_run']:
+                    self.stdout.write(f"Would {action}: {transcription.audio_file.name}")
+                    processed += 1
+                    continue
+                try:
+                    self.limiter.consume(transcription.file_size)
+                    reclaimed += handler(transcription)
+                    processed += 1
+                except Exception as e:
+                    self.stderr.write(f"Failed to {action} {transcription.audio_file.name}: {e}")
+            if self.options['pause']:
+                time.sleep(self.options['pause'])
+        return processed, reclaimed
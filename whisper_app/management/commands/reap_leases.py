@@ -0,0 +1,28 @@
+import threading
+
+from django.core.management.base import BaseCommand
+
+from ...leases import lease_seconds, reap_expired_leases, run_reaper
+
+
+class Command(BaseCommand):
+    help = 'Fail uploads whose process stopped heartbeating and requeue their refinements'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Keep running, reaping every this many seconds (default: reap once and exit)'
+        )
+    
+    def handle(self, *args, **options):
+        if not options['interval']:
+            requeued, failed = reap_expired_leases()
+            self.stdout.write(self.style.SUCCESS(f"{requeued} refinements requeued, {failed} uploads or refinements failed"))
+            return
+        self.stdout.write(f"Reaping leases older than {lease_seconds()}s every {options['interval']}s")
+        stop_event = threading.Event()
+        try:
+            run_reaper(stop_event, options['interval'])
+        except KeyboardInterrupt:
+            stop_event.set()
+        self.stdout.write(self.style.SUCCESS('Lease reaper stopped'))
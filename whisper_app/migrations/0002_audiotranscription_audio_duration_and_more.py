@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whisper_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='audio_duration',
+            field=models.FloatField(blank=True, help_text='Audio duration in seconds', null=True),
+        ),
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='real_time_factor',
+            field=models.FloatField(blank=True, help_text='Processing time divided by audio duration', null=True),
+        ),
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='stage_timings',
+            field=models.JSONField(blank=True, default=dict, help_text='Duration of each processing stage in seconds'),
+        ),
+    ]
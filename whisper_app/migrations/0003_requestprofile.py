@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:35
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whisper_app', '0002_audiotranscription_audio_duration_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('request', 'Request'), ('transcription', 'Transcription')], max_length=20)),
+                ('label', models.CharField(help_text='Request path or transcription being profiled', max_length=255)),
+                ('method', models.CharField(blank=True, max_length=10)),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('trigger', models.CharField(choices=[('sampled', 'Sampled'), ('header', 'Header')], max_length=20)),
+                ('duration', models.FloatField(help_text='Wall-clock time in seconds')),
+                ('profile_file', models.FileField(upload_to='profiles/')),
+                ('summary', models.TextField(blank=True, help_text='Top functions by cumulative time')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('transcription', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='profiles', to='whisper_app.audiotranscription')),
+            ],
+            options={
+                'verbose_name': 'Request Profile',
+                'verbose_name_plural': 'Request Profiles',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whisper_app', '0003_requestprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='storage_tier',
+            field=models.CharField(choices=[('original', 'Original'), ('compacted', 'Compacted'), ('deleted', 'Deleted')], default='original', help_text='Whether the stored audio is the original upload, a compacted copy or gone', max_length=20),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:42
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whisper_app', '0005_language_routing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RetryBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('requested_by', models.CharField(blank=True, max_length=150)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Retry Batch',
+                'verbose_name_plural': 'Retry Batches',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0, help_text='Number of times processing was started'),
+        ),
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='retry_batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transcriptions', to='whisper_app.retrybatch'),
+        ),
+    ]
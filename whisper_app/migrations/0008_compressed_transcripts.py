@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:54
+
+import whisper_app.compression
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whisper_app', '0007_audio_properties'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='audiotranscription',
+            name='transcription_text',
+            field=whisper_app.compression.CompressedTextField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:04
+
+import whisper_app.compression
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whisper_app', '0008_compressed_transcripts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='draft_model_name',
+            field=models.CharField(blank=True, help_text='Whisper model that produced the draft', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='draft_text',
+            field=whisper_app.compression.CompressedTextField(blank=True, help_text='First revision, from the draft model', null=True),
+        ),
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='refinement_status',
+            field=models.CharField(blank=True, choices=[('pending', 'Pending'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], help_text='Progress of the refined revision; empty for single-pass transcriptions', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='two_pass',
+            field=models.BooleanField(default=False, help_text='Return a quick draft, then refine it in the background'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whisper_app', '0010_decoding_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text="Processing thread's last sign of life", null=True),
+        ),
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, help_text='The upload is reclaimed if its process has not heartbeat by then', null=True),
+        ),
+        migrations.AddField(
+            model_name='audiotranscription',
+            name='lease_owner',
+            field=models.CharField(blank=True, help_text='host:pid:thread of the process transcribing the upload', max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='audiotranscription',
+            index=models.Index(fields=['lease_expires_at'], name='whisper_lease_idx'),
+        ),
+    ]
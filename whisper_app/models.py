@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils import timezone
-import os
+
+from .compression import CompressedTextField
 
 class AudioTranscription(models.Model):
     """Model to store audio file uploads and transcription results"""
@@ -21,20 +22,80 @@ class AudioTranscription(models.Model):
         ('failed', 'Failed'),
     ]
     
+    REFINEMENT_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    STORAGE_TIERS = [
+        ('original', 'Original'),
+        ('compacted', 'Compacted'),
+        ('deleted', 'Deleted'),
+    ]
+    
     # File information
     audio_file = models.FileField(upload_to='audio_uploads/')
     original_filename = models.CharField(max_length=255)
     file_size = models.BigIntegerField(help_text='File size in bytes')
     file_format = models.CharField(max_length=10, choices=AUDIO_FORMATS)
+    storage_tier = models.CharField(
+        max_length=20, choices=STORAGE_TIERS, default='original',
+        help_text='Whether the stored audio is the original upload, a compacted copy or gone'
+    )
     
     # Transcription results
-    transcription_text = models.TextField(blank=True, null=True)
+    transcription_text = CompressedTextField(blank=True, null=True)
     confidence_score = models.FloatField(blank=True, null=True)
     
     # Processing information
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     processing_time = models.FloatField(blank=True, null=True, help_text='Processing time in seconds')
     error_message = models.TextField(blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0, help_text='Number of times processing was started')
+    retry_batch = models.ForeignKey(
+        'RetryBatch', blank=True, null=True, on_delete=models.SET_NULL, related_name='transcriptions'
+    )
+    lease_owner = models.CharField(
+        max_length=100, blank=True, help_text='host:pid:thread of the process transcribing the upload'
+    )
+    lease_expires_at = models.DateTimeField(
+        blank=True, null=True, help_text='The upload is reclaimed if its process has not heartbeat by then'
+    )
+    heartbeat_at = models.DateTimeField(blank=True, null=True, help_text="Processing thread's last sign of life")
+    
+    # Language and model routing
+    language = models.CharField(
+        max_length=10, blank=True, null=True,
+        help_text='Spoken language code, as hinted by the client or detected'
+    )
+    language_probability = models.FloatField(
+        blank=True, null=True, help_text='Detection confidence; empty when the client gave the language'
+    )
+    model_name = models.CharField(max_length=50, blank=True, help_text='Whisper model that produced the text')
+    decoding_profile = models.CharField(
+        max_length=50, blank=True, help_text='Named set of decoding options (beam size, fallback, precision) used'
+    )
+    
+    # Two-pass mode: a small model's draft first, replaced by the final model's text
+    two_pass = models.BooleanField(default=False, help_text='Return a quick draft, then refine it in the background')
+    draft_text = CompressedTextField(blank=True, null=True, help_text='First revision, from the draft model')
+    draft_model_name = models.CharField(max_length=50, blank=True, help_text='Whisper model that produced the draft')
+    refinement_status = models.CharField(
+        max_length=20, choices=REFINEMENT_CHOICES, blank=True,
+        help_text='Progress of the refined revision; empty for single-pass transcriptions'
+    )
+    refinement_attempts = models.PositiveIntegerField(
+        default=0, help_text='Number of times refinement was started, counted apart from the first pass'
+    )
+    
+    # Performance breakdown
+    audio_duration = models.FloatField(blank=True, null=True, help_text='Audio duration in seconds')
+    sample_rate = models.PositiveIntegerField(blank=True, null=True, help_text='Sample rate in Hz, read from the file header')
+    channels = models.PositiveSmallIntegerField(blank=True, null=True, help_text='Number of audio channels')
+    real_time_factor = models.FloatField(blank=True, null=True, help_text='Processing time divided by audio duration')
+    stage_timings = models.JSONField(default=dict, blank=True, help_text='Duration of each processing stage in seconds')
     
     # Metadata
     created_at = models.DateTimeField(default=timezone.now)
@@ -42,6 +103,9 @@ class AudioTranscription(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['lease_expires_at'], name='whisper_lease_idx'),
+        ]
         verbose_name = 'Audio Transcription'
         verbose_name_plural = 'Audio Transcriptions'
     
@@ -50,11 +114,12 @@ class AudioTranscription(models.Model):
     
     def get_file_size_display(self):
         """Return human-readable file size"""
+        size = float(self.file_size)
         for unit in ['B', 'KB', 'MB', 'GB']:
-            if self.file_size < 1024.0:
-                return f"{self.file_size:.1f} {unit}"
-            self.file_size /= 1024.0
-        return f"{self.file_size:.1f} TB"
+            if size < 1024.0:
+                return f"{size:.1f} {unit}"
+            size /= 1024.0
+        return f"{size:.1f} TB"
     
     def get_processing_time_display(self):
         """Return human-readable processing time"""
@@ -67,9 +132,81 @@ class AudioTranscription(models.Model):
                 return f"{self.processing_time / 3600:.1f} hours"
         return "N/A"
     
-    def delete(self, *args, **kwargs):
-        """Delete the audio file when the model instance is deleted"""
-        if self.audio_file:
-            if os.path.isfile(self.audio_file.path):
-                os.remove(self.audio_file.path)
-        super().delete(*args, **kwargs)
+    def get_audio_duration_display(self):
+        """Return human-readable audio duration"""
+        if self.audio_duration is None:
+            return "N/A"
+        minutes, seconds = divmod(int(round(self.audio_duration)), 60)
+        return f"{minutes}:{seconds:02d}"
+    
+    def record_timings(self, timer, audio_duration=None):
+        """Store total time, stage breakdown and real-time factor from a StageTimer"""
+        self.processing_time = timer.total()
+        self.stage_timings = timer.as_dict()
+        if audio_duration:
+            self.audio_duration = audio_duration
+            self.real_time_factor = self.processing_time / audio_duration
+
+
+class RequestProfile(models.Model):
+    """cProfile capture of a request or a transcription run"""
+    
+    KIND_CHOICES = [
+        ('request', 'Request'),
+        ('transcription', 'Transcription'),
+    ]
+    
+    TRIGGER_CHOICES = [
+        ('sampled', 'Sampled'),
+        ('header', 'Header'),
+    ]
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    label = models.CharField(max_length=255, help_text='Request path or transcription being profiled')
+    method = models.CharField(max_length=10, blank=True)
+    status_code = models.PositiveSmallIntegerField(blank=True, null=True)
+    trigger = models.CharField(max_length=20, choices=TRIGGER_CHOICES)
+    duration = models.FloatField(help_text='Wall-clock time in seconds')
+    profile_file = models.FileField(upload_to='profiles/')
+    summary = models.TextField(blank=True, help_text='Top functions by cumulative time')
+    transcription = models.ForeignKey(
+        AudioTranscription, blank=True, null=True, on_delete=models.SET_NULL, related_name='profiles'
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Request Profile'
+        verbose_name_plural = 'Request Profiles'
+    
+    def __str__(self):
+        return f"{self.kind} {self.label} ({self.duration:.2f}s)"
+
+
+class RetryBatch(models.Model):
+    """A bulk retry of failed transcriptions, used to report its progress"""
+    
+    requested_by = models.CharField(max_length=150, blank=True)
+    total = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Retry Batch'
+        verbose_name_plural = 'Retry Batches'
+    
+    def __str__(self):
+        return f"Retry batch {self.pk} ({self.total} transcriptions)"
+    
+    def get_progress(self):
+        """Count the batch's transcriptions by current status"""
+        counts = dict.fromkeys(['pending', 'processing', 'completed', 'failed'], 0)
+        rows = self.transcriptions.order_by().values_list('status').annotate(count=models.Count('id'))
+        counts.update(rows)
+        return counts
+    
+    def get_progress_display(self):
+        counts = self.get_progress()
+        done = counts['completed'] + counts['failed']
+        return f"{done}/{self.total} done ({counts['completed']} completed, {counts['failed']} failed)"
@@ -0,0 +1,387 @@
+import logging
+import struct
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from the start of the file; enough for any header we parse
+HEAD_BYTES = 64 * 1024
+
+MP3_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 25: [11025, 12000, 8000]}
+AAC_SAMPLE_RATES = [96000, 88200, 64000, 48000, 44100, 32000, 24000, 22050, 16000, 12000, 11025, 8000, 7350]
+# Back-to-back MPEG/ADTS frames needed before a sync word is believed
+MPEG_MIN_FRAMES = 3
+MP4_CONTAINERS = {b'moov', b'trak', b'mdia', b'minf', b'stbl'}
+# Real files nest five containers deep and hold a few hundred boxes before the moov ends
+MP4_MAX_DEPTH = 8
+MP4_MAX_BOXES = 10000
+# MP4 sample entry -> codec
+MP4_AUDIO_ENTRIES = {b'mp4a': 'aac', b'alac': 'alac', b'ac-3': 'ac3', b'ec-3': 'eac3', b'Opus': 'opus', b'fLaC': 'flac'}
+WAV_CODECS = {1: 'pcm', 3: 'pcm_float', 6: 'alaw', 7: 'mulaw', 0x11: 'adpcm_ima', 0x55: 'mp3', 0xfffe: 'extensible'}
+WMA_CODECS = {0x160: 'wmav1', 0x161: 'wmav2', 0x162: 'wmapro', 0x163: 'wmalossless'}
+
+ASF_HEADER = bytes.fromhex('3026b2758e66cf11a6d900aa0062ce6c')
+ASF_FILE_PROPERTIES = bytes.fromhex('a1dcab8c47a9cf118ee400c00c205365')
+ASF_STREAM_PROPERTIES = bytes.fromhex('9107dcb7b7a9cf118ee600c00c205365')
+ASF_AUDIO_MEDIA = bytes.fromhex('409e69f84d5bcf11a8fd00805f5c442b')
+
+# Which sniffed formats each accepted file extension may contain
+EXTENSION_FORMATS = {
+    'wav': {'wav'},
+    'mp3': {'mp3'},
+    'm4a': {'m4a'},
+    'flac': {'flac'},
+    'ogg': {'ogg'},
+    'aac': {'aac', 'm4a'},
+    'wma': {'wma'},
+}
+
+
+class InvalidAudio(ValueError):
+    """An upload that would fail or misbehave once decoded; the message is meant for the client"""
+
+
+def probe_audio(file):
+    """Read duration, sample rate and channels from the container headers without decoding
+    
+    Returns a dict with format, codec, duration, sample_rate and channels (any
+    but format may be None), or None when the file isn't a format we recognise.
+    """
+    try:
+        file.seek(0, 2)
+        size = file.tell()
+        file.seek(0)
+        head = file.read(HEAD_BYTES)
+        for parser in (probe_wav, probe_flac, probe_ogg, probe_mp4, probe_asf, probe_mpeg):
+            info = parser(file, head, size)
+            if info:
+                return info
+    except (OSError, ValueError, IndexError, struct.error) as e:
+        logger.warning(f"Could not probe audio headers: {e}")
+    finally:
+        file.seek(0)
+    return None
+
+
+def probe_result(container, duration=None, sample_rate=None, channels=None, codec=None):
+    return {
+        'format': container, 'codec': codec, 'duration': duration, 'sample_rate': sample_rate, 'channels': channels
+    }
+
+
+def validate_audio(file, extension):
+    """Sniff and parse an upload's headers, rejecting what would only fail later in ffmpeg
+    
+    Returns the probe result, or raises InvalidAudio for content that isn't
+    supported audio, doesn't match its extension, carries no audio stream
+    or runs longer than MAX_AUDIO_DURATION_SECONDS.
+    """
+    info = probe_audio(file)
+    if info is None:
+        raise InvalidAudio('The file is not audio in a supported format, or it is corrupt')
+    expected = EXTENSION_FORMATS.get(extension.lstrip('.').lower())
+    if expected and info['format'] not in expected:
+        raise InvalidAudio(f"The file contains {info['format'].upper()} data but is named {extension}")
+    if info['codec'] is None and info['format'] in ('wav', 'm4a', 'wma'):
+        raise InvalidAudio('No audio stream found in the file')
+    if info['channels'] == 0 or (info['sample_rate'] is not None and not 1000 <= info['sample_rate'] <= 384000):
+        raise InvalidAudio('The audio headers are corrupt')
+    
+    duration = info['duration']
+    if duration is not None:
+        if duration <= 0:
+            raise InvalidAudio('The file contains no audio')
+        limit = getattr(settings, 'MAX_AUDIO_DURATION_SECONDS', None)
+        if limit and duration > limit:
+            raise InvalidAudio(f'The audio runs {format_length(duration)}; uploads are limited to {format_length(limit)}')
+    return info
+
+
+def format_length(seconds):
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f'{hours}:{minutes:02d}:{seconds:02d}'
+
+
+def skip_id3(head):
+    """Offset of the first byte after a leading ID3v2 tag"""
+    if head[:3] != b'ID3' or len(head) < 10:
+        return 0
+    size = (head[6] & 0x7f) << 21 | (head[7] & 0x7f) << 14 | (head[8] & 0x7f) << 7 | (head[9] & 0x7f)
+    footer = 10 if head[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def probe_wav(file, head, size):
+    if head[:4] != b'RIFF' or head[8:12] != b'WAVE':
+        return None
+    codec = channels = sample_rate = byte_rate = None
+    offset = 12
+    while offset + 8 <= len(head):
+        chunk_id, chunk_size = struct.unpack_from('<4sI', head, offset)
+        if chunk_id == b'fmt ':
+            format_tag, channels, sample_rate, byte_rate = struct.unpack_from('<HHII', head, offset + 8)
+            codec = WAV_CODECS.get(format_tag, f'0x{format_tag:04x}')
+        elif chunk_id == b'data':
+            # Streamed WAVs leave the size unset, so fall back to the rest of the file
+            data_size = size - offset - 8
+            if chunk_size not in (0, 0xffffffff):
+                data_size = min(chunk_size, data_size)
+            duration = data_size / byte_rate if byte_rate else None
+            return probe_result('wav', duration, sample_rate, channels, codec)
+        offset += 8 + chunk_size + (chunk_size & 1)
+    return probe_result('wav', None, sample_rate, channels, codec)
+
+
+def read_after_id3(file, head):
+    """The file's leading bytes past any ID3v2 tag, and the tag's length"""
+    offset = skip_id3(head)
+    if not offset:
+        return head, 0
+    file.seek(offset)
+    return file.read(HEAD_BYTES), offset
+
+
+def probe_flac(file, head, size):
+    head, offset = read_after_id3(file, head)
+    if head[:4] != b'fLaC':
+        return None
+    # STREAMINFO is always the first metadata block
+    fields = int.from_bytes(head[18:26], 'big')
+    sample_rate = fields >> 44
+    channels = ((fields >> 41) & 0x7) + 1
+    total_samples = fields & ((1 << 36) - 1)
+    duration = total_samples / sample_rate if sample_rate and total_samples else None
+    return probe_result('flac', duration, sample_rate or None, channels, 'flac')
+
+
+def probe_ogg(file, head, size):
+    if head[:4] != b'OggS':
+        return None
+    # The first packet is the codec identification header
+    segments = head[26]
+    packet = head[27 + segments:]
+    if packet[:7] == b'\x01vorbis':
+        channels, sample_rate = struct.unpack_from('<BI', packet, 11)
+        rate, pre_skip, codec = sample_rate, 0, 'vorbis'
+    elif packet[:8] == b'OpusHead':
+        channels, pre_skip, sample_rate = struct.unpack_from('<BHI', packet, 9)
+        # Opus granule positions always count 48 kHz samples
+        rate, codec = 48000, 'opus'
+    else:
+        return probe_result('ogg')
+    
+    # The last page's granule position is the total number of samples
+    tail_start = max(size - HEAD_BYTES, 0)
+    file.seek(tail_start)
+    tail = file.read(HEAD_BYTES)
+    page = tail.rfind(b'OggS')
+    duration = None
+    if page != -1 and page + 14 <= len(tail):
+        granule = struct.unpack_from('<q', tail, page + 6)[0]
+        if granule > 0:
+            duration = max(granule - pre_skip, 0) / rate
+    return probe_result('ogg', duration, sample_rate or None, channels, codec)
+
+
+def iter_mp4_boxes(file, start, end):
+    offset = start
+    while offset + 8 <= end:
+        file.seek(offset)
+        header = file.read(16)
+        if len(header) < 8:
+            return
+        box_size, box_type = struct.unpack_from('>I4s', header)
+        header_size = 8
+        if box_size == 1:
+            box_size = struct.unpack_from('>Q', header, 8)[0]
+            header_size = 16
+        elif box_size == 0:
+            box_size = end - offset
+        if box_size < header_size:
+            return
+        yield box_type, offset + header_size, offset + box_size
+        offset += box_size
+
+
+def probe_mp4(file, head, size):
+    if head[4:8] != b'ftyp':
+        return None
+    info = probe_result('m4a')
+    boxes = 0
+    
+    def walk(start, end, depth=0):
+        nonlocal boxes
+        if depth > MP4_MAX_DEPTH:
+            raise ValueError('MP4 boxes nested too deeply')
+        for box_type, body, box_end in iter_mp4_boxes(file, start, end):
+            boxes += 1
+            if boxes > MP4_MAX_BOXES:
+                raise ValueError('Too many MP4 boxes')
+            if box_type in MP4_CONTAINERS:
+                walk(body, box_end, depth + 1)
+                if box_type == b'moov':
+                    # Everything we read lives in the moov; skip the fragments after it
+                    return
+            elif box_type == b'mvhd':
+                file.seek(body)
+                data = file.read(32)
+                if data[0] == 1:
+                    timescale, duration = struct.unpack_from('>IQ', data, 20)
+                else:
+                    timescale, duration = struct.unpack_from('>II', data, 12)
+                if timescale:
+                    info['duration'] = duration / timescale
+            elif box_type == b'stsd' and info['sample_rate'] is None:
+                # Full box header and entry count, then the first sample entry
+                file.seek(body + 8)
+                entry = file.read(36)
+                if entry[4:8] in MP4_AUDIO_ENTRIES:
+                    info['codec'] = MP4_AUDIO_ENTRIES[entry[4:8]]
+                    info['channels'] = struct.unpack_from('>H', entry, 24)[0]
+                    info['sample_rate'] = struct.unpack_from('>I', entry, 32)[0] >> 16
+    
+    walk(0, size)
+    return info
+
+
+def probe_asf(file, head, size):
+    """WMA: the File Properties and audio Stream Properties objects of the ASF header"""
+    if head[:16] != ASF_HEADER:
+        return None
+    info = probe_result('wma')
+    header_end = min(struct.unpack_from('<Q', head, 16)[0], len(head))
+    offset = 30
+    while offset + 24 <= header_end:
+        guid = head[offset:offset + 16]
+        object_size = struct.unpack_from('<Q', head, offset + 16)[0]
+        if object_size < 24:
+            break
+        if guid == ASF_FILE_PROPERTIES:
+            # Play duration counts 100 ns units and includes the preroll, given in ms
+            play_duration, _, preroll = struct.unpack_from('<QQQ', head, offset + 64)
+            if play_duration:
+                info['duration'] = max(play_duration / 1e7 - preroll / 1000, 0)
+        elif guid == ASF_STREAM_PROPERTIES and head[offset + 24:offset + 40] == ASF_AUDIO_MEDIA and info['codec'] is None:
+            # WAVEFORMATEX follows the fixed part of the object
+            codec_id, channels, sample_rate = struct.unpack_from('<HHI', head, offset + 78)
+            info.update(codec=WMA_CODECS.get(codec_id, f'0x{codec_id:04x}'), channels=channels, sample_rate=sample_rate)
+        offset += object_size
+    return info
+
+
+def probe_mpeg(file, head, size):
+    """MP3 (and other MPEG audio layers) or AAC in an ADTS stream"""
+    head, offset = read_after_id3(file, head)
+    end = size - offset
+    # Tolerate a little junk before the first frame; a sync word only counts
+    # when further frames follow where its length says (see frame_run)
+    for i in range(min(len(head) - 4, 4096)):
+        if head[i] != 0xff or head[i + 1] & 0xe0 != 0xe0:
+            continue
+        if head[i + 1] & 0x06 == 0:
+            info = parse_adts(head, i, end)
+        else:
+            info = parse_mp3_frame(head, i, end)
+        if info:
+            return info
+    return None
+
+
+def frame_run(data, offset, end, read_header, limit):
+    """Count frames back to back from offset whose stream parameters match the first
+    
+    Returns (frames, position after the last one), or (0, offset) unless the
+    run holds MPEG_MIN_FRAMES frames or reaches the end of a shorter file. Any
+    data has sync-like bytes somewhere; three frames in a row it doesn't.
+    """
+    frames, position, stream = 0, offset, None
+    while frames < limit:
+        header = read_header(data, position)
+        if header is None or stream not in (None, header[0]):
+            break
+        stream = header[0]
+        frames += 1
+        position += header[1]
+    if frames >= MPEG_MIN_FRAMES or (frames and position == end):
+        return frames, position
+    return 0, offset
+
+
+def adts_header(data, position):
+    """((sample rate index, channels), frame length) of an ADTS header, or None"""
+    if position + 7 > len(data) or data[position] != 0xff or data[position + 1] & 0xf6 != 0xf0:
+        return None
+    sample_rate_index = (data[position + 2] >> 2) & 0xf
+    channels = ((data[position + 2] & 0x1) << 2) | (data[position + 3] >> 6)
+    length = ((data[position + 3] & 0x3) << 11) | (data[position + 4] << 3) | (data[position + 5] >> 5)
+    if sample_rate_index >= len(AAC_SAMPLE_RATES) or length < 7:
+        return None
+    return (sample_rate_index, channels), length
+
+
+def parse_adts(data, offset, end):
+    # Average the frame length over the frames we already have, then extrapolate
+    frames, position = frame_run(data, offset, end, adts_header, 200)
+    if not frames:
+        return None
+    (sample_rate_index, channels), _ = adts_header(data, offset)
+    sample_rate = AAC_SAMPLE_RATES[sample_rate_index]
+    duration = (end - offset) / ((position - offset) / frames) * 1024 / sample_rate
+    return probe_result('aac', duration, sample_rate, channels or None, 'aac')
+
+
+def mp3_header(data, position):
+    """((version, layer, sample rate), frame length) of an MPEG audio frame header, or None"""
+    if position + 4 > len(data) or data[position] != 0xff or data[position + 1] & 0xe0 != 0xe0:
+        return None
+    b1, b2 = data[position + 1], data[position + 2]
+    version = {3: 1, 2: 2, 0: 25}.get((b1 >> 3) & 0x3)
+    layer = {3: 1, 2: 2, 1: 3}.get((b1 >> 1) & 0x3)
+    bitrate_index, sample_rate_index, padding = b2 >> 4, (b2 >> 2) & 0x3, (b2 >> 1) & 0x1
+    if version is None or layer is None or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+    bitrate = MP3_BITRATES[(min(version, 2), layer)][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][sample_rate_index]
+    if layer == 1:
+        length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        length = mp3_samples_per_frame(version, layer) // 8 * bitrate // sample_rate + padding
+    return (version, layer, sample_rate), length
+
+
+def mp3_samples_per_frame(version, layer):
+    return 384 if layer == 1 else 1152 if layer == 2 or version == 1 else 576
+
+
+def parse_mp3_frame(data, offset, end):
+    if not frame_run(data, offset, end, mp3_header, MPEG_MIN_FRAMES)[0]:
+        return None
+    (version, layer, sample_rate), _ = mp3_header(data, offset)
+    bitrate = MP3_BITRATES[(min(version, 2), layer)][data[offset + 2] >> 4] * 1000
+    channels = 1 if data[offset + 3] >> 6 == 3 else 2
+    samples_per_frame = mp3_samples_per_frame(version, layer)
+    
+    # VBR files carry a frame count in a Xing/Info or VBRI header in the first frame
+    side_info = (32 if channels == 2 else 17) if version == 1 else (17 if channels == 2 else 9)
+    xing = offset + 4 + side_info
+    frames = None
+    if data[xing:xing + 4] in (b'Xing', b'Info') and data[xing + 7] & 0x1:
+        frames = struct.unpack_from('>I', data, xing + 8)[0]
+    elif data[offset + 36:offset + 40] == b'VBRI':
+        frames = struct.unpack_from('>I', data, offset + 50)[0]
+    
+    if frames:
+        duration = frames * samples_per_frame / sample_rate
+    else:
+        duration = (end - offset) * 8 / bitrate
+    return probe_result('mp3', duration, sample_rate, channels, f'mp{layer}')
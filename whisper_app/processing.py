@@ -0,0 +1,175 @@
+import logging
+import threading
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+from .decoding import decoding_options
+from .engine import SAMPLE_RATE, detect_language, load_audio, load_whisper_model, whisper_models
+from .language import detection_model_name, draft_model_name, transcription_model_name
+from .leases import JobLease, lease_fields, reap_expired_leases
+from .models import AudioTranscription
+from .profiling import profile_transcription
+from .storage import local_audio_path
+from .timing import StageTimer
+
+logger = logging.getLogger(__name__)
+
+def transcribe(transcription):
+    """Run Whisper on a stored upload and save the outcome on the record
+    
+    Errors are recorded on the transcription rather than raised, so callers
+    only need the returned success flag. The work happens under a lease on the
+    row, so an upload whose process dies midway doesn't stay processing forever.
+    """
+    lease = JobLease(transcription)
+    if not lease.acquire():
+        logger.warning(f"Transcription {transcription.id} is already being processed")
+        transcription.refresh_from_db()
+        return False
+    timer = StageTimer()
+    try:
+        transcription.status = 'processing'
+        transcription.attempts += 1
+        if not lease.save():
+            return False
+        
+        with profile_transcription(transcription):
+            logger.info(f"Transcribing audio file: {transcription.original_filename}")
+            
+            # Decode separately so the breakdown distinguishes ffmpeg from inference
+            with timer.stage('decode'), local_audio_path(transcription.audio_file) as audio_path:
+                audio = load_audio(audio_path)
+            audio_duration = len(audio) / SAMPLE_RATE
+            
+            # Detect the language once, on the first 30s, with the smallest resident model
+            language = transcription.language
+            if not language:
+                with timer.stage('model_load'):
+                    detector = load_whisper_model(detection_model_name(whisper_models))
+                with timer.stage('language_detection'):
+                    language, probability = detect_language(detector, audio)
+                transcription.language = language
+                transcription.language_probability = probability
+            
+            model_name = transcription_model_name(language)
+            # In two-pass mode a smaller model answers first; refine() runs this one later
+            draft_model = draft_model_name(model_name) if transcription.two_pass else None
+            with timer.stage('model_load'):
+                model = load_whisper_model(draft_model or model_name)
+            
+            # Transcribe the audio
+            with timer.stage('inference'):
+                result = model.transcribe(audio, language=language, **decoding_options(transcription.decoding_profile))
+        
+        # Update transcription record
+        transcription.transcription_text = result["text"]
+        transcription.model_name = draft_model or model_name
+        if draft_model:
+            transcription.draft_text = transcription.transcription_text
+            transcription.draft_model_name = draft_model
+            transcription.refinement_status = 'pending'
+            transcription.refinement_attempts = 0
+        transcription.record_timings(timer, audio_duration)
+        transcription.status = 'completed'
+        transcription.error_message = None
+        if not lease.save():
+            return False
+        logger.info(f"Transcription completed for {transcription.original_filename} in {transcription.processing_time:.2f}s")
+        return True
+        
+    except Exception as e:
+        logger.error(f"Error during transcription {transcription.id}: {str(e)}")
+        transcription.status = 'failed'
+        transcription.error_message = str(e)
+        transcription.record_timings(timer)
+        lease.save()
+        return False
+    finally:
+        lease.release()
+        if lease.lost:
+            # Show the caller what the row holds now rather than the discarded result
+            transcription.refresh_from_db()
+
+
+def refine(transcription):
+    """Replace a two-pass draft with the final model's transcript; return True on success
+    
+    The draft stays in draft_text. If refinement fails the draft remains the
+    transcript and the transcription stays completed.
+    """
+    lease = JobLease(transcription)
+    if not lease.acquire():
+        logger.warning(f"Transcription {transcription.id} is already being refined")
+        return False
+    timer = StageTimer()
+    try:
+        with timer.stage('decode'), local_audio_path(transcription.audio_file) as audio_path:
+            audio = load_audio(audio_path)
+        model_name = transcription_model_name(transcription.language)
+        with timer.stage('model_load'):
+            model = load_whisper_model(model_name)
+        with timer.stage('inference'):
+            result = model.transcribe(
+                audio, language=transcription.language, **decoding_options(transcription.decoding_profile)
+            )
+        
+        transcription.transcription_text = result['text']
+        transcription.model_name = model_name
+        transcription.refinement_status = 'completed'
+        # processing_time stays the draft's, the time to a first result
+        transcription.stage_timings = {**transcription.stage_timings, 'refinement': timer.total()}
+        return lease.save()
+        
+    except Exception as e:
+        logger.error(f"Error refining transcription {transcription.id}: {e}")
+        transcription.refinement_status = 'failed'
+        lease.save(update_fields=['refinement_status', 'updated_at'])
+        return False
+    finally:
+        lease.release()
+
+
+def claim_refinement():
+    """Atomically claim the oldest draft waiting to be refined, or return None"""
+    waiting = AudioTranscription.objects.filter(refinement_status='pending').order_by('created_at', 'pk')
+    for pk in waiting.values_list('pk', flat=True)[:5]:
+        now = timezone.now()
+        claimed = AudioTranscription.objects.filter(pk=pk, refinement_status='pending').update(
+            refinement_status='processing', refinement_attempts=F('refinement_attempts') + 1, updated_at=now, **lease_fields(now)
+        )
+        if claimed:
+            return AudioTranscription.objects.get(pk=pk)
+    return None
+
+
+# At most one refinement thread per process, so only one final model runs at a time
+refiner_lock = threading.Lock()
+refiner_thread = None
+
+
+def refine_pending():
+    """Refine drafts until none are waiting, starting with any a dead process left behind"""
+    global refiner_thread
+    try:
+        reap_expired_leases()
+        while True:
+            transcription = claim_refinement()
+            if transcription is None:
+                with refiner_lock:
+                    # Check again under the lock so a draft queued meanwhile isn't stranded
+                    transcription = claim_refinement()
+                    if transcription is None:
+                        refiner_thread = None
+                        return
+            refine(transcription)
+    finally:
+        connection.close()
+
+
+def refine_in_background():
+    """Start the refinement thread unless one is already running"""
+    global refiner_thread
+    with refiner_lock:
+        if refiner_thread is None or not refiner_thread.is_alive():
+            refiner_thread = threading.Thread(target=refine_pending, name='refiner', daemon=True)
+            refiner_thread.start()
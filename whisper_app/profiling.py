@@ -0,0 +1,130 @@
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+
+from .models import RequestProfile
+
+logger = logging.getLogger(__name__)
+
+# The capture currently running on this thread, so nested hooks don't start a second profiler
+_local = threading.local()
+
+
+def is_sampled():
+    return random.random() < getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+
+
+def get_request_trigger(request):
+    """Return why a request should be profiled, or None to leave it alone"""
+    token = getattr(settings, 'PROFILING_TOKEN', '')
+    header = request.headers.get('X-Profile')
+    if token and header and constant_time_compare(header, token):
+        return 'header'
+    if is_sampled():
+        return 'sampled'
+    return None
+
+
+@contextmanager
+def capture_profile(kind, label, trigger, method=''):
+    """Run the enclosed block under cProfile and store the result as a RequestProfile"""
+    capture = {'status_code': None, 'transcription': None}
+    profiler = cProfile.Profile()
+    _local.capture = capture
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # Since Python 3.12 only one profiler can be active at a time, e.g. on another thread
+        _local.capture = None
+        logger.warning(f"Not profiling {label}: {e}")
+        yield capture
+        return
+    start = time.perf_counter()
+    try:
+        yield capture
+    finally:
+        profiler.disable()
+        _local.capture = None
+        try:
+            save_profile(profiler, capture, kind, label, trigger, method, time.perf_counter() - start)
+        except Exception as e:
+            logger.error(f"Error saving profile for {label}: {e}")
+
+
+@contextmanager
+def profile_transcription(transcription):
+    """Profile a sampled transcription, or attach it to the request profile already running"""
+    capture = getattr(_local, 'capture', None)
+    if capture is not None:
+        capture['transcription'] = transcription
+        yield
+    elif is_sampled():
+        with capture_profile('transcription', f'Transcription {transcription.id}', 'sampled') as capture:
+            capture['transcription'] = transcription
+            yield
+    else:
+        yield
+
+
+def save_profile(profiler, capture, kind, label, trigger, method, duration):
+    stats = pstats.Stats(profiler)
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(40)
+    
+    profile = RequestProfile(
+        kind=kind,
+        label=label[:255],
+        method=method,
+        status_code=capture['status_code'],
+        trigger=trigger,
+        duration=duration,
+        summary=summary.getvalue(),
+        transcription=capture['transcription'],
+    )
+    # Same format as pstats.Stats.dump_stats(), so the file loads in snakeviz or pstats
+    timestamp = timezone.now().strftime('%Y%m%d-%H%M%S')
+    profile.profile_file.save(f'{timestamp}_{kind}.prof', ContentFile(marshal.dumps(stats.stats)), save=False)
+    profile.save()
+    logger.info(f"Captured {kind} profile for {label} ({duration:.2f}s)")
+    prune_profiles()
+
+
+def prune_profiles():
+    """Enforce PROFILING_MAX_AGE_DAYS and PROFILING_MAX_PROFILES"""
+    max_age = getattr(settings, 'PROFILING_MAX_AGE_DAYS', 7)
+    max_count = getattr(settings, 'PROFILING_MAX_PROFILES', 200)
+    cutoff = timezone.now() - timedelta(days=max_age)
+    
+    expired = list(RequestProfile.objects.filter(created_at__lt=cutoff))
+    expired += list(RequestProfile.objects.filter(created_at__gte=cutoff)[max_count:])
+    for profile in expired:
+        profile.delete()
+
+
+class ProfilingMiddleware:
+    """Profile sampled requests and requests carrying a valid X-Profile header"""
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        trigger = get_request_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+        
+        with capture_profile('request', request.path, trigger, method=request.method) as capture:
+            response = self.get_response(request)
+            capture['status_code'] = response.status_code
+        return response
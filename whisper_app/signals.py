@@ -0,0 +1,37 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import AudioTranscription, RequestProfile
+
+logger = logging.getLogger(__name__)
+
+
+def delete_file_on_commit(field_file):
+    """Remove a deleted row's file once the deletion commits, so a rollback keeps it"""
+    if not field_file:
+        return
+    storage, name = field_file.storage, field_file.name
+    
+    def delete():
+        try:
+            storage.delete(name)
+        except Exception as e:
+            # collect_orphaned_media picks up whatever is left behind
+            logger.error(f"Could not delete {name}: {e}")
+    
+    transaction.on_commit(delete)
+
+
+# Receivers rather than delete() overrides, because queryset deletes (the
+# admin's "delete selected", cascades) never call Model.delete()
+@receiver(post_delete, sender=AudioTranscription)
+def delete_audio_file(sender, instance, **kwargs):
+    delete_file_on_commit(instance.audio_file)
+
+
+@receiver(post_delete, sender=RequestProfile)
+def delete_profile_file(sender, instance, **kwargs):
+    delete_file_on_commit(instance.profile_file)
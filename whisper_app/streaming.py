@@ -0,0 +1,125 @@
+import hashlib
+import mimetypes
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header, size):
+    """Return (start, end) for a single satisfiable byte range, None to send the whole
+    file, or False if the range can't be satisfied"""
+    match = RANGE_RE.match(header.strip())
+    if not match or not any(match.groups()):
+        # Malformed and multi-range requests get the full file, as RFC 9110 allows
+        return None
+    first, last = match.groups()
+    if first and last and int(last) < int(first):
+        # An inverted range is invalid syntax, so the header is ignored
+        return None
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def read_range(file, start, length):
+    with file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def file_validators(field_file):
+    """ETag and last-modified timestamp for a stored file"""
+    storage = field_file.storage
+    size = field_file.size
+    try:
+        # Whole seconds, as HTTP dates carry no more and If-Modified-Since compares them exactly
+        last_modified = int(storage.get_modified_time(field_file.name).timestamp())
+    except NotImplementedError:
+        last_modified = None
+    fingerprint = f'{field_file.name}:{size}:{last_modified}'
+    etag = quote_etag(hashlib.sha1(fingerprint.encode()).hexdigest())
+    return size, etag, last_modified
+
+
+def offload_response(field_file, content_type):
+    """Let the front-end web server send the file, if AUDIO_STREAM_OFFLOAD is set"""
+    offload = getattr(settings, 'AUDIO_STREAM_OFFLOAD', None)
+    if offload == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        prefix = getattr(settings, 'AUDIO_STREAM_ACCEL_PREFIX', '/protected-media/')
+        # Header values must be ASCII; nginx decodes the URI before mapping it to a file
+        response['X-Accel-Redirect'] = prefix + quote(field_file.name)
+        return response
+    if offload == 'x-sendfile':
+        try:
+            path = field_file.path
+        except NotImplementedError:
+            return None
+        response = HttpResponse(content_type=content_type)
+        # mod_xsendfile unescapes the value (XSendFileUnescape is on by default)
+        response['X-Sendfile'] = quote(path)
+        return response
+    return None
+
+
+def serve_audio(request, field_file):
+    """Serve a stored audio file with Range, conditional GET and ETag support"""
+    size, etag, last_modified = file_validators(field_file)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        content_type = mimetypes.guess_type(field_file.name)[0] or 'application/octet-stream'
+        response = offload_response(field_file, content_type) or build_response(
+            request, field_file, size, etag, content_type
+        )
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, max_age=getattr(settings, 'AUDIO_STREAM_MAX_AGE', 3600))
+    return response
+
+
+def build_response(request, field_file, size, etag, content_type):
+    byte_range = None
+    range_header = request.headers.get('Range')
+    if_range = request.headers.get('If-Range')
+    # A stale If-Range means the client's partial copy is outdated: send everything
+    if range_header and (not if_range or if_range == etag):
+        byte_range = parse_range(range_header, size)
+    
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    
+    if byte_range is None:
+        # FileResponse uses wsgi.file_wrapper, so servers can sendfile() local files
+        response = FileResponse(field_file.storage.open(field_file.name, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(
+            read_range(field_file.storage.open(field_file.name, 'rb'), start, length),
+            status=206, content_type=content_type
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(length)
+    response['Accept-Ranges'] = 'bytes'
+    return response
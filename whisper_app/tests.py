@@ -1,3 +1,379 @@
-from django.test import TestCase
+import io
+import os
+import random
+import shutil
+import struct
+import tempfile
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.admin import site
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from .compression import PREFIXES
+from .leases import JobLease, lease_seconds, reap_expired_leases
+from .models import AudioTranscription
+from .processing import claim_refinement
+from .probe import MP4_MAX_BOXES, MP4_MAX_DEPTH, InvalidAudio, probe_audio, validate_audio
+from .storage import LocalObjectStorage, ScratchCache, local_audio_path
+from .streaming import offload_response, serve_audio
+
+AUDIO = bytes(range(256)) * 4
+
+
+class ObjectStorageTests(TestCase):
+    """The pipeline against LocalObjectStorage, which like S3 has no filesystem paths"""
+    
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.scratch_dir = os.path.join(self.media_root, 'scratch')
+        overrides = self.settings(
+            MEDIA_ROOT=self.media_root,
+            STORAGES={**settings.STORAGES, 'default': {'BACKEND': 'whisper_app.storage.LocalObjectStorage'}},
+            AUDIO_SCRATCH_DIR=self.scratch_dir,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        
+        self.transcription = AudioTranscription(original_filename='talk.wav', file_size=len(AUDIO), file_format='wav')
+        self.transcription.audio_file.save('talk.wav', ContentFile(AUDIO))
+    
+    def test_uploads_go_to_the_object_store(self):
+        storage = self.transcription.audio_file.storage
+        self.assertIsInstance(storage, LocalObjectStorage)
+        with self.assertRaises(NotImplementedError):
+            self.transcription.audio_file.path
+        self.assertEqual(storage.listdir('audio_uploads'), ([], [os.path.basename(self.transcription.audio_file.name)]))
+    
+    def test_local_audio_path_streams_into_the_scratch_cache(self):
+        with local_audio_path(self.transcription.audio_file) as path:
+            self.assertTrue(path.startswith(self.scratch_dir))
+            with open(path, 'rb') as local_copy:
+                self.assertEqual(local_copy.read(), AUDIO)
+        # A second read is served from the cache
+        with local_audio_path(self.transcription.audio_file) as cached_path:
+            self.assertEqual(cached_path, path)
+    
+    def test_scratch_cache_evicts_least_recently_used(self):
+        storage = self.transcription.audio_file.storage
+        names = [storage.save(f'audio_uploads/{index}.wav', ContentFile(AUDIO)) for index in range(3)]
+        cache = ScratchCache(self.scratch_dir, max_bytes=2 * len(AUDIO), min_age=0)
+        paths = []
+        for age, name in zip([300, 200, 100], names):
+            path = cache.fetch(storage, name)
+            os.utime(path, (0, os.path.getmtime(path) - age))
+            paths.append(path)
+        cache.evict()
+        self.assertEqual([os.path.exists(path) for path in paths], [False, True, True])
+    
+    def test_scratch_cache_keeps_recently_used_files(self):
+        storage = self.transcription.audio_file.storage
+        cache = ScratchCache(self.scratch_dir, max_bytes=0, min_age=60)
+        path = cache.fetch(storage, self.transcription.audio_file.name)
+        self.assertTrue(os.path.exists(path))
+    
+    def test_serve_audio_answers_range_requests(self):
+        request = RequestFactory().get('/audio/', HTTP_RANGE='bytes=10-19')
+        response = serve_audio(request, self.transcription.audio_file)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(AUDIO)}')
+        self.assertEqual(b''.join(response.streaming_content), AUDIO[10:20])
+        
+        request = RequestFactory().get('/audio/', HTTP_RANGE='bytes=-5')
+        response = serve_audio(request, self.transcription.audio_file)
+        self.assertEqual(b''.join(response.streaming_content), AUDIO[-5:])
+        
+        request = RequestFactory().get('/audio/', HTTP_RANGE=f'bytes={len(AUDIO)}-')
+        self.assertEqual(serve_audio(request, self.transcription.audio_file).status_code, 416)
+    
+    def test_serve_audio_ignores_inverted_ranges(self):
+        request = RequestFactory().get('/audio/', HTTP_RANGE='bytes=20-10')
+        response = serve_audio(request, self.transcription.audio_file)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), AUDIO)
+    
+    def test_serve_audio_answers_conditional_requests(self):
+        response = serve_audio(RequestFactory().get('/audio/'), self.transcription.audio_file)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), AUDIO)
+        request = RequestFactory().get('/audio/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(serve_audio(request, self.transcription.audio_file).status_code, 304)
+        request = RequestFactory().get('/audio/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(serve_audio(request, self.transcription.audio_file).status_code, 304)
+    
+    def test_offload_headers_are_percent_encoded(self):
+        self.transcription.audio_file.name = 'audio_uploads/my talk 100%?é.wav'
+        with self.settings(AUDIO_STREAM_OFFLOAD='x-accel-redirect', AUDIO_STREAM_ACCEL_PREFIX='/protected-media/'):
+            response = offload_response(self.transcription.audio_file, 'audio/wav')
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/audio_uploads/my%20talk%20100%25%3F%C3%A9.wav')
+    
+    def test_deleting_a_transcription_removes_its_object(self):
+        self.transcription.save()
+        storage, name = self.transcription.audio_file.storage, self.transcription.audio_file.name
+        with self.captureOnCommitCallbacks(execute=True):
+            self.transcription.delete()
+        self.assertFalse(storage.exists(name))
+    
+    def test_bulk_deletes_remove_objects(self):
+        self.transcription.save()
+        storage, name = self.transcription.audio_file.storage, self.transcription.audio_file.name
+        with self.captureOnCommitCallbacks(execute=True):
+            AudioTranscription.objects.filter(pk=self.transcription.pk).delete()
+        self.assertFalse(storage.exists(name))
+
+
+@override_settings(UPLOAD_RATE_PER_MINUTE=1, UPLOAD_BURST=1, LOAD_SHED_MAX_BACKLOG_SECONDS=None)
+class AdmissionControlTests(TestCase):
+    url = '/upload/'
+    
+    def setUp(self):
+        cache.clear()
+    
+    def test_rate_limit_answers_429_with_retry_after(self):
+        self.assertEqual(self.client.post(self.url).status_code, 400)
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+    
+    def test_full_backlog_answers_503_without_taking_a_token(self):
+        AudioTranscription.objects.create(
+            original_filename='talk.wav', file_size=1, file_format='wav', status='processing', audio_duration=600
+        )
+        with self.settings(LOAD_SHED_MAX_BACKLOG_SECONDS=60):
+            response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 503)
+        self.assertGreater(int(response['Retry-After']), 0)
+        cache.delete('transcription-backlog')
+        self.assertEqual(self.client.post(self.url).status_code, 400)
+
+
+class LeaseTests(TestCase):
+    def create(self, **fields):
+        return AudioTranscription.objects.create(original_filename='talk.wav', file_size=1, file_format='wav', **fields)
+    
+    def expired(self):
+        return timezone.now() + timedelta(seconds=lease_seconds() + 1)
+    
+    def test_a_live_lease_is_exclusive(self):
+        transcription = self.create(lease_owner='other:1:1', lease_expires_at=timezone.now() + timedelta(seconds=60))
+        self.assertFalse(JobLease(transcription).acquire())
+        AudioTranscription.objects.filter(pk=transcription.pk).update(
+            lease_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        lease = JobLease(transcription)
+        self.assertTrue(lease.acquire())
+        lease.release()
+    
+    def test_refinements_are_claimed_once_and_counted_apart(self):
+        transcription = self.create(status='completed', attempts=3, two_pass=True, refinement_status='pending')
+        claimed = claim_refinement()
+        self.assertEqual(claimed.pk, transcription.pk)
+        self.assertEqual((claimed.attempts, claimed.refinement_attempts), (3, 1))
+        self.assertIsNone(claim_refinement())
+    
+    def test_save_is_refused_once_the_reaper_takes_the_lease(self):
+        transcription = self.create(status='processing')
+        lease = JobLease(transcription)
+        self.assertTrue(lease.acquire())
+        self.assertEqual(reap_expired_leases(now=self.expired()), (0, 1))
+        transcription.status = 'completed'
+        self.assertFalse(lease.save())
+        self.assertTrue(lease.lost)
+        lease.release()
+        transcription.refresh_from_db()
+        self.assertEqual(transcription.status, 'failed')
+    
+    def test_reaper_fails_uploads_and_requeues_refinements(self):
+        lease = {'lease_owner': 'other:1:1', 'lease_expires_at': timezone.now()}
+        upload = self.create(status='processing', **lease)
+        # First-pass retries don't use up the refinement's attempts
+        refinement = self.create(
+            status='completed', attempts=3, refinement_status='processing', refinement_attempts=1, **lease
+        )
+        exhausted = self.create(status='completed', refinement_status='processing', refinement_attempts=3, **lease)
+        live = self.create(
+            status='processing', lease_owner='other:1:1', lease_expires_at=timezone.now() + timedelta(seconds=60)
+        )
+        out = StringIO()
+        with self.settings(RETRY_MAX_ATTEMPTS=3):
+            call_command('reap_leases', stdout=out)
+        self.assertIn('1 refinements requeued, 2 uploads or refinements failed', out.getvalue())
+        statuses = {
+            row.pk: (row.status, row.refinement_status, row.lease_owner)
+            for row in AudioTranscription.objects.all()
+        }
+        self.assertEqual(statuses[upload.pk], ('failed', '', ''))
+        self.assertEqual(statuses[refinement.pk], ('completed', 'pending', ''))
+        self.assertEqual(statuses[exhausted.pk], ('completed', 'failed', ''))
+        self.assertEqual(statuses[live.pk], ('processing', '', 'other:1:1'))
+
+
+@override_settings(TRANSCRIPT_COMPRESSION='zlib', TRANSCRIPT_COMPRESSION_MIN_LENGTH=100)
+class TranscriptCompressionTests(TestCase):
+    text = 'the quick brown fox jumps over the lazy dog ' * 20
+    
+    def create(self, text):
+        return AudioTranscription.objects.create(
+            original_filename='talk.wav', file_size=1, file_format='wav', transcription_text=text
+        )
+    
+    def stored(self, transcription):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT transcription_text FROM {AudioTranscription._meta.db_table} WHERE id = %s', [transcription.pk]
+            )
+            return cursor.fetchone()[0]
+    
+    def test_long_transcripts_round_trip_compressed(self):
+        transcription = self.create(self.text)
+        self.assertTrue(self.stored(transcription).startswith(PREFIXES['zlib']))
+        self.assertLess(len(self.stored(transcription)), len(self.text))
+        transcription.refresh_from_db()
+        self.assertEqual(transcription.transcription_text, self.text)
+    
+    def test_plain_and_compressed_rows_mix(self):
+        with self.settings(TRANSCRIPT_COMPRESSION=None):
+            plain = self.create(self.text)
+        compressed = self.create(self.text)
+        short = self.create('hello')
+        self.assertEqual(self.stored(plain), self.text)
+        self.assertEqual(self.stored(short), 'hello')
+        texts = dict(AudioTranscription.objects.values_list('pk', 'transcription_text'))
+        self.assertEqual(texts, {plain.pk: self.text, compressed.pk: self.text, short.pk: 'hello'})
+        self.assertEqual(
+            [row['transcription_text'] for row in AudioTranscription.objects.filter(pk=compressed.pk).values()],
+            [self.text]
+        )
+    
+    def test_compress_transcripts_command_and_decompress(self):
+        with self.settings(TRANSCRIPT_COMPRESSION=None):
+            transcription = self.create(self.text)
+            call_command('compress_transcripts', codec='zlib', stdout=StringIO())
+            self.assertTrue(self.stored(transcription).startswith(PREFIXES['zlib']))
+            call_command('compress_transcripts', decompress=True, stdout=StringIO())
+        self.assertEqual(self.stored(transcription), self.text)
+        transcription.refresh_from_db()
+        self.assertEqual(transcription.transcription_text, self.text)
+    
+    def test_decompress_refuses_while_compression_is_on(self):
+        with self.assertRaises(CommandError):
+            call_command('compress_transcripts', decompress=True, stdout=StringIO())
+    
+    def test_admin_search_skips_compressed_transcripts(self):
+        model_admin = site._registry[AudioTranscription]
+        request = RequestFactory().get('/admin/')
+        self.assertNotIn('transcription_text', model_admin.get_search_fields(request))
+        with self.settings(TRANSCRIPT_COMPRESSION=None):
+            self.assertIn('transcription_text', model_admin.get_search_fields(request))
+
+
+def wav_bytes(seconds=1, sample_rate=16000, channels=1):
+    samples = bytes(int(seconds * sample_rate) * channels * 2)
+    return (
+        b'RIFF' + struct.pack('<I', 36 + len(samples)) + b'WAVE'
+        + b'fmt ' + struct.pack('<IHHIIHH', 16, 1, channels, sample_rate, sample_rate * channels * 2, channels * 2, 16)
+        + b'data' + struct.pack('<I', len(samples)) + samples
+    )
+
+
+def flac_bytes(seconds=2, sample_rate=44100, channels=2):
+    fields = sample_rate << 44 | (channels - 1) << 41 | 15 << 36 | seconds * sample_rate
+    streaminfo = struct.pack('>HH', 4096, 4096) + bytes(6) + fields.to_bytes(8, 'big') + bytes(16)
+    return b'fLaC' + bytes([0x80, 0, 0, len(streaminfo)]) + streaminfo + bytes(1000)
+
+
+def ogg_bytes(seconds=2, sample_rate=44100, channels=2):
+    packet = b'\x01vorbis' + struct.pack('<IBIiii', 0, channels, sample_rate, 0, 128000, 0) + b'\xb8\x01'
+    header = b'OggS' + struct.pack('<BBqIIIB', 0, 2, seconds * sample_rate, 1, 0, 0, 1) + bytes([len(packet)])
+    return header + packet
+
+
+def mp4_box(box_type, body=b''):
+    return struct.pack('>I4s', 8 + len(body), box_type) + body
+
+
+def m4a_bytes(seconds=5, sample_rate=44100, channels=2):
+    mvhd = mp4_box(b'mvhd', bytes(12) + struct.pack('>II', 1000, seconds * 1000) + bytes(80))
+    entry = struct.pack('>I4s', 36, b'mp4a') + bytes(16) + struct.pack('>HHI', channels, 16, 0)
+    stsd = mp4_box(b'stsd', bytes(8) + entry + struct.pack('>I', sample_rate << 16))
+    trak = mp4_box(b'trak', mp4_box(b'mdia', mp4_box(b'minf', mp4_box(b'stbl', stsd))))
+    return mp4_box(b'ftyp', b'M4A \x00\x00\x00\x00') + mp4_box(b'moov', mvhd + trak)
+
+
+def mp3_bytes(frames=40):
+    # MPEG-1 layer III, 128 kbps, 44.1 kHz, stereo: 417-byte frames
+    return (b'\xff\xfb\x90\x00' + bytes(413)) * frames
+
+
+def adts_bytes(frames=40, length=200):
+    # AAC LC, 44.1 kHz, stereo
+    header = bytes([0xff, 0xf1, 0x50, 0x80 | length >> 11, (length >> 3) & 0xff, (length & 7) << 5 | 0x1f, 0xfc])
+    return (header + bytes(length - 7)) * frames
+
+
+class ProbeTests(TestCase):
+    def validate(self, data, extension):
+        return validate_audio(io.BytesIO(data), extension)
+    
+    def assertRejected(self, data, extension):
+        with self.assertRaises(InvalidAudio):
+            self.validate(data, extension)
+    
+    def test_valid_headers(self):
+        cases = [
+            (wav_bytes(), '.wav', ('wav', 'pcm', 16000, 1, 1.0)),
+            (flac_bytes(), '.flac', ('flac', 'flac', 44100, 2, 2.0)),
+            (ogg_bytes(), '.ogg', ('ogg', 'vorbis', 44100, 2, 2.0)),
+            (m4a_bytes(), '.m4a', ('m4a', 'aac', 44100, 2, 5.0)),
+            (mp3_bytes(), '.mp3', ('mp3', 'mp3', 44100, 2, 40 * 417 * 8 / 128000)),
+            (adts_bytes(), '.aac', ('aac', 'aac', 44100, 2, 40 * 1024 / 44100)),
+        ]
+        for data, extension, expected in cases:
+            info = self.validate(data, extension)
+            self.assertEqual(
+                (info['format'], info['codec'], info['sample_rate'], info['channels']), expected[:4], extension
+            )
+            self.assertAlmostEqual(info['duration'], expected[4], places=3, msg=extension)
+    
+    def test_mp3_after_id3_and_short_files(self):
+        id3 = b'ID3\x03\x00\x00\x00\x00\x00\x0a' + bytes(10)
+        self.assertEqual(self.validate(id3 + mp3_bytes(), '.mp3')['format'], 'mp3')
+        # Fewer than three frames is enough when they run to the end of the file
+        self.assertEqual(self.validate(mp3_bytes(frames=2), '.mp3')['format'], 'mp3')
+    
+    def test_garbage_is_rejected(self):
+        rng = random.Random(0)
+        for _ in range(50):
+            blob = rng.randbytes(50000)
+            for extension in ('.mp3', '.aac', '.wav', '.flac', '.ogg', '.m4a'):
+                self.assertRejected(blob, extension)
+    
+    def test_other_formats_with_audio_extensions_are_rejected(self):
+        rng = random.Random(1)
+        for signature in (b'PK\x03\x04', b'%PDF-1.4\n', b'\x89PNG\r\n\x1a\n', b'\xff\xd8\xff\xe0'):
+            for extension in ('.mp3', '.aac'):
+                self.assertRejected(signature + rng.randbytes(50000), extension)
+    
+    def test_mismatched_extensions_are_rejected(self):
+        self.assertRejected(wav_bytes(), '.mp3')
+        self.assertRejected(mp3_bytes(), '.wav')
+        self.assertRejected(flac_bytes(), '.ogg')
+        # AAC may come in an MP4 container
+        self.assertEqual(self.validate(m4a_bytes(), '.aac')['format'], 'm4a')
+    
+    def test_mp4_nesting_and_box_count_are_limited(self):
+        nested = b''
+        for _ in range(MP4_MAX_DEPTH + 2):
+            nested = mp4_box(b'trak', nested)
+        ftyp = mp4_box(b'ftyp', b'M4A \x00\x00\x00\x00')
+        self.assertIsNone(probe_audio(io.BytesIO(ftyp + nested)))
+        self.assertIsNone(probe_audio(io.BytesIO(ftyp + mp4_box(b'free') * (MP4_MAX_BOXES + 1))))
+        # Boxes after the moov aren't walked, so long fragmented files still pass
+        self.assertEqual(probe_audio(io.BytesIO(m4a_bytes() + mp4_box(b'free') * (MP4_MAX_BOXES + 1)))['duration'], 5.0)
@@ -0,0 +1,99 @@
+import math
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.http import JsonResponse
+from django.utils import timezone
+
+from .estimates import estimate_processing_seconds, expected_audio_seconds
+from .models import AudioTranscription
+
+
+def get_client_id(request):
+    """Identify the client an upload is throttled under"""
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f"ip:{request.META.get('REMOTE_ADDR', '')}"
+
+
+class TokenBucket:
+    """Per-client token bucket kept in the default cache
+    
+    The read-modify-write isn't atomic, so concurrent requests from one client
+    can occasionally overdraw by a token; that is fine for absorbing bursts.
+    """
+    
+    def __init__(self, rate, capacity, prefix='upload-bucket'):
+        self.rate = rate
+        self.capacity = capacity
+        self.prefix = prefix
+    
+    def consume(self, client_id):
+        """Take a token; return 0 if allowed, else the seconds until one is available"""
+        now = time.time()
+        key = f'{self.prefix}:{client_id}'
+        tokens, updated = cache.get(key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+        timeout = math.ceil(self.capacity / self.rate) + 60
+        if tokens >= 1:
+            cache.set(key, (tokens - 1, now), timeout)
+            return 0
+        cache.set(key, (tokens, now), timeout)
+        return (1 - tokens) / self.rate
+
+
+def upload_bucket():
+    per_minute = getattr(settings, 'UPLOAD_RATE_PER_MINUTE', None)
+    if not per_minute:
+        return None
+    return TokenBucket(per_minute / 60, getattr(settings, 'UPLOAD_BURST', 5))
+
+
+def backlog_audio_seconds():
+    """Audio-seconds of work queued or in progress"""
+    # Rows older than a day are stuck rather than queued and shouldn't block admission
+    since = timezone.now() - timedelta(days=1)
+    return AudioTranscription.objects.filter(
+        status__in=['pending', 'processing'], created_at__gte=since
+    ).aggregate(seconds=Sum(expected_audio_seconds()))['seconds'] or 0.0
+
+
+def backlog_retry_after():
+    """None if the backlog admits new work, else a Retry-After in seconds"""
+    limit = getattr(settings, 'LOAD_SHED_MAX_BACKLOG_SECONDS', None)
+    if limit is None:
+        return None
+    backlog = cache.get_or_set('transcription-backlog', backlog_audio_seconds, 2)
+    if backlog <= limit:
+        return None
+    return min(max(math.ceil(estimate_processing_seconds(backlog - limit)), 1), 600)
+
+
+def admission_control(view):
+    """Refuse uploads with 429 when a client exceeds its rate and 503 when the backlog is full
+    
+    Runs before the view touches request.FILES, so rejected uploads are never parsed or stored.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        # The backlog goes first so a 503 doesn't cost the client a token
+        retry_after = backlog_retry_after()
+        if retry_after is not None:
+            response = JsonResponse({'error': 'The server is busy, please retry later'}, status=503)
+            response['Retry-After'] = str(retry_after)
+            return response
+        
+        bucket = upload_bucket()
+        if bucket is not None:
+            wait = bucket.consume(get_client_id(request))
+            if wait:
+                response = JsonResponse({'error': 'Too many uploads, please slow down'}, status=429)
+                response['Retry-After'] = str(math.ceil(wait))
+                return response
+        
+        return view(request, *args, **kwargs)
+    return wrapper
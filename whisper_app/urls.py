@@ -8,5 +8,7 @@ urlpatterns = [
     path('upload/', views.upload_audio, name='upload_audio'),
     path('history/', views.transcription_history, name='history'),
     path('detail/<int:transcription_id>/', views.transcription_detail, name='detail'),
+    path('status/<int:transcription_id>/', views.transcription_status, name='status'),
+    path('audio/<int:transcription_id>/', views.stream_audio, name='stream_audio'),
     path('health/', views.health_check, name='health'),
 ]
@@ -1,37 +1,36 @@
 import os
-import time
 import logging
+from django.conf import settings
 from django.shortcuts import render
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
-from django.conf import settings
+from .decoding import decoding_profiles, default_decoding_profile
+from .engine import whisper_models
+from .language import normalize_language
+from .leases import lease_fields
 from .models import AudioTranscription
-import whisper
+from .probe import InvalidAudio, validate_audio
+from .processing import refine_in_background, transcribe
+from .streaming import serve_audio
+from .throttling import admission_control
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Initialize Whisper model (load once at startup)
-whisper_model = None
-
-def load_whisper_model():
-    """Load the Whisper model - this can take some time on first run"""
-    global whisper_model
-    if whisper_model is None:
-        logger.info("Loading Whisper model...")
-        whisper_model = whisper.load_model("base")  # You can change to "tiny", "small", "medium", "large"
-        logger.info("Whisper model loaded successfully!")
-    return whisper_model
-
 def index(request):
     """Main page view"""
-    return render(request, 'whisper_app/index.html')
+    return render(request, 'whisper_app/index.html', {
+        'two_pass_default': getattr(settings, 'TWO_PASS_DEFAULT', False),
+        'decoding_profiles': list(decoding_profiles()),
+        'default_decoding_profile': default_decoding_profile(),
+    })
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@admission_control
 def upload_audio(request):
     """Handle audio file upload and transcription"""
     try:
@@ -48,48 +47,76 @@ def upload_audio(request):
         if file_ext not in allowed_extensions:
             return JsonResponse({'error': 'Invalid file type'}, status=400)
         
+        # Optional language hint lets us skip language detection entirely
+        language = request.POST.get('language', '').strip() or None
+        if language:
+            language = normalize_language(language)
+            if language is None:
+                return JsonResponse({'error': 'Unsupported language'}, status=400)
+        
+        # Decoding profile trades accuracy for speed
+        decoding_profile = request.POST.get('decoding_profile', '').strip() or default_decoding_profile()
+        if decoding_profile not in decoding_profiles():
+            return JsonResponse({'error': 'Unknown decoding profile'}, status=400)
+        
+        # Two-pass mode answers with a small model's draft and refines it afterwards
+        two_pass = request.POST.get('two_pass')
+        if two_pass is None:
+            two_pass = getattr(settings, 'TWO_PASS_DEFAULT', False)
+        else:
+            two_pass = two_pass.lower() in ('1', 'true', 'on', 'yes')
+        
+        # Sniff and parse the headers now rather than fail in ffmpeg later;
+        # decoding refines the duration
+        try:
+            probe = validate_audio(audio_file, file_ext)
+        except InvalidAudio as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        
         # Create transcription record
         transcription = AudioTranscription.objects.create(
             original_filename=audio_file.name,
             file_size=audio_file.size,
             file_format=file_ext[1:],  # Remove the dot
-            status='processing'
+            language=language,
+            audio_duration=probe.get('duration'),
+            sample_rate=probe.get('sample_rate'),
+            channels=probe.get('channels'),
+            two_pass=two_pass,
+            decoding_profile=decoding_profile,
+            status='processing',
+            # Leased from the start, so the reaper fails the row if this process dies
+            **lease_fields()
         )
         
         # Save the file
         file_path = default_storage.save(f'audio_uploads/{transcription.id}_{audio_file.name}', audio_file)
         transcription.audio_file = file_path
-        transcription.save()
+        transcription.save(update_fields=['audio_file', 'updated_at'])
         
         # Process with Whisper
-        start_time = time.time()
-        model = load_whisper_model()
-        
-        logger.info(f"Transcribing audio file: {audio_file.name}")
-        
-        # Get the full file path
-        full_file_path = os.path.join(settings.MEDIA_ROOT, file_path)
-        
-        # Transcribe the audio
-        result = model.transcribe(full_file_path)
-        transcription_text = result["text"]
-        
-        # Calculate processing time
-        processing_time = time.time() - start_time
-        
-        # Update transcription record
-        transcription.transcription_text = transcription_text
-        transcription.processing_time = processing_time
-        transcription.status = 'completed'
-        transcription.save()
-        
-        logger.info(f"Transcription completed for {audio_file.name} in {processing_time:.2f}s")
+        if not transcribe(transcription):
+            error = transcription.error_message or 'The upload was taken over by another worker'
+            return JsonResponse({'error': f'Transcription failed: {error}'}, status=500)
+        if transcription.refinement_status == 'pending':
+            refine_in_background()
         
         return JsonResponse({
             'success': True,
-            'transcription': transcription_text,
+            'transcription': transcription.transcription_text,
             'filename': audio_file.name,
-            'processing_time': processing_time,
+            'processing_time': transcription.processing_time,
+            'audio_duration': transcription.audio_duration,
+            'sample_rate': transcription.sample_rate,
+            'channels': transcription.channels,
+            'real_time_factor': transcription.real_time_factor,
+            'stage_timings': transcription.stage_timings,
+            'language': transcription.language,
+            'language_probability': transcription.language_probability,
+            'model_name': transcription.model_name,
+            'decoding_profile': transcription.decoding_profile,
+            'draft_model_name': transcription.draft_model_name,
+            'refinement_status': transcription.refinement_status,
             'transcription_id': transcription.id
         })
         
@@ -117,10 +144,36 @@ def transcription_detail(request, transcription_id):
     except AudioTranscription.DoesNotExist:
         return JsonResponse({'error': 'Transcription not found'}, status=404)
 
+def transcription_status(request, transcription_id):
+    """Current text and refinement progress, polled by the upload page in two-pass mode"""
+    try:
+        transcription = AudioTranscription.objects.get(id=transcription_id)
+    except AudioTranscription.DoesNotExist:
+        return JsonResponse({'error': 'Transcription not found'}, status=404)
+    return JsonResponse({
+        'status': transcription.status,
+        'transcription': transcription.transcription_text,
+        'model_name': transcription.model_name,
+        'draft_model_name': transcription.draft_model_name,
+        'refinement_status': transcription.refinement_status,
+    })
+
+@require_http_methods(["GET", "HEAD"])
+def stream_audio(request, transcription_id):
+    """Stream the uploaded audio with Range and conditional GET support"""
+    try:
+        transcription = AudioTranscription.objects.get(id=transcription_id)
+        if not transcription.audio_file:
+            return JsonResponse({'error': 'Audio file is no longer stored'}, status=404)
+        return serve_audio(request, transcription.audio_file)
+    except (AudioTranscription.DoesNotExist, FileNotFoundError):
+        return JsonResponse({'error': 'Audio file not found'}, status=404)
+
 def health_check(request):
     """Health check endpoint"""
     return JsonResponse({
         'status': 'healthy',
-        'model_loaded': whisper_model is not None,
+        'model_loaded': bool(whisper_models),
+        'models_loaded': sorted(whisper_models),
         'django_version': '5.2.5'
     })